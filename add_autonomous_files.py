@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
-import re
-import uuid
+import argparse
+
+import profiling
+from pbxproj import ProjectTransaction, stable_uuid
 
 # 需要添加的檔案列表
 files_to_add = [
@@ -26,79 +28,59 @@ files_to_add = [
     }
 ]
 
-def generate_uuid():
-    """生成24字符的UUID"""
-    return str(uuid.uuid4()).replace('-', '').upper()[:24]
+def generate_uuid(role, path):
+    """依角色與路徑生成固定的24字符UUID，重複執行時ID不變"""
+    return stable_uuid(role, path)
 
-def add_files_to_xcode_project():
+def add_files_to_xcode_project(cleanup=False, profiler=None):
     project_file = "SignalAir-iOS/SignalAir Rescue.xcodeproj/project.pbxproj"
     
-    # 讀取專案檔案
-    with open(project_file, 'r') as f:
-        content = f.read()
-    
-    # 為每個檔案生成UUID
-    file_refs = {}
-    build_files = {}
-    
-    for file_info in files_to_add:
-        file_refs[file_info["name"]] = generate_uuid()
-        build_files[file_info["name"]] = generate_uuid()
-    
-    # 在PBXFileReference區段添加檔案引用
-    file_ref_section = "/* End PBXFileReference section */"
-    file_ref_insertions = []
-    
-    for file_info in files_to_add:
-        file_ref_line = f"\t\t{file_refs[file_info['name']]} /* {file_info['name']} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {file_info['name']}; sourceTree = \"<group>\"; }};"
-        file_ref_insertions.append(file_ref_line)
-    
-    # 添加檔案引用
-    file_ref_insert_text = "\n".join(file_ref_insertions) + "\n"
-    content = content.replace(file_ref_section, file_ref_insert_text + file_ref_section)
-    
-    # 在PBXBuildFile區段添加建置檔案
-    build_file_section = "/* End PBXBuildFile section */"
-    build_file_insertions = []
-    
-    for file_info in files_to_add:
-        build_file_line = f"\t\t{build_files[file_info['name']]} /* {file_info['name']} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_refs[file_info['name']]} /* {file_info['name']} */; }};"
-        build_file_insertions.append(build_file_line)
-    
-    # 添加建置檔案
-    build_file_insert_text = "\n".join(build_file_insertions) + "\n"
-    content = content.replace(build_file_section, build_file_insert_text + build_file_section)
-    
-    # 在Sources區段添加檔案到建置階段
-    sources_pattern = r"(files = \(\s*(?:[^;]+;\s*)*)"
-    
-    for file_info in files_to_add:
-        sources_line = f"\t\t\t\t{build_files[file_info['name']]} /* {file_info['name']} in Sources */,"
-        content = re.sub(sources_pattern, r"\1" + sources_line + "\n", content, count=1)
-    
-    # 找到適當的群組來添加檔案
-    # 對於Core/Services檔案
-    services_group_pattern = r"(Core/Services.*?children = \(\s*(?:[^;]+;\s*)*)"
-    for file_info in files_to_add:
-        if "Services" in file_info["path"]:
-            group_line = f"\t\t\t\t{file_refs[file_info['name']]} /* {file_info['name']} */,"
-            content = re.sub(services_group_pattern, r"\1" + group_line + "\n", content, count=1)
-    
-    # 對於Core/Security檔案
-    security_group_pattern = r"(Core/Security.*?children = \(\s*(?:[^;]+;\s*)*)"
-    for file_info in files_to_add:
-        if "Security" in file_info["path"]:
-            group_line = f"\t\t\t\t{file_refs[file_info['name']]} /* {file_info['name']} */,"
-            content = re.sub(security_group_pattern, r"\1" + group_line + "\n", content, count=1)
-    
-    # 寫回檔案
-    with open(project_file, 'w') as f:
-        f.write(content)
+    # 將所有變更排入同一個交易，提交時只解析與寫入一次（原子替換）
+    # 已存在的檔案（不論以完整路徑或檔名引用）會被略過，重複執行不會新增重複項目
+    with ProjectTransaction(project_file, profiler) as transaction:
+        if cleanup:
+            # 合併指向同一路徑的重複引用與重複的編譯項目
+            transaction.dedupe()
+        for file_info in files_to_add:
+            transaction.add_file(
+                file_info["path"],
+                file_ref_id=generate_uuid("file_ref", file_info["path"]),
+                build_file_id=generate_uuid("build_file", file_info["path"])
+            )
     
     print("✅ 已將自動化系統檔案添加到Xcode專案")
     print("添加的檔案:")
     for file_info in files_to_add:
         print(f"  - {file_info['name']}")
 
+def remove_files_from_xcode_project(paths=(), moves=()):
+    project_file = "SignalAir-iOS/SignalAir Rescue.xcodeproj/project.pbxproj"
+    
+    # 刪除檔案時一併回收其編譯項目與變空的群組；移動/重新命名時保留編譯項目
+    with ProjectTransaction(project_file) as transaction:
+        for path in paths:
+            transaction.remove(path)
+        for old_path, new_path in moves:
+            transaction.move(old_path, new_path)
+    
+    for path in paths:
+        print(f"🗑️ 已移除 {path}")
+    for old_path, new_path in moves:
+        print(f"📦 已移動 {old_path} → {new_path}")
+
 if __name__ == "__main__":
-    add_files_to_xcode_project() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="將自動化系統檔案添加到Xcode專案")
+    parser.add_argument('--cleanup', action='store_true', help="同時合併重複的檔案引用")
+    parser.add_argument('--remove', action='append', default=[], metavar='PATH', help="從專案移除檔案或群組")
+    parser.add_argument('--move', action='append', default=[], nargs=2, metavar=('OLD', 'NEW'),
+                        help="移動或重新命名檔案")
+    parser.add_argument('--profile', metavar='FILE', help="記錄各階段的時間與記憶體峰值（JSON 與火焰圖格式）")
+    args = parser.parse_args()
+    if args.remove or args.move:
+        remove_files_from_xcode_project(args.remove, args.move)
+    else:
+        profiler = profiling.Profiler() if args.profile else None
+        with (profiler or profiling.NULL_PROFILER).phase('add_files_to_xcode_project'):
+            add_files_to_xcode_project(args.cleanup, profiler)
+        if profiler is not None:
+            profiler.finish(args.profile) 
\ No newline at end of file
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Render AppIcon sets from their 1024x1024 master and write Contents.json.
+
+Every *.appiconset in an asset catalog that holds MASTER_NAME gets one PNG
+per pixel size in ICON_SLOTS, rendered on a process pool with Pillow (or
+macOS sips when Pillow is not installed). Outputs are cached by master hash
+and size in CACHE_NAME, so a run where no master changed renders nothing.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pbxproj import DEFAULT_PROJECT, PBXParseError, PBXProj, write_if_changed
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_CATALOG = "SignalAir-iOS/SignalAir/Assets.xcassets"
+MASTER_NAME = "logo_1024x1024.png"
+CACHE_NAME = ".appicon-cache.json"
+CACHE_VERSION = 1
+APPICON_SETTING = 'ASSETCATALOG_COMPILER_APPICON_NAME'
+
+# (idiom, size in points, scale) for an iPhone and iPad app
+ICON_SLOTS = [
+    ('iphone', '20x20', '2x'), ('iphone', '20x20', '3x'),
+    ('iphone', '29x29', '1x'), ('iphone', '29x29', '2x'), ('iphone', '29x29', '3x'),
+    ('iphone', '40x40', '2x'), ('iphone', '40x40', '3x'),
+    ('iphone', '60x60', '2x'), ('iphone', '60x60', '3x'),
+    ('ipad', '20x20', '1x'), ('ipad', '20x20', '2x'),
+    ('ipad', '29x29', '1x'), ('ipad', '29x29', '2x'),
+    ('ipad', '40x40', '1x'), ('ipad', '40x40', '2x'),
+    ('ipad', '76x76', '1x'), ('ipad', '76x76', '2x'),
+    ('ipad', '83.5x83.5', '2x'),
+    ('ios-marketing', '1024x1024', '1x'),
+]
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class AssetError(RuntimeError):
+    pass
+
+
+def slot_pixels(size, scale):
+    return round(float(size.split('x')[0]) * float(scale.rstrip('x')))
+
+
+def icon_name(pixels):
+    return f"logo_{pixels}x{pixels}.png"
+
+
+def contents_json(slots=ICON_SLOTS):
+    images = [{'filename': icon_name(slot_pixels(size, scale)), 'idiom': idiom, 'scale': scale, 'size': size}
+              for idiom, size, scale in slots]
+    # Xcode's own layout, so opening the catalog in Xcode does not rewrite it
+    return json.dumps({'images': images, 'info': {'author': 'xcode', 'version': 1}},
+                      indent=2, separators=(',', ' : '), sort_keys=True) + '\n'
+
+
+def png_size(path):
+    """(width, height) from a PNG's IHDR chunk, or None if path is not a PNG."""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    if len(header) < 24 or not header.startswith(_PNG_SIGNATURE) or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def renderer():
+    """'pil', 'sips' or None, whichever can resize PNGs here."""
+    if Image is not None:
+        return 'pil'
+    if shutil.which('sips'):
+        return 'sips'
+    return None
+
+
+def _render(master, pixels, output, method):
+    # Runs in a worker process; renders next to output and renames over it
+    tmp_output = os.path.join(os.path.dirname(output), f".{os.path.basename(output)}.{os.getpid()}.png")
+    try:
+        if method == 'pil':
+            with Image.open(master) as image:
+                image.resize((pixels, pixels), Image.LANCZOS).save(tmp_output, format='PNG')
+        else:
+            subprocess.run(['sips', '-z', str(pixels), str(pixels), master, '--out', tmp_output],
+                           capture_output=True, check=True)
+        os.replace(tmp_output, output)
+    finally:
+        if os.path.exists(tmp_output):
+            os.unlink(tmp_output)
+    return os.path.basename(output), file_hash(output)
+
+
+class IconSetResult:
+    def __init__(self, iconset):
+        self.iconset = iconset
+        self.rendered = []
+        self.reused = 0
+        self.contents_changed = False
+
+
+def load_cache(iconset):
+    try:
+        with open(os.path.join(iconset, CACHE_NAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('outputs', {}) if data.get('version') == CACHE_VERSION else {}
+
+
+def save_cache(iconset, outputs):
+    write_if_changed(os.path.join(iconset, CACHE_NAME), lambda f: json.dump(
+        {'version': CACHE_VERSION, 'outputs': outputs}, f, separators=(',', ':'), sort_keys=True))
+
+
+def plan_iconset(iconset, slots=ICON_SLOTS):
+    """(result, cache, stale [(pixels, output)], master hash) for one icon set."""
+    master = os.path.join(iconset, MASTER_NAME)
+    master_hash = file_hash(master)
+    cache = load_cache(iconset)
+    result = IconSetResult(iconset)
+    stale = []
+    for pixels in sorted({slot_pixels(size, scale) for _, size, scale in slots}):
+        name = icon_name(pixels)
+        if name == MASTER_NAME:
+            continue
+        output = os.path.join(iconset, name)
+        entry = cache.get(name)
+        if entry and entry.get('source') == master_hash and entry.get('pixels') == pixels \
+                and os.path.exists(output) and file_hash(output) == entry.get('output'):
+            result.reused += 1
+        else:
+            stale.append((pixels, output))
+    return result, cache, stale, master_hash
+
+
+def build_catalog(catalog, slots=ICON_SLOTS, workers=None):
+    """Bring every icon set with a master in catalog up to date; return their IconSetResults."""
+    plans = []
+    for entry in sorted(os.listdir(catalog)):
+        iconset = os.path.join(catalog, entry)
+        if entry.endswith('.appiconset') and os.path.exists(os.path.join(iconset, MASTER_NAME)):
+            plans.append(plan_iconset(iconset, slots))
+
+    jobs = [(result, cache, master_hash, pixels, output)
+            for result, cache, stale, master_hash in plans for pixels, output in stale]
+    if jobs:
+        method = renderer()
+        if method is None:
+            raise AssetError("resizing icons needs Pillow (pip install Pillow) or macOS sips")
+        # Only started when something is stale, so an up-to-date run stays cheap
+        with ProcessPoolExecutor(max_workers=min(len(jobs), workers or os.cpu_count() or 1)) as pool:
+            futures = [(job, pool.submit(_render, os.path.join(job[0].iconset, MASTER_NAME), job[3], job[4], method))
+                       for job in jobs]
+            for (result, cache, master_hash, pixels, _), future in futures:
+                name, output_hash = future.result()
+                cache[name] = {'source': master_hash, 'pixels': pixels, 'output': output_hash}
+                result.rendered.append(name)
+
+    contents = contents_json(slots)
+    for result, cache, _, _ in plans:
+        result.contents_changed = write_if_changed(os.path.join(result.iconset, 'Contents.json'),
+                                                   lambda f: f.write(contents))
+        save_cache(result.iconset, cache)
+    return [plan[0] for plan in plans]
+
+
+def verify_iconset(iconset):
+    """Problems with an icon set: missing files and images whose size does not match their slot."""
+    problems = []
+    try:
+        with open(os.path.join(iconset, 'Contents.json'), 'r', encoding='utf-8') as f:
+            images = json.load(f).get('images', [])
+    except (OSError, ValueError) as e:
+        return [f"{iconset}: unreadable Contents.json ({e})"]
+    checked = set()
+    for image in images:
+        name = image.get('filename')
+        if not name:
+            problems.append(f"{iconset}: no image for {image.get('idiom')} {image.get('size')}@{image.get('scale')}")
+            continue
+        if name in checked:
+            continue
+        checked.add(name)
+        path = os.path.join(iconset, name)
+        if not os.path.exists(path):
+            problems.append(f"{path} is missing")
+            continue
+        expected = slot_pixels(image['size'], image['scale'])
+        actual = png_size(path)
+        if actual is None:
+            problems.append(f"{path} is not a PNG")
+        elif actual != (expected, expected):
+            problems.append(f"{path} is {actual[0]}x{actual[1]}, "
+                            f"{image['size']}@{image['scale']} needs {expected}x{expected}")
+    return problems
+
+
+def asset_catalogs(project, project_root):
+    """Paths of the asset catalogs the project references that exist on disk."""
+    paths = project.resolved_paths()
+    return [os.path.join(project_root, paths[file_ref_id])
+            for file_ref_id, file_ref in project.objects_of('PBXFileReference')
+            if file_ref.get('lastKnownFileType') == 'folder.assetcatalog' and file_ref_id in paths
+            and os.path.isdir(os.path.join(project_root, paths[file_ref_id]))]
+
+
+def verify_project(project_file):
+    """Check that every target's ASSETCATALOG_COMPILER_APPICON_NAME names a valid icon set."""
+    import xcconfig
+    project = PBXProj.load(project_file)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(project_file)))
+    catalogs = asset_catalogs(project, project_root)
+    problems = []
+    checked = set()
+    for target_id, target in project.objects_of('PBXNativeTarget'):
+        for _, config_name, config in xcconfig.configurations_of(project, target.get('buildConfigurationList')):
+            name = xcconfig.effective_settings(project, config, project_root).get(APPICON_SETTING)
+            if not name or name in checked:
+                continue
+            checked.add(name)
+            iconsets = [os.path.join(catalog, f"{name}.appiconset") for catalog in catalogs
+                        if os.path.isdir(os.path.join(catalog, f"{name}.appiconset"))]
+            if not iconsets:
+                problems.append(f"{target.get('name')} {config_name}: {APPICON_SETTING} = {name}, "
+                                f"but no {name}.appiconset in {', '.join(catalogs) or 'any asset catalog'}")
+            for iconset in iconsets:
+                problems += verify_iconset(iconset)
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render AppIcon sets from their 1024x1024 master")
+    parser.add_argument('--catalog', action='append',
+                        help=f"asset catalog to process (default: {DEFAULT_CATALOG}); may be repeated")
+    parser.add_argument('--project', default=DEFAULT_PROJECT,
+                        help=f"project whose {APPICON_SETTING} is verified afterwards")
+    parser.add_argument('--verify-only', action='store_true', help="only check the catalog against the project")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if not args.verify_only:
+        for catalog in args.catalog or [DEFAULT_CATALOG]:
+            try:
+                results = build_catalog(catalog, workers=args.workers)
+            except (OSError, AssetError, subprocess.CalledProcessError) as e:
+                print(f"❌ {catalog}: {e}", file=sys.stderr)
+                return 1
+            for result in results:
+                status = f"rendered {', '.join(result.rendered)}" if result.rendered else "up to date"
+                print(f"🎨 {os.path.basename(result.iconset)}: {status} ({result.reused} cached"
+                      f"{', Contents.json updated' if result.contents_changed else ''})")
+    try:
+        problems = verify_project(args.project)
+    except (OSError, PBXParseError) as e:
+        print(f"❌ 無法讀取 {args.project}: {e}", file=sys.stderr)
+        return 1
+    for problem in problems:
+        print(f"❌ {problem}")
+    elapsed = time.perf_counter() - start
+    if problems:
+        return 1
+    print(f"✅ App icons match {APPICON_SETTING} ({elapsed:.3f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Benchmarks for the project generation tooling on synthetic SignalAir-style trees.
+
+Each case runs in a fresh interpreter so peak RSS is not polluted by earlier
+cases. Results are written as JSON and can be compared against a stored
+baseline; any case slower than baseline * threshold fails the run.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Directory layout mirrored from SignalAir-iOS/SignalAir
+LAYOUT = [
+    "App",
+    "Core/Network",
+    "Core/Security",
+    "Core/Services",
+    "Core/Protocol",
+    "Features/Chat",
+    "Features/Game",
+    "Features/Game/Components",
+    "Features/Legal",
+    "Features/Settings",
+    "Features/Signal",
+    "Services",
+    "Shared/Models",
+]
+DEFAULT_SIZES = "1000,10000,100000"
+INCREMENTAL_FILES = 50
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text.endswith('k'):
+        return int(float(text[:-1]) * 1000)
+    return int(text)
+
+
+def build_tree(root, count, project_name="SignalAir"):
+    """Create count Swift files spread over the SignalAir layout, about 100 per leaf directory."""
+    created = set()
+    for i in range(count):
+        directory = os.path.join(root, project_name, LAYOUT[i % len(LAYOUT)], f"Module{i // (100 * len(LAYOUT))}")
+        if directory not in created:
+            os.makedirs(directory, exist_ok=True)
+            created.add(directory)
+        with open(os.path.join(directory, f"Generated{i}.swift"), 'w') as f:
+            f.write(f"import Foundation\n\nstruct Generated{i} {{}}\n")
+
+
+def build_pbxproj(root, project_name="SignalAir"):
+    """Generate a matching project.pbxproj for the tree under root; return its path."""
+    from create_xcodeproj import XcodeprojGenerator
+    with _chdir(root), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        XcodeprojGenerator(project_name, "com.signalair.app").create_basic_project()
+    return os.path.join(root, f"{project_name}.xcodeproj", "project.pbxproj")
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+# -- cases ----------------------------------------------------------------
+# Each case takes the fixture directory and returns after doing its work once.
+
+def case_full_generation(root):
+    from create_xcodeproj import XcodeprojGenerator
+    with _chdir(root), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        XcodeprojGenerator("SignalAir", "com.signalair.app").create_basic_project()
+
+
+def case_incremental_addition(root):
+    from pbxproj import ProjectTransaction
+    project_file = os.path.join(root, "SignalAir.xcodeproj", "project.pbxproj")
+    with ProjectTransaction(project_file) as transaction:
+        for i in range(INCREMENTAL_FILES):
+            transaction.add_file(f"SignalAir/Core/Services/Added{i}.swift")
+
+
+def case_parse(root):
+    from pbxproj import PBXProj
+    PBXProj.load(os.path.join(root, "SignalAir.xcodeproj", "project.pbxproj"), use_cache=False)
+
+
+def case_cached_load(root):
+    from pbxproj import PBXProj
+    PBXProj.load(os.path.join(root, "SignalAir.xcodeproj", "project.pbxproj"))
+
+
+CASES = {
+    'full_generation': case_full_generation,
+    'incremental_addition': case_incremental_addition,
+    'parse': case_parse,
+    'cached_load': case_cached_load,
+}
+
+
+def _prepare(case_name, fixture, root):
+    # Every case starts from a pristine copy of the fixture tree and project
+    shutil.copytree(fixture, root)
+    if case_name == 'full_generation':
+        shutil.rmtree(os.path.join(root, "SignalAir.xcodeproj"), ignore_errors=True)
+    elif case_name == 'cached_load':
+        from pbxproj import PBXProj
+        PBXProj.load(os.path.join(root, "SignalAir.xcodeproj", "project.pbxproj"))
+
+
+def _run_case(case_name, fixture, trace_allocations, queue):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    work = tempfile.mkdtemp(prefix="bench-case-")
+    root = os.path.join(work, "tree")
+    try:
+        _prepare(case_name, fixture, root)
+        if trace_allocations:
+            tracemalloc.start()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        CASES[case_name](root)
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        result = {'wall_s': wall, 'cpu_s': cpu}
+        if trace_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            result['alloc_peak_bytes'] = peak
+            result['alloc_live_blocks'] = sum(stat.count for stat in snapshot.statistics('filename'))
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result['peak_rss_bytes'] = maxrss if sys.platform == 'darwin' else maxrss * 1024
+        queue.put(result)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def run_case(case_name, fixture, trace_allocations=False):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_case, args=(case_name, fixture, trace_allocations, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"benchmark case {case_name} failed with exit code {process.exitcode}")
+    return queue.get()
+
+
+def run_benchmarks(sizes, cases, repeat=1, trace_allocations=True):
+    results = {}
+    for size in sizes:
+        fixture_dir = tempfile.mkdtemp(prefix=f"bench-{size}-")
+        fixture = os.path.join(fixture_dir, "tree")
+        try:
+            os.makedirs(fixture)
+            start = time.perf_counter()
+            build_tree(fixture, size)
+            build_pbxproj(fixture)
+            print(f"🌲 Built {size} file fixture in {time.perf_counter() - start:.1f}s")
+            for case_name in cases:
+                # Best wall time of the timed runs; allocations from one traced run
+                runs = [run_case(case_name, fixture) for _ in range(repeat)]
+                result = min(runs, key=lambda r: r['wall_s'])
+                result['peak_rss_bytes'] = max(r['peak_rss_bytes'] for r in runs)
+                if trace_allocations:
+                    traced = run_case(case_name, fixture, trace_allocations=True)
+                    result['alloc_peak_bytes'] = traced['alloc_peak_bytes']
+                    result['alloc_live_blocks'] = traced['alloc_live_blocks']
+                key = f"{case_name}@{size}"
+                results[key] = result
+                print(f"  {key:32} {result['wall_s'] * 1000:9.1f} ms  "
+                      f"rss {result['peak_rss_bytes'] / 1e6:7.1f} MB"
+                      + (f"  alloc peak {result['alloc_peak_bytes'] / 1e6:7.1f} MB" if trace_allocations else ""))
+        finally:
+            shutil.rmtree(fixture_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the list of (key, current, baseline) cases slower than baseline * threshold."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get('results', {}).get(key)
+        if reference and result['wall_s'] > reference['wall_s'] * threshold:
+            regressions.append((key, result['wall_s'], reference['wall_s']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark project generation, incremental addition and parsing")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="comma separated file counts (e.g. 1k,10k,100k)")
+    parser.add_argument('--cases', default=','.join(CASES), help="comma separated cases to run")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument('--no-alloc', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--baseline', help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="fail when wall time exceeds baseline by this factor")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    cases = [case.strip() for case in args.cases.split(',')]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = run_benchmarks(sizes, cases, args.repeat, not args.no_alloc)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for key, current, reference in regressions:
+            print(f"❌ {key}: {current * 1000:.1f} ms vs baseline {reference * 1000:.1f} ms "
+                  f"(>{args.threshold:.2f}x)")
+        if regressions:
+            return 1
+        print(f"✅ No case slower than {args.threshold:.2f}x baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
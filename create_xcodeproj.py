@@ -1,31 +1,411 @@
 #!/usr/bin/env python3
 
+import contextlib
+import hashlib
+import io
+import json
 import os
-import uuid
+import time
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import app_icons
+import module_shards
+import profiling
+import swift_index
+import xcconfig
+from pbxproj import PBXProj, _quote, file_type_for, stable_uuid, write_if_changed
+from source_manifest import MANIFEST_NAME, SourceManifest, scan_sources
+
+# Buffer size for streaming project.pbxproj to disk
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Reachability root for prune_unreachable, relative to the source root
+ENTRY_POINT = "App/SignalAirApp.swift"
+
+# Bundles the app's Resources phase copies; .lproj contents would need variant groups, which are not written
+RESOURCE_BUNDLES = ('.xcassets', '.bundle', '.scnassets')
+
+# Kept inside the generated .xcodeproj so deleting the project drops the cache too
+XCODEGEN_CACHE_NAME = ".xcodegen-cache.json"
+XCODEGEN_MANIFEST_NAME = ".xcodegen-manifest.json"
+
+# Build settings, written to Configs/*.xcconfig rather than into project.pbxproj.
+# Base holds what Debug and Release share; TARGET_SETTINGS goes to <target>.xcconfig
+BASE_SETTINGS = {
+    "ALWAYS_SEARCH_USER_PATHS": "NO",
+    "ASSETCATALOG_COMPILER_GENERATE_SWIFT_ASSET_SYMBOL_EXTENSIONS": "YES",
+    "CLANG_ANALYZER_NONNULL": "YES",
+    "CLANG_ANALYZER_NUMBER_OBJECT_CONVERSION": "YES_AGGRESSIVE",
+    "CLANG_CXX_LANGUAGE_STANDARD": "gnu++20",
+    "CLANG_ENABLE_MODULES": "YES",
+    "CLANG_ENABLE_OBJC_ARC": "YES",
+    "CLANG_ENABLE_OBJC_WEAK": "YES",
+    "CLANG_WARN_BLOCK_CAPTURE_AUTORELEASING": "YES",
+    "CLANG_WARN_BOOL_CONVERSION": "YES",
+    "CLANG_WARN_COMMA": "YES",
+    "CLANG_WARN_CONSTANT_CONVERSION": "YES",
+    "CLANG_WARN_DEPRECATED_OBJC_IMPLEMENTATIONS": "YES",
+    "CLANG_WARN_DIRECT_OBJC_ISA_USAGE": "YES_ERROR",
+    "CLANG_WARN_DOCUMENTATION_COMMENTS": "YES",
+    "CLANG_WARN_EMPTY_BODY": "YES",
+    "CLANG_WARN_ENUM_CONVERSION": "YES",
+    "CLANG_WARN_INFINITE_RECURSION": "YES",
+    "CLANG_WARN_INT_CONVERSION": "YES",
+    "CLANG_WARN_NON_LITERAL_NULL_CONVERSION": "YES",
+    "CLANG_WARN_OBJC_IMPLICIT_RETAIN_SELF": "YES",
+    "CLANG_WARN_OBJC_LITERAL_CONVERSION": "YES",
+    "CLANG_WARN_OBJC_ROOT_CLASS": "YES_ERROR",
+    "CLANG_WARN_QUOTED_INCLUDE_IN_FRAMEWORK_HEADER": "YES",
+    "CLANG_WARN_RANGE_LOOP_ANALYSIS": "YES",
+    "CLANG_WARN_STRICT_PROTOTYPES": "YES",
+    "CLANG_WARN_SUSPICIOUS_MOVE": "YES",
+    "CLANG_WARN_UNGUARDED_AVAILABILITY": "YES_AGGRESSIVE",
+    "CLANG_WARN_UNREACHABLE_CODE": "YES",
+    "CLANG_WARN__DUPLICATE_METHOD_MATCH": "YES",
+    "COPY_PHASE_STRIP": "NO",
+    "ENABLE_STRICT_OBJC_MSGSEND": "YES",
+    "ENABLE_USER_SCRIPT_SANDBOXING": "YES",
+    "GCC_C_LANGUAGE_STANDARD": "gnu17",
+    "GCC_NO_COMMON_BLOCKS": "YES",
+    "GCC_WARN_64_TO_32_BIT_CONVERSION": "YES",
+    "GCC_WARN_ABOUT_RETURN_TYPE": "YES_ERROR",
+    "GCC_WARN_UNDECLARED_SELECTOR": "YES",
+    "GCC_WARN_UNINITIALIZED_AUTOS": "YES_AGGRESSIVE",
+    "GCC_WARN_UNUSED_FUNCTION": "YES",
+    "GCC_WARN_UNUSED_VARIABLE": "YES",
+    "IPHONEOS_DEPLOYMENT_TARGET": "15.0",
+    "LOCALIZATION_PREFERS_STRING_CATALOGS": "YES",
+    "MTL_FAST_MATH": "YES",
+    "SDKROOT": "iphoneos",
+}
+DEBUG_SETTINGS = {
+    "DEBUG_INFORMATION_FORMAT": "dwarf",
+    "ENABLE_TESTABILITY": "YES",
+    "GCC_DYNAMIC_NO_PIC": "NO",
+    "GCC_OPTIMIZATION_LEVEL": "0",
+    "GCC_PREPROCESSOR_DEFINITIONS": ["DEBUG=1", "$(inherited)"],
+    "MTL_ENABLE_DEBUG_INFO": "INCLUDE_SOURCE",
+    "ONLY_ACTIVE_ARCH": "YES",
+    "SWIFT_ACTIVE_COMPILATION_CONDITIONS": "DEBUG $(inherited)",
+    "SWIFT_OPTIMIZATION_LEVEL": "-Onone",
+}
+RELEASE_SETTINGS = {
+    "DEBUG_INFORMATION_FORMAT": "dwarf-with-dsym",
+    "ENABLE_NS_ASSERTIONS": "NO",
+    "MTL_ENABLE_DEBUG_INFO": "NO",
+    "SWIFT_COMPILATION_MODE": "wholemodule",
+    "VALIDATE_PRODUCT": "YES",
+}
+TARGET_SETTINGS = {
+    "ASSETCATALOG_COMPILER_APPICON_NAME": "AppIcon",
+    "ASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME": "AccentColor",
+    "CODE_SIGN_STYLE": "Automatic",
+    "CURRENT_PROJECT_VERSION": "1",
+    "DEVELOPMENT_ASSET_PATHS": "",
+    "ENABLE_PREVIEWS": "YES",
+    "GENERATE_INFOPLIST_FILE": "NO",
+    "INFOPLIST_KEY_UIApplicationSceneManifest_Generation": "YES",
+    "INFOPLIST_KEY_UIApplicationSupportsIndirectInputEvents": "YES",
+    "INFOPLIST_KEY_UILaunchScreen_Generation": "YES",
+    "INFOPLIST_KEY_UISupportedInterfaceOrientations_iPad": "UIInterfaceOrientationPortrait UIInterfaceOrientationPortraitUpsideDown UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight",
+    "INFOPLIST_KEY_UISupportedInterfaceOrientations_iPhone": "UIInterfaceOrientationPortrait UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight",
+    "LD_RUNPATH_SEARCH_PATHS": ["$(inherited)", "@executable_path/Frameworks"],
+    "MARKETING_VERSION": "1.0",
+    "PRODUCT_NAME": "$(TARGET_NAME)",
+    "SWIFT_EMIT_LOC_STRINGS": "YES",
+    "SWIFT_VERSION": "5.0",
+    "TARGETED_DEVICE_FAMILY": "1,2",
+}
+CONFIGURATIONS = {'Debug': DEBUG_SETTINGS, 'Release': RELEASE_SETTINGS}
+# <Framework>.xcconfig for each target module_shards.SHARDS produces
+FRAMEWORK_SETTINGS = {
+    "CODE_SIGN_STYLE": "Automatic",
+    "CURRENT_PROJECT_VERSION": "1",
+    "DEFINES_MODULE": "YES",
+    "DYLIB_COMPATIBILITY_VERSION": "1",
+    "DYLIB_CURRENT_VERSION": "1",
+    "DYLIB_INSTALL_NAME_BASE": "@rpath",
+    "GENERATE_INFOPLIST_FILE": "YES",
+    "INSTALL_PATH": "$(LOCAL_LIBRARY_DIR)/Frameworks",
+    "LD_RUNPATH_SEARCH_PATHS": ["$(inherited)", "@executable_path/Frameworks", "@loader_path/Frameworks"],
+    "MARKETING_VERSION": "1.0",
+    "PRODUCT_NAME": "$(TARGET_NAME:c99extidentifier)",
+    "SKIP_INSTALL": "YES",
+    "SWIFT_EMIT_LOC_STRINGS": "YES",
+    "SWIFT_VERSION": "5.0",
+    "TARGETED_DEVICE_FAMILY": "1,2",
+}
+# Test bundles hosted by the app: (target name suffix, directories holding their Swift files)
+TEST_TARGETS = (
+    ('Tests', ('Tests',)),
+    ('PerformanceTests', ('SignalAirTests/StressTests',)),
+)
+# The scheme named after the suffix runs that bundle; the main scheme runs the first one
+PERFORMANCE_SUFFIX = 'PerformanceTests'
+TESTS_STATE_NAME = ".test-targets.json"
+# <Target>.xcconfig for each test bundle
+TEST_SETTINGS = {
+    "BUNDLE_LOADER": "$(TEST_HOST)",
+    "CODE_SIGN_STYLE": "Automatic",
+    "CURRENT_PROJECT_VERSION": "1",
+    "GENERATE_INFOPLIST_FILE": "YES",
+    "MARKETING_VERSION": "1.0",
+    "PRODUCT_NAME": "$(TARGET_NAME)",
+    "SWIFT_EMIT_LOC_STRINGS": "NO",
+    "SWIFT_VERSION": "5.0",
+    "TARGETED_DEVICE_FAMILY": "1,2",
+}
+# Optimized like Release, but testable so the performance tests can @testable import the app
+BENCHMARK_SETTINGS = {
+    "ENABLE_TESTABILITY": "YES",
+    "GCC_OPTIMIZATION_LEVEL": "s",
+    "ONLY_ACTIVE_ARCH": "YES",
+    "SWIFT_ACTIVE_COMPILATION_CONDITIONS": "BENCHMARK $(inherited)",
+    "SWIFT_OPTIMIZATION_LEVEL": "-O",
+}
+# Single-configuration projects for generate_variants: name -> (configuration it starts from, settings over it)
+VARIANTS = {
+    'Debug': ('Debug', {}),
+    'Release': ('Release', {}),
+    'Benchmark': ('Release', BENCHMARK_SETTINGS),
+}
+
+class XcodegenError(RuntimeError):
+    pass
 
 class XcodeprojGenerator:
-    def __init__(self, project_name, bundle_id):
+    def __init__(self, project_name, bundle_id, prune_unreachable=False, shard_modules=False, profiler=None,
+                 variant=None):
         self.project_name = project_name
         self.bundle_id = bundle_id
+        self.prune_unreachable = prune_unreachable
+        self.shard_modules = shard_modules
+        # A VARIANTS name writes <project>-<variant>.xcodeproj with just that configuration
+        if variant is not None and variant not in VARIANTS:
+            raise ValueError(f"unknown variant {variant!r}; expected one of {', '.join(VARIANTS)}")
+        self.variant = variant
+        suffix = f"-{variant}" if variant else ""
+        self.xcodeproj_dir = f"{project_name}{suffix}.xcodeproj"
+        self.configs_dir = f"{xcconfig.CONFIGS_DIR}{suffix}"
+        # profiling.Profiler to break a run down into phases; records nothing by default
+        self.profiler = profiler or profiling.NULL_PROFILER
         self.file_refs = {}
         self.group_refs = {}
         self.build_file_refs = {}
+        self.assets_built = False
+        # Swift files kept in their groups but left out of the Sources phase
+        self.excluded = set()
+        # module_shards.ShardPlan when shard_modules found frameworks to split out
+        self.shard_plan = None
+        # {test target: sorted Swift paths}, from scan_tests
+        self.tests = {}
         
-    def generate_uuid(self):
-        return str(uuid.uuid4()).replace('-', '').upper()[:24]
+    def generate_uuid(self, role, *path):
+        # Derived from the object's role and path so regeneration keeps every ID stable
+        return stable_uuid(role, *path)
+    
+    def project_path(self, path):
+        # Scanned paths are relative to the source root; project paths include it
+        return f"{self.project_name}/{path}" if path else self.project_name
+    
+    def group_uuid(self, directory):
+        # Same key PBXProj.ensure_group uses, so later edits land in these groups
+        return self.generate_uuid('group', self.project_path(directory))
+    
+    def group_children(self, manifest, directory):
+        """(uuid, name) of a directory's subgroups, Swift files and resource bundles, in project order."""
+        entry = manifest.dirs[directory]
+        children = []
+        for name in entry['subdirs']:
+            child = f"{directory}/{name}" if directory else name
+            if child in manifest.dirs:
+                children.append((self.group_uuid(child), name))
+        for name in sorted([*entry['files'], *self.resource_bundles(entry)]):
+            swift_file = f"{directory}/{name}" if directory else name
+            children.append((self.generate_uuid('file_ref', self.project_path(swift_file)), name))
+        if not directory:
+            children.append((self.generate_uuid('file_ref', 'Info.plist'), 'Info.plist'))
+        return children
+    
+    def resource_bundles(self, entry):
+        # Names of a manifest entry's bundles that go in the Resources phase
+        return [name for name in entry['bundles'] if name.endswith(RESOURCE_BUNDLES)]
+    
+    def configurations(self):
+        """{configuration: project-level settings} of this project, or of its variant."""
+        if self.variant is None:
+            return CONFIGURATIONS
+        base, overrides = VARIANTS[self.variant]
+        return {self.variant: {**CONFIGURATIONS[base], **overrides}}
+    
+    def default_configuration(self):
+        return 'Release' if 'Release' in self.configurations() else self.variant
+    
+    def testable(self, configuration):
+        # Hosted tests need @testable import, which ENABLE_TESTABILITY provides
+        settings = {**BASE_SETTINGS, **self.configurations()[configuration]}
+        return settings.get('ENABLE_TESTABILITY') == 'YES'
+    
+    def target_settings(self):
+        return {**TARGET_SETTINGS,
+                'INFOPLIST_FILE': f"{self.project_name}/Info.plist",
+                'PRODUCT_BUNDLE_IDENTIFIER': self.bundle_id}
+    
+    def xcconfig_layers(self):
+        """(files, assignments) as planned by xcconfig.plan_layers for the project and app target."""
+        target_settings = self.target_settings()
+        configurations = self.configurations()
+        return xcconfig.plan_layers(
+            {name: {**BASE_SETTINGS, **settings} for name, settings in configurations.items()},
+            {self.project_name: {name: target_settings for name in configurations}})
+    
+    def write_xcconfigs(self):
+        files, _ = self.xcconfig_layers()
+        changed = xcconfig.write_layers(self.configs_dir, files, source="create_xcodeproj.py")
+        print(f"⚙️ {changed} of {len(files)} xcconfig files updated in {self.configs_dir}/")
+    
+    def build_app_icons(self):
+        """Render the icon sets of the app's asset catalog and check them against the target settings."""
+        if self.assets_built:
+            return
+        self.assets_built = True
+        catalog = f"{self.project_name}/Assets.xcassets"
+        if not os.path.isdir(catalog):
+            return
+        start = time.perf_counter()
+        try:
+            with self.profiler.phase('icons'):
+                results = app_icons.build_catalog(catalog)
+        except (OSError, app_icons.AssetError, subprocess.SubprocessError) as e:
+            print(f"⚠️ App icons not rendered: {e}")
+            return
+        rendered = sum(len(result.rendered) for result in results)
+        print(f"🎨 {rendered} app icon sizes rendered in {time.perf_counter() - start:.3f}s")
+        icon_name = TARGET_SETTINGS[app_icons.APPICON_SETTING]
+        iconset = f"{catalog}/{icon_name}.appiconset"
+        if not os.path.isdir(iconset):
+            print(f"⚠️ {app_icons.APPICON_SETTING} is {icon_name}, but {iconset} does not exist")
+        for problem in app_icons.verify_iconset(iconset) if os.path.isdir(iconset) else ():
+            print(f"⚠️ {problem}")
+    
+    def index_sources(self, manifest, xcodeproj_dir):
+        return swift_index.index_sources(self.project_name, manifest.paths(),
+                                         cache_file=f"{xcodeproj_dir}/{swift_index.CACHE_NAME}")
+
+    def find_unreachable(self, manifest, xcodeproj_dir):
+        """Exclude the Swift files nothing reachable from ENTRY_POINT refers to."""
+        start = time.perf_counter()
+        index = self.index_sources(manifest, xcodeproj_dir)
+        if ENTRY_POINT not in index.files:
+            print(f"⚠️ {self.project_name}/{ENTRY_POINT} not found; compiling every Swift file")
+            self.excluded = set()
+            return
+        self.excluded = set(index.unreachable([ENTRY_POINT]))
+        print(f"🔎 {len(self.excluded)} of {len(index.files)} Swift files unreachable from {ENTRY_POINT}, "
+              f"left out of Sources ({len(index.indexed)} re-indexed in {time.perf_counter() - start:.3f}s)")
+
+    def plan_module_shards(self, manifest, xcodeproj_dir):
+        """Split the compiled Swift files into the framework targets of module_shards.SHARDS."""
+        start = time.perf_counter()
+        index = self.index_sources(manifest, xcodeproj_dir)
+        try:
+            plan = module_shards.plan_shards(index, paths=[path for path in index.files if path not in self.excluded])
+        except module_shards.ShardError as e:
+            print(f"⚠️ Not sharding into frameworks: {e}")
+            self.shard_plan = None
+            return
+        self.shard_plan = plan if plan.modules else None
+        sharded = sum(len(paths) for paths in plan.modules.values())
+        print(f"🧩 {sharded} Swift files in {len(plan.modules)} frameworks, {len(plan.app)} left in the app, "
+              f"{len(plan.moved)} moved up a layer, {len(plan.internal)} of them for internal declarations "
+              f"and {len(plan.unimported)} for missing imports ({time.perf_counter() - start:.3f}s)")
+
+    def shard_state(self):
+        """{framework: sorted project paths}, as saved in module_shards.STATE_NAME."""
+        if self.shard_plan is None:
+            return {}
+        return {module: [self.project_path(path) for path in paths]
+                for module, paths in self.shard_plan.modules.items()}
+
+    def scan_tests(self):
+        """Collect the Swift files of each TEST_TARGETS bundle; bundles without any are left out."""
+        self.tests = {}
+        for suffix, directories in TEST_TARGETS:
+            paths = []
+            for directory in directories:
+                for parent, _, names in os.walk(directory):
+                    paths += [f"{parent}/{name}".replace(os.sep, '/') for name in names if name.endswith('.swift')]
+            if paths:
+                self.tests[f"{self.project_name}{suffix}"] = sorted(paths)
+        if self.tests:
+            print(f"🧪 {sum(map(len, self.tests.values()))} Swift files in {len(self.tests)} test targets")
+
+    def run_timed(self, label, args, **kwargs):
+        """Run a subprocess and report how long it took; OSError means the tool is missing."""
+        start = time.perf_counter()
+        with self.profiler.phase(f"subprocess:{label}"):
+            result = subprocess.run(args, capture_output=True, text=True, **kwargs)
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ {label}: exit {result.returncode} in {elapsed:.2f}s")
+        return result
     
     def create_project(self):
         # Create Xcode project using command line tools
-        try:
-            # Try to use xcodegen if available
-            self.create_with_xcodegen()
-        except:
-            # Fallback to manual creation
-            self.create_manual_project()
+        start = time.perf_counter()
+        with self.profiler.phase('create_project'):
+            try:
+                # Try to use xcodegen if available
+                self.create_with_xcodegen()
+            except (OSError, subprocess.SubprocessError, XcodegenError) as e:
+                # Fallback to manual creation
+                print(f"⚠️ xcodegen unavailable after {time.perf_counter() - start:.2f}s ({e}); "
+                      f"falling back to manual creation")
+                self.create_manual_project()
+    
+    def xcodegen_cache_key(self, spec, manifest):
+        # xcodegen only looks at which files exist, which the root subtree hash covers
+        digest = hashlib.sha256(spec.encode())
+        digest.update(b'\0' + (manifest.subtree_hash() or '').encode())
+        return digest.hexdigest()
     
     def create_with_xcodegen(self):
-        project_spec = f"""
+        xcodeproj_dir = f"{self.project_name}.xcodeproj"
+        cache_file = f"{xcodeproj_dir}/{XCODEGEN_CACHE_NAME}"
+        manifest_file = f"{xcodeproj_dir}/{XCODEGEN_MANIFEST_NAME}"
+        
+        self.build_app_icons()
+        project_spec = self.render_xcodegen_spec()
+        with self.profiler.phase('scan'):
+            scan = scan_sources(self.project_name, SourceManifest.load(manifest_file))
+        key = self.xcodegen_cache_key(project_spec, scan.manifest)
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached_key = json.load(f).get('key')
+        except (OSError, ValueError):
+            cached_key = None
+        if cached_key == key and os.path.exists(f"{xcodeproj_dir}/project.pbxproj"):
+            print("✅ Xcode project is up to date (spec and sources unchanged), skipped xcodegen")
+            return
+        
+        # The spec's paths are relative to it, so it stays here and goes however xcodegen ends
+        with open('project.yml', 'w') as f:
+            f.write(project_spec)
+        try:
+            result = self.run_timed("xcodegen generate", ['xcodegen', 'generate'])
+        finally:
+            os.remove('project.yml')
+
+        if result.returncode == 0:
+            print("✅ Xcode project generated with xcodegen")
+            scan.manifest.save(manifest_file)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'key': key}, f)
+        else:
+            raise XcodegenError(f"xcodegen failed: {result.stderr.strip()[-500:]}")
+    
+    def render_xcodegen_spec(self):
+        return f"""
 name: {self.project_name}
 options:
   bundleIdPrefix: com.signalair
@@ -56,19 +436,6 @@ targets:
       release:
         SWIFT_COMPILATION_MODE: wholemodule
 """
-        
-        with open('project.yml', 'w') as f:
-            f.write(project_spec)
-        
-        # Run xcodegen
-        result = subprocess.run(['xcodegen', 'generate'], 
-                              capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ Xcode project generated with xcodegen")
-            os.remove('project.yml')
-        else:
-            raise Exception("xcodegen failed")
     
     def create_manual_project(self):
         print("📱 Creating Xcode project manually...")
@@ -76,57 +443,507 @@ targets:
         # Use Xcode command line tools
         try:
             # Create a temporary Swift Package Manager project and convert it
-            result = subprocess.run([
+            result = self.run_timed("swift package init", [
                 'xcrun', 'swift', 'package', 'init', 
                 '--type', 'executable', '--name', self.project_name
-            ], capture_output=True, text=True, cwd='.')
+            ], cwd='.')
             
             if result.returncode != 0:
                 # Create basic project structure manually
+                print("⚠️ swift package init failed; falling back to the basic project structure")
                 self.create_basic_project()
-        except:
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ xcrun unavailable ({e}); falling back to the basic project structure")
             self.create_basic_project()
     
-    def create_basic_project(self):
-        print("📱 Creating basic Xcode project structure...")
-        
-        # Generate Xcode project file content
-        project_content = self.generate_project_pbxproj()
+    def create_basic_project(self, shared=None):
+        with self.profiler.phase('create_basic_project'):
+            self._create_basic_project(shared)
+    
+    def _create_basic_project(self, shared=None):
+        """Write (or patch) the project; shared is a SharedScan when generate_variants already scanned."""
+        print(f"📱 Creating basic Xcode project structure in {self.xcodeproj_dir}...")
         
         # Create .xcodeproj directory
-        xcodeproj_dir = f"{self.project_name}.xcodeproj"
+        xcodeproj_dir = self.xcodeproj_dir
         os.makedirs(xcodeproj_dir, exist_ok=True)
         
-        # Write project.pbxproj
-        with open(f"{xcodeproj_dir}/project.pbxproj", 'w') as f:
-            f.write(project_content)
+        project_file = f"{xcodeproj_dir}/project.pbxproj"
+        manifest_file = f"{xcodeproj_dir}/{MANIFEST_NAME}"
+        
+        # Settings live in the xcconfig files, so changing them leaves project.pbxproj alone
+        with self.profiler.phase('xcconfig'):
+            self.write_xcconfigs()
+        self.build_app_icons()
+        
+        # Only directories whose mtime moved since the last run are re-listed
+        start = time.perf_counter()
+        previous = None
+        if os.path.exists(project_file) and self.references_xcconfigs(project_file):
+            previous = SourceManifest.load(manifest_file)
+        if shared is not None:
+            manifest = shared.manifest
+            self.excluded, self.shard_plan, self.tests = shared.excluded, shared.shard_plan, shared.tests
+            # The scan was diffed against another variant's manifest; the root hash tells whether ours is current
+            changed = previous is None or previous.subtree_hash() != manifest.subtree_hash()
+            summary = "sources changed" if changed else "no source changes"
+        else:
+            with self.profiler.phase('scan') as phase:
+                scan = scan_sources(self.project_name, previous)
+                phase['files'] = len(scan.manifest.paths())
+            manifest, changed = scan.manifest, scan.changed
+            summary = scan.summary()
+            if self.prune_unreachable:
+                with self.profiler.phase('index'):
+                    self.find_unreachable(manifest, xcodeproj_dir)
+            if self.shard_modules:
+                with self.profiler.phase('shards'):
+                    self.plan_module_shards(manifest, xcodeproj_dir)
+            self.scan_tests()
+        # Stored as project paths, the form pbxproj_verify.py reports
+        excluded = {self.project_path(swift_file) for swift_file in self.excluded}
+        shards = self.shard_state()
+        previous_shards = module_shards.load_state(xcodeproj_dir)
+        previous_tests = module_shards.load_state(xcodeproj_dir, TESTS_STATE_NAME)
+        
+        if previous is not None:
+            # Patch just the added, removed and renamed files into the existing project;
+            # an edit anywhere can change which files are reachable
+            rewritten = 0
+            if (changed or excluded != swift_index.load_excluded(xcodeproj_dir) or shards != previous_shards
+                    or self.tests != previous_tests):
+                with self.profiler.phase('patch'):
+                    rewritten = self.patch_project_pbxproj(project_file, previous, manifest,
+                                                           previous_shards, previous_tests)
+            elapsed = time.perf_counter() - start
+            print(f"📝 Updated project.pbxproj incrementally: {summary}, "
+                  f"{rewritten} groups rewritten in {elapsed:.3f}s")
+        else:
+            # Stream project.pbxproj section by section into a buffered file;
+            # the existing file is only replaced when the content differs
+            count = len(manifest.paths())
+            with self.profiler.phase('write'):
+                written = write_if_changed(project_file, self._render_project_pbxproj(manifest),
+                                           buffering=WRITE_BUFFER_SIZE)
+            if shards or previous_shards or self.tests or previous_tests:
+                # Framework and test targets are added through PBXProj, like an incremental update
+                with self.profiler.phase('patch'):
+                    written = self.add_targets(project_file, manifest, previous_shards, previous_tests) or written
+            elapsed = time.perf_counter() - start
+            status = "Wrote" if written else "Unchanged"
+            print(f"📝 {status} project.pbxproj: {count} Swift files in {elapsed:.3f}s "
+                  f"({count / elapsed if elapsed else float('inf'):.0f} files/sec)")
+        manifest.save(manifest_file)
+        swift_index.save_excluded(xcodeproj_dir, excluded)
+        module_shards.save_state(xcodeproj_dir, shards)
+        module_shards.save_state(xcodeproj_dir, self.tests, TESTS_STATE_NAME)
+        # The project no longer matches what xcodegen last produced
+        if os.path.exists(f"{xcodeproj_dir}/{XCODEGEN_CACHE_NAME}"):
+            os.remove(f"{xcodeproj_dir}/{XCODEGEN_CACHE_NAME}")
         
         # Create xcshareddata and xcuserdata directories
         os.makedirs(f"{xcodeproj_dir}/xcshareddata/xcschemes", exist_ok=True)
         os.makedirs(f"{xcodeproj_dir}/xcuserdata", exist_ok=True)
         
-        # Create scheme file
-        scheme_content = self.generate_scheme()
-        with open(f"{xcodeproj_dir}/xcshareddata/xcschemes/{self.project_name}.xcscheme", 'w') as f:
-            f.write(scheme_content)
+        # Create scheme files
+        for scheme_name, scheme_content in self.generate_schemes().items():
+            write_if_changed(f"{xcodeproj_dir}/xcshareddata/xcschemes/{scheme_name}.xcscheme",
+                             lambda f, content=scheme_content: f.write(content))
+        stale_scheme = f"{xcodeproj_dir}/xcshareddata/xcschemes/{self.project_name}{PERFORMANCE_SUFFIX}.xcscheme"
+        if f"{self.project_name}{PERFORMANCE_SUFFIX}" not in self.tests and os.path.exists(stale_scheme):
+            os.remove(stale_scheme)
+    
+    def references_xcconfigs(self, project_file):
+        # Projects written before the settings moved out need one full rewrite
+        base_uuid = self.generate_uuid('file_ref', f"{self.configs_dir}/{xcconfig.BASE_NAME}.xcconfig")
+        with open(project_file, 'rb') as f:
+            return base_uuid.encode() in f.read()
+    
+    def _render_project_pbxproj(self, manifest):
+        # The writer streams into the file, so 'render' nests inside the disk write
+        def writer(f):
+            with self.profiler.phase('render'):
+                self.write_project_pbxproj(f, manifest)
+        return writer
     
     def generate_project_pbxproj(self):
+        buffer = io.StringIO()
+        self.write_project_pbxproj(buffer)
+        return buffer.getvalue()
+    
+    def collect_swift_files(self):
+        return scan_sources(self.project_name).manifest.paths()
+    
+    def patch_project_pbxproj(self, project_file, previous, manifest, previous_shards=(), previous_tests=()):
+        """Rewrite only the groups whose subtree hash changed since previous; return how many."""
+        with self.profiler.phase('parse'):
+            project = PBXProj.load(project_file)
+        sources = project.get(self.generate_uuid('sources_phase', self.project_name))['files']
+        resources = project.get(self.generate_uuid('resources_phase', self.project_name))['files']
+        
+        gone = set()
+        rewritten = 0
+        stack = ['']
+        while stack:
+            directory = stack.pop()
+            entry = manifest.dirs[directory]
+            old = previous.dirs.get(directory)
+            if old is not None and old.get('hash') == entry['hash']:
+                # Nothing below this directory changed; skip the whole subtree
+                continue
+            rewritten += 1
+            old_files = old['files'] if old is not None else {}
+            for name in old_files:
+                if name not in entry['files']:
+                    self._remove_file(project, f"{directory}/{name}" if directory else name, gone)
+            old_bundles = self.resource_bundles(old) if old is not None else ()
+            for name in old_bundles:
+                if name not in entry['bundles']:
+                    self._remove_file(project, f"{directory}/{name}" if directory else name, gone)
+            for name in (old['subdirs'] if old is not None else ()):
+                if name not in entry['subdirs']:
+                    self._remove_group(project, previous, f"{directory}/{name}" if directory else name, gone)
+            
+            group_uuid = self.group_uuid(directory)
+            if project.get(group_uuid) is None:
+                name = directory.rsplit('/', 1)[-1] or self.project_name
+                project.add_object(group_uuid, {
+                    'isa': 'PBXGroup',
+                    'children': [],
+                    'path': name,
+                    'sourceTree': '<group>',
+                }, comment=name)
+            for name in sorted(entry['files']):
+                if name not in old_files:
+                    swift_file = f"{directory}/{name}" if directory else name
+                    build_file_uuid = self._add_swift_file(project, swift_file)
+                    if build_file_uuid is not None:
+                        sources.append(build_file_uuid)
+            for name in self.resource_bundles(entry):
+                if name not in old_bundles:
+                    build_file_uuid = self._add_resource(project, f"{directory}/{name}" if directory else name)
+                    if build_file_uuid is not None:
+                        resources.append(build_file_uuid)
+            project.set_children(group_uuid, [child_id for child_id, _ in self.group_children(manifest, directory)])
+            stack.extend(f"{directory}/{name}" if directory else name
+                         for name in entry['subdirs'] if (f"{directory}/{name}" if directory else name) in manifest.dirs)
+        
+        if gone:
+            sources[:] = [build_file for build_file in sources if build_file not in gone]
+            resources[:] = [build_file for build_file in resources if build_file not in gone]
+        self._sync_sources(project, manifest, sources)
+        self.apply_module_shards(project, previous_shards)
+        self.apply_test_targets(project, previous_tests)
+        with self.profiler.phase('write'):
+            project.save(project_file)
+        return rewritten
+    
+    def sharded_files(self):
+        if self.shard_plan is None:
+            return set()
+        return {swift_file for paths in self.shard_plan.modules.values() for swift_file in paths}
+    
+    def _sync_sources(self, project, manifest, sources):
+        # Build files follow reachability and sharding; file references stay in their groups
+        compiled = set(sources)
+        sharded = self.sharded_files()
+        for swift_file in manifest.paths():
+            path = self.project_path(swift_file)
+            build_file_uuid = self.generate_uuid('build_file', path)
+            if swift_file in self.excluded or swift_file in sharded:
+                if project.get(build_file_uuid) is not None:
+                    project.remove_object(build_file_uuid)
+                compiled.discard(build_file_uuid)
+            elif build_file_uuid not in compiled:
+                name = os.path.basename(swift_file)
+                project.add_object(build_file_uuid, {
+                    'isa': 'PBXBuildFile',
+                    'fileRef': self.generate_uuid('file_ref', path),
+                }, comment=f"{name} in Sources")
+                sources.append(build_file_uuid)
+                compiled.add(build_file_uuid)
+        sources[:] = [build_file for build_file in sources if build_file in compiled]
+    
+    def add_targets(self, project_file, manifest, previous_shards, previous_tests):
+        """Apply shard_plan and the test targets to a freshly written project_file."""
+        with self.profiler.phase('parse'):
+            project = PBXProj.load(project_file)
+        sources = project.get(self.generate_uuid('sources_phase', self.project_name))['files']
+        self._sync_sources(project, manifest, sources)
+        self.apply_module_shards(project, previous_shards)
+        self.apply_test_targets(project, previous_tests)
+        with self.profiler.phase('write'):
+            return project.save(project_file)
+    
+    def apply_module_shards(self, project, previous_shards):
+        """Rebuild the framework targets of shard_plan, first dropping those previous_shards names.
+        
+        Each framework gets its Sources and Frameworks phases, <Framework>.xcconfig
+        and a dependency on the frameworks below it; the app links, embeds and
+        depends on all of them.
+        """
+        app_uuid = self.generate_uuid('target', self.project_name)
+        modules = self.shard_plan.modules if self.shard_plan is not None else {}
+        stale = set(previous_shards) | set(modules)
+        targets = {self.generate_uuid('target', module) for module in stale}
+        doomed = list(targets)
+        doomed += [self.generate_uuid('product', module) for module in stale]
+        doomed += [self.generate_uuid('file_ref', f"{self.configs_dir}/{module}.xcconfig") for module in stale]
+        doomed.append(self.generate_uuid('embed_phase', self.project_name))
+        doomed += [dependency_id for dependency_id, dependency in project.objects_of('PBXTargetDependency')
+                   if dependency.get('target') in targets]
+        project.remove_objects([object_id for object_id in doomed if project.get(object_id) is not None])
+        target_attributes = project.project.get('attributes', {}).get('TargetAttributes', {})
+        for target_uuid in targets:
+            target_attributes.pop(target_uuid, None)
+        for module in set(previous_shards) - set(modules):
+            if os.path.exists(f"{self.configs_dir}/{module}.xcconfig"):
+                os.remove(f"{self.configs_dir}/{module}.xcconfig")
+        if not modules:
+            return
+        
+        files, assignments = xcconfig.plan_layers({}, {
+            module: {name: {**FRAMEWORK_SETTINGS, 'PRODUCT_BUNDLE_IDENTIFIER': f"{self.bundle_id}.{module}"}
+                     for name in self.configurations()}
+            for module in modules})
+        xcconfig.write_layers(self.configs_dir, files, source="create_xcodeproj.py")
+        module_deps = self.shard_plan.module_deps
+        for module, paths in modules.items():
+            product_uuid = project.add_object(self.generate_uuid('product', module), {
+                'isa': 'PBXFileReference',
+                'explicitFileType': 'wrapper.framework',
+                'includeInIndex': '0',
+                'path': f"{module}.framework",
+                'sourceTree': 'BUILT_PRODUCTS_DIR',
+            }, comment=f"{module}.framework")
+            project.add_child(project.project['productRefGroup'], product_uuid)
+            sources_uuid = self._add_phase(project, 'PBXSourcesBuildPhase', self.generate_uuid('sources_phase', module))
+            for swift_file in paths:
+                path = self.project_path(swift_file)
+                project.add_build_file(self.generate_uuid('file_ref', path), sources_uuid,
+                                       self.generate_uuid('build_file', module, path))
+            frameworks_uuid = self._add_phase(project, 'PBXFrameworksBuildPhase',
+                                              self.generate_uuid('frameworks_phase', module))
+            for dependency in module_deps[module]:
+                project.add_build_file(self.generate_uuid('product', dependency), frameworks_uuid,
+                                       self.generate_uuid('build_file', module, f"{dependency}.framework"))
+            config_list_uuid = self._add_config_list(project, module)
+            target_uuid = project.add_object(self.generate_uuid('target', module), {
+                'isa': 'PBXNativeTarget',
+                'buildConfigurationList': config_list_uuid,
+                'buildPhases': [sources_uuid, frameworks_uuid],
+                'buildRules': [],
+                'dependencies': [self._add_target_dependency(project, module, dependency)
+                                 for dependency in module_deps[module]],
+                'name': module,
+                'productName': module,
+                'productReference': product_uuid,
+                'productType': 'com.apple.product-type.framework',
+            }, comment=module)
+            project.project['targets'].append(target_uuid)
+            target_attributes[target_uuid] = {'CreatedOnToolsVersion': '15.0'}
+        xcconfig.apply_layers(project, files, assignments, self.configs_dir)
+        
+        app = project.get(app_uuid)
+        app_frameworks = project.build_phase(app_uuid, 'PBXFrameworksBuildPhase')
+        embed_uuid = project.add_object(self.generate_uuid('embed_phase', self.project_name), {
+            'isa': 'PBXCopyFilesBuildPhase',
+            'buildActionMask': '2147483647',
+            'dstPath': '',
+            'dstSubfolderSpec': '10',
+            'files': [],
+            'name': 'Embed Frameworks',
+            'runOnlyForDeploymentPostprocessing': '0',
+        })
+        app['buildPhases'].append(embed_uuid)
+        for module in module_deps[module_shards.APP]:
+            product_uuid = self.generate_uuid('product', module)
+            project.add_build_file(product_uuid, app_frameworks,
+                                   self.generate_uuid('build_file', self.project_name, f"{module}.framework"))
+            embed = project.add_build_file(product_uuid, embed_uuid,
+                                           self.generate_uuid('embed_file', self.project_name, f"{module}.framework"))
+            project.get(embed)['settings'] = {'ATTRIBUTES': ['CodeSignOnCopy', 'RemoveHeadersOnCopy']}
+            app['dependencies'].append(self._add_target_dependency(project, self.project_name, module))
+    
+    def test_target_settings(self, target):
+        host = f"$(BUILT_PRODUCTS_DIR)/{self.project_name}.app/$(BUNDLE_EXECUTABLE_FOLDER_PATH)/{self.project_name}"
+        return {**TEST_SETTINGS,
+                'PRODUCT_BUNDLE_IDENTIFIER': f"{self.bundle_id}.{target[len(self.project_name):]}",
+                'TEST_HOST': host}
+    
+    def apply_test_targets(self, project, previous_tests):
+        """Rebuild the test bundles of self.tests, first dropping those previous_tests names.
+        
+        Each bundle is hosted by the app and depends on it; its files live in
+        groups mirroring the TEST_TARGETS directories, which the generator owns.
+        """
+        app_uuid = self.generate_uuid('target', self.project_name)
+        stale = set(previous_tests) | set(self.tests)
+        targets = {self.generate_uuid('target', target) for target in stale}
+        doomed = list(targets)
+        doomed += [self.generate_uuid('product', target) for target in stale]
+        doomed += [self.generate_uuid('file_ref', f"{self.configs_dir}/{target}.xcconfig") for target in stale]
+        for top in {directory.split('/')[0] for _, directories in TEST_TARGETS for directory in directories}:
+            doomed += [group_id for group_id in project.at_path(top, 'PBXGroup')
+                       if project.parent_of(group_id) == project.main_group]
+        project.remove_objects([object_id for object_id in doomed if project.get(object_id) is not None])
+        target_attributes = project.project.get('attributes', {}).get('TargetAttributes', {})
+        for target_uuid in targets:
+            target_attributes.pop(target_uuid, None)
+        for target in set(previous_tests) - set(self.tests):
+            if os.path.exists(f"{self.configs_dir}/{target}.xcconfig"):
+                os.remove(f"{self.configs_dir}/{target}.xcconfig")
+        if not self.tests:
+            return
+        
+        files, assignments = xcconfig.plan_layers({}, {
+            target: {name: self.test_target_settings(target) for name in self.configurations()}
+            for target in self.tests})
+        xcconfig.write_layers(self.configs_dir, files, source="create_xcodeproj.py")
+        for target, paths in self.tests.items():
+            product_uuid = project.add_object(self.generate_uuid('product', target), {
+                'isa': 'PBXFileReference',
+                'explicitFileType': 'wrapper.cfbundle',
+                'includeInIndex': '0',
+                'path': f"{target}.xctest",
+                'sourceTree': 'BUILT_PRODUCTS_DIR',
+            }, comment=f"{target}.xctest")
+            project.add_child(project.project['productRefGroup'], product_uuid)
+            sources_uuid = self._add_phase(project, 'PBXSourcesBuildPhase', self.generate_uuid('sources_phase', target))
+            frameworks_uuid = self._add_phase(project, 'PBXFrameworksBuildPhase',
+                                              self.generate_uuid('frameworks_phase', target))
+            target_uuid = project.add_object(self.generate_uuid('target', target), {
+                'isa': 'PBXNativeTarget',
+                'buildConfigurationList': self._add_config_list(project, target),
+                'buildPhases': [sources_uuid, frameworks_uuid],
+                'buildRules': [],
+                'dependencies': [self._add_target_dependency(project, target, self.project_name)],
+                'name': target,
+                'productName': target,
+                'productReference': product_uuid,
+                'productType': 'com.apple.product-type.bundle.unit-test',
+            }, comment=target)
+            project.project['targets'].append(target_uuid)
+            target_attributes[target_uuid] = {'CreatedOnToolsVersion': '15.0', 'TestTargetID': app_uuid}
+            for path in paths:
+                project.add_file(path, target, self.generate_uuid('file_ref', path),
+                                 self.generate_uuid('build_file', target, path))
+        xcconfig.apply_layers(project, files, assignments, self.configs_dir)
+    
+    def _add_phase(self, project, isa, phase_uuid):
+        return project.add_object(phase_uuid, {
+            'isa': isa,
+            'buildActionMask': '2147483647',
+            'files': [],
+            'runOnlyForDeploymentPostprocessing': '0',
+        })
+    
+    def _add_config_list(self, project, target):
+        configs = [project.add_object(self.generate_uuid('config', target, name), {
+            'isa': 'XCBuildConfiguration',
+            'buildSettings': {},
+            'name': name,
+        }, comment=name) for name in self.configurations()]
+        return project.add_object(self.generate_uuid('config_list', target), {
+            'isa': 'XCConfigurationList',
+            'buildConfigurations': configs,
+            'defaultConfigurationIsVisible': '0',
+            'defaultConfigurationName': self.default_configuration(),
+        })
+    
+    def _add_target_dependency(self, project, owner, module):
+        target_uuid = self.generate_uuid('target', module)
+        proxy_uuid = project.add_object(self.generate_uuid('container_proxy', owner, module), {
+            'isa': 'PBXContainerItemProxy',
+            'containerPortal': project.root['rootObject'],
+            'proxyType': '1',
+            'remoteGlobalIDString': target_uuid,
+            'remoteInfo': module,
+        })
+        return project.add_object(self.generate_uuid('target_dependency', owner, module), {
+            'isa': 'PBXTargetDependency',
+            'target': target_uuid,
+            'targetProxy': proxy_uuid,
+        })
+    
+    def _add_swift_file(self, project, swift_file):
+        path = self.project_path(swift_file)
+        file_ref_uuid = self.generate_uuid('file_ref', path)
+        if project.get(file_ref_uuid) is not None:
+            # Already added by another tool (e.g. watch_project.py)
+            return None
+        name = os.path.basename(swift_file)
+        project.add_object(file_ref_uuid, {
+            'isa': 'PBXFileReference',
+            'lastKnownFileType': 'sourcecode.swift',
+            'path': name,
+            'sourceTree': '<group>',
+        }, comment=name)
+        return project.add_object(self.generate_uuid('build_file', path), {
+            'isa': 'PBXBuildFile',
+            'fileRef': file_ref_uuid,
+        }, comment=f"{name} in Sources")
+    
+    def _add_resource(self, project, bundle):
+        path = self.project_path(bundle)
+        file_ref_uuid = self.generate_uuid('file_ref', path)
+        if project.get(file_ref_uuid) is not None:
+            return None
+        name = os.path.basename(bundle)
+        project.add_object(file_ref_uuid, {
+            'isa': 'PBXFileReference',
+            'lastKnownFileType': file_type_for(name),
+            'path': name,
+            'sourceTree': '<group>',
+        }, comment=name)
+        return project.add_object(self.generate_uuid('build_file', path), {
+            'isa': 'PBXBuildFile',
+            'fileRef': file_ref_uuid,
+        }, comment=f"{name} in Resources")
+    
+    def _remove_file(self, project, relative_path, gone):
+        path = self.project_path(relative_path)
+        for object_id in (self.generate_uuid('build_file', path),
+                          self.generate_uuid('file_ref', path)):
+            if project.get(object_id) is not None:
+                project.remove_object(object_id)
+                gone.add(object_id)
+    
+    def _remove_group(self, project, previous, directory, gone):
+        stack = [directory]
+        while stack:
+            directory = stack.pop()
+            entry = previous.dirs.get(directory)
+            if entry is None:
+                continue
+            for name in [*entry['files'], *self.resource_bundles(entry)]:
+                self._remove_file(project, f"{directory}/{name}", gone)
+            stack.extend(f"{directory}/{name}" for name in entry['subdirs'])
+            if project.get(self.group_uuid(directory)) is not None:
+                project.remove_object(self.group_uuid(directory))
+    
+    def write_project_pbxproj(self, f, manifest=None):
+        # Sections are written to f as they are produced; only the list of
+        # paths and their UUIDs is kept in memory, never the whole document.
+        write = f.write
+        
         # Collect all Swift files
-        swift_files = []
-        for root, dirs, files in os.walk(self.project_name):
-            for file in files:
-                if file.endswith('.swift'):
-                    relative_path = os.path.relpath(os.path.join(root, file), self.project_name)
-                    swift_files.append(relative_path)
+        if manifest is None:
+            manifest = scan_sources(self.project_name).manifest
+        swift_files = manifest.paths()
+        resources = [bundle for bundle in manifest.bundles() if bundle.endswith(RESOURCE_BUNDLES)]
         
         # Generate UUIDs for project elements
-        project_uuid = self.generate_uuid()
-        main_group_uuid = self.generate_uuid()
-        target_uuid = self.generate_uuid()
-        build_config_list_uuid = self.generate_uuid()
+        project_uuid = self.generate_uuid('project')
+        main_group_uuid = self.generate_uuid('group')
+        target_uuid = self.generate_uuid('target', self.project_name)
+        build_config_list_uuid = self.generate_uuid('config_list', self.project_name)
+        project_config_list_uuid = self.generate_uuid('config_list')
+        sources_uuid = self.generate_uuid('sources_phase', self.project_name)
+        resources_uuid = self.generate_uuid('resources_phase', self.project_name)
         
         # Basic project structure
-        content = f"""// !$*UTF8*$!
+        write(f"""// !$*UTF8*$!
 {{
 	archiveVersion = 1;
 	classes = {{
@@ -135,39 +952,60 @@ targets:
 	objects = {{
 
 /* Begin PBXBuildFile section */
-"""
+""")
+        
+        # Allocate the per-file UUIDs up front
+        with self.profiler.phase('uuids', files=len(swift_files)):
+            for swift_file in swift_files:
+                path = self.project_path(swift_file)
+                self.file_refs[swift_file] = self.generate_uuid('file_ref', path)
+                if swift_file not in self.excluded:
+                    self.build_file_refs[swift_file] = self.generate_uuid('build_file', path)
         
         # Add build files
         for swift_file in swift_files:
-            build_file_uuid = self.generate_uuid()
-            file_ref_uuid = self.generate_uuid()
-            self.build_file_refs[swift_file] = build_file_uuid
-            self.file_refs[swift_file] = file_ref_uuid
-            content += f"\t\t{build_file_uuid} /* {swift_file} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_ref_uuid} /* {swift_file} */; }};\n"
+            if swift_file in self.excluded:
+                continue
+            name = os.path.basename(swift_file)
+            write(f"\t\t{self.build_file_refs[swift_file]} /* {name} in Sources */ = {{isa = PBXBuildFile; fileRef = {self.file_refs[swift_file]} /* {name} */; }};\n")
+        for bundle in resources:
+            path = self.project_path(bundle)
+            name = os.path.basename(bundle)
+            write(f"\t\t{self.generate_uuid('build_file', path)} /* {name} in Resources */ = {{isa = PBXBuildFile; fileRef = {self.generate_uuid('file_ref', path)} /* {name} */; }};\n")
         
-        content += """/* End PBXBuildFile section */
+        write("""/* End PBXBuildFile section */
 
 /* Begin PBXFileReference section */
-"""
+""")
         
         # Add file references
-        app_uuid = self.generate_uuid()
-        info_plist_uuid = self.generate_uuid()
+        app_uuid = self.generate_uuid('product', self.project_name)
+        info_plist_uuid = self.generate_uuid('file_ref', 'Info.plist')
         
-        content += f"\t\t{app_uuid} /* {self.project_name}.app */ = {{isa = PBXFileReference; explicitFileType = wrapper.application; includeInIndex = 0; path = {self.project_name}.app; sourceTree = BUILT_PRODUCTS_DIR; }};\n"
-        content += f"\t\t{info_plist_uuid} /* Info.plist */ = {{isa = PBXFileReference; lastKnownFileType = text.plist.xml; path = Info.plist; sourceTree = \"<group>\"; }};\n"
+        write(f"\t\t{app_uuid} /* {self.project_name}.app */ = {{isa = PBXFileReference; explicitFileType = wrapper.application; includeInIndex = 0; path = {self.project_name}.app; sourceTree = BUILT_PRODUCTS_DIR; }};\n")
+        write(f"\t\t{info_plist_uuid} /* Info.plist */ = {{isa = PBXFileReference; lastKnownFileType = text.plist.xml; path = Info.plist; sourceTree = \"<group>\"; }};\n")
+        
+        config_files, config_assignments = self.xcconfig_layers()
+        config_refs = {}
+        for file_name in sorted(config_files):
+            config_refs[file_name] = self.generate_uuid('file_ref', f"{self.configs_dir}/{file_name}")
+            write(f"\t\t{config_refs[file_name]} /* {file_name} */ = {{isa = PBXFileReference; lastKnownFileType = text.xcconfig; path = {_quote(file_name)}; sourceTree = \"<group>\"; }};\n")
         
         for swift_file in swift_files:
             file_ref_uuid = self.file_refs[swift_file]
-            content += f"\t\t{file_ref_uuid} /* {swift_file} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = \"{swift_file}\"; sourceTree = \"<group>\"; }};\n"
+            name = os.path.basename(swift_file)
+            write(f"\t\t{file_ref_uuid} /* {name} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {_quote(name)}; sourceTree = \"<group>\"; }};\n")
+        for bundle in resources:
+            name = os.path.basename(bundle)
+            write(f"\t\t{self.generate_uuid('file_ref', self.project_path(bundle))} /* {name} */ = {{isa = PBXFileReference; lastKnownFileType = {_quote(file_type_for(name))}; path = {_quote(name)}; sourceTree = \"<group>\"; }};\n")
         
-        content += """/* End PBXFileReference section */
+        write("""/* End PBXFileReference section */
 
 /* Begin PBXFrameworksBuildPhase section */
-"""
+""")
         
-        frameworks_uuid = self.generate_uuid()
-        content += f"""\t\t{frameworks_uuid} /* Frameworks */ = {{
+        frameworks_uuid = self.generate_uuid('frameworks_phase', self.project_name)
+        write(f"""\t\t{frameworks_uuid} /* Frameworks */ = {{
 			isa = PBXFrameworksBuildPhase;
 			buildActionMask = 2147483647;
 			files = (
@@ -180,20 +1018,52 @@ targets:
 \t\t{main_group_uuid} = {{
 			isa = PBXGroup;
 			children = (
-				{self.generate_uuid()} /* {self.project_name} */,
-				{self.generate_uuid()} /* Products */,
+				{self.group_uuid('')} /* {self.project_name} */,
+				{self.generate_uuid('group', self.configs_dir)} /* {self.configs_dir} */,
+				{self.generate_uuid('group', 'Products')} /* Products */,
 			);
 			sourceTree = "<group>";
 		}};
-/* End PBXGroup section */
+\t\t{self.generate_uuid('group', self.configs_dir)} /* {self.configs_dir} */ = {{
+			isa = PBXGroup;
+			children = (
+""" + ''.join(f"\t\t\t\t{config_refs[file_name]} /* {file_name} */,\n" for file_name in sorted(config_files)) + f"""\t\t\t);
+			path = {self.configs_dir};
+			sourceTree = "<group>";
+		}};
+\t\t{self.generate_uuid('group', 'Products')} /* Products */ = {{
+			isa = PBXGroup;
+			children = (
+				{app_uuid} /* {self.project_name}.app */,
+			);
+			name = Products;
+			sourceTree = "<group>";
+		}};
+""")
+        
+        # One group per source directory, nested like the tree on disk
+        for directory in sorted(manifest.dirs):
+            name = directory.rsplit('/', 1)[-1] or self.project_name
+            write(f"\t\t{self.group_uuid(directory)} /* {name} */ = {{\n"
+                  f"\t\t\tisa = PBXGroup;\n"
+                  f"\t\t\tchildren = (\n")
+            for child_uuid, child_name in self.group_children(manifest, directory):
+                write(f"\t\t\t\t{child_uuid} /* {child_name} */,\n")
+            write(f"\t\t\t);\n"
+                  f"\t\t\tpath = {_quote(name)};\n"
+                  f"\t\t\tsourceTree = \"<group>\";\n"
+                  f"\t\t}};\n")
+        
+        write(f"""/* End PBXGroup section */
 
 /* Begin PBXNativeTarget section */
 \t\t{target_uuid} /* {self.project_name} */ = {{
 			isa = PBXNativeTarget;
 			buildConfigurationList = {build_config_list_uuid} /* Build configuration list for PBXNativeTarget "{self.project_name}" */;
 			buildPhases = (
-				{self.generate_uuid()} /* Sources */,
+				{sources_uuid} /* Sources */,
 				{frameworks_uuid} /* Frameworks */,
+				{resources_uuid} /* Resources */,
 			);
 			buildRules = (
 			);
@@ -219,7 +1089,7 @@ targets:
 					}};
 				}};
 			}};
-			buildConfigurationList = {self.generate_uuid()} /* Build configuration list for PBXProject "{self.project_name}" */;
+			buildConfigurationList = {project_config_list_uuid} /* Build configuration list for PBXProject "{self.project_name}" */;
 			compatibilityVersion = "Xcode 14.0";
 			developmentRegion = en;
 			hasScannedForEncodings = 0;
@@ -228,7 +1098,7 @@ targets:
 				Base,
 			);
 			mainGroup = {main_group_uuid};
-			productRefGroup = {self.generate_uuid()} /* Products */;
+			productRefGroup = {self.generate_uuid('group', 'Products')} /* Products */;
 			projectDirPath = "";
 			projectRoot = "";
 			targets = (
@@ -237,243 +1107,116 @@ targets:
 		}};
 /* End PBXProject section */
 
+/* Begin PBXResourcesBuildPhase section */
+\t\t{resources_uuid} /* Resources */ = {{
+			isa = PBXResourcesBuildPhase;
+			buildActionMask = 2147483647;
+			files = (
+""" + ''.join(f"\t\t\t\t{self.generate_uuid('build_file', self.project_path(bundle))} /* {os.path.basename(bundle)} in Resources */,\n" for bundle in resources) + f"""\t\t\t);
+			runOnlyForDeploymentPostprocessing = 0;
+		}};
+/* End PBXResourcesBuildPhase section */
+
 /* Begin PBXSourcesBuildPhase section */
-\t\t{self.generate_uuid()} /* Sources */ = {{
+\t\t{sources_uuid} /* Sources */ = {{
 			isa = PBXSourcesBuildPhase;
 			buildActionMask = 2147483647;
 			files = (
-"""
+""")
         
         # Add source files to build phase
         for swift_file in swift_files:
+            if swift_file in self.excluded:
+                continue
             build_file_uuid = self.build_file_refs[swift_file]
-            content += f"\t\t\t\t{build_file_uuid} /* {swift_file} in Sources */,\n"
+            write(f"\t\t\t\t{build_file_uuid} /* {os.path.basename(swift_file)} in Sources */,\n")
         
-        content += """\t\t\t);
+        write("""\t\t\t);
 			runOnlyForDeploymentPostprocessing = 0;
 		};
 /* End PBXSourcesBuildPhase section */
 
 /* Begin XCBuildConfiguration section */
-"""
-        
-        # Build configurations
-        debug_config_uuid = self.generate_uuid()
-        release_config_uuid = self.generate_uuid()
+""")
         
-        content += f"""\t\t{debug_config_uuid} /* Debug */ = {{
+        # Build configurations: empty buildSettings, everything comes from the xcconfig layer
+        configs = {}
+        for (target_name, config_name), file_name in sorted(config_assignments.items(), key=lambda item: (item[0][0] or '', item[0][1])):
+            config_uuid = self.generate_uuid('config', *filter(None, (target_name, config_name)))
+            configs.setdefault(target_name, []).append((config_uuid, config_name))
+            write(f"""\t\t{config_uuid} /* {config_name} */ = {{
 			isa = XCBuildConfiguration;
+			baseConfigurationReference = {config_refs[file_name]} /* {file_name} */;
 			buildSettings = {{
-				ALWAYS_SEARCH_USER_PATHS = NO;
-				ASSETCATALOG_COMPILER_GENERATE_SWIFT_ASSET_SYMBOL_EXTENSIONS = YES;
-				CLANG_ANALYZER_NONNULL = YES;
-				CLANG_ANALYZER_NUMBER_OBJECT_CONVERSION = YES_AGGRESSIVE;
-				CLANG_CXX_LANGUAGE_STANDARD = "gnu++20";
-				CLANG_ENABLE_MODULES = YES;
-				CLANG_ENABLE_OBJC_ARC = YES;
-				CLANG_ENABLE_OBJC_WEAK = YES;
-				CLANG_WARN_BLOCK_CAPTURE_AUTORELEASING = YES;
-				CLANG_WARN_BOOL_CONVERSION = YES;
-				CLANG_WARN_COMMA = YES;
-				CLANG_WARN_CONSTANT_CONVERSION = YES;
-				CLANG_WARN_DEPRECATED_OBJC_IMPLEMENTATIONS = YES;
-				CLANG_WARN_DIRECT_OBJC_ISA_USAGE = YES_ERROR;
-				CLANG_WARN_DOCUMENTATION_COMMENTS = YES;
-				CLANG_WARN_EMPTY_BODY = YES;
-				CLANG_WARN_ENUM_CONVERSION = YES;
-				CLANG_WARN_INFINITE_RECURSION = YES;
-				CLANG_WARN_INT_CONVERSION = YES;
-				CLANG_WARN_NON_LITERAL_NULL_CONVERSION = YES;
-				CLANG_WARN_OBJC_IMPLICIT_RETAIN_SELF = YES;
-				CLANG_WARN_OBJC_LITERAL_CONVERSION = YES;
-				CLANG_WARN_OBJC_ROOT_CLASS = YES_ERROR;
-				CLANG_WARN_QUOTED_INCLUDE_IN_FRAMEWORK_HEADER = YES;
-				CLANG_WARN_RANGE_LOOP_ANALYSIS = YES;
-				CLANG_WARN_STRICT_PROTOTYPES = YES;
-				CLANG_WARN_SUSPICIOUS_MOVE = YES;
-				CLANG_WARN_UNGUARDED_AVAILABILITY = YES_AGGRESSIVE;
-				CLANG_WARN_UNREACHABLE_CODE = YES;
-				CLANG_WARN__DUPLICATE_METHOD_MATCH = YES;
-				COPY_PHASE_STRIP = NO;
-				DEBUG_INFORMATION_FORMAT = dwarf;
-				ENABLE_STRICT_OBJC_MSGSEND = YES;
-				ENABLE_TESTABILITY = YES;
-				ENABLE_USER_SCRIPT_SANDBOXING = YES;
-				GCC_C_LANGUAGE_STANDARD = gnu17;
-				GCC_DYNAMIC_NO_PIC = NO;
-				GCC_NO_COMMON_BLOCKS = YES;
-				GCC_OPTIMIZATION_LEVEL = 0;
-				GCC_PREPROCESSOR_DEFINITIONS = (
-					"DEBUG=1",
-					"$(inherited)",
-				);
-				GCC_WARN_64_TO_32_BIT_CONVERSION = YES;
-				GCC_WARN_ABOUT_RETURN_TYPE = YES_ERROR;
-				GCC_WARN_UNDECLARED_SELECTOR = YES;
-				GCC_WARN_UNINITIALIZED_AUTOS = YES_AGGRESSIVE;
-				GCC_WARN_UNUSED_FUNCTION = YES;
-				GCC_WARN_UNUSED_VARIABLE = YES;
-				IPHONEOS_DEPLOYMENT_TARGET = 15.0;
-				LOCALIZATION_PREFERS_STRING_CATALOGS = YES;
-				MTL_ENABLE_DEBUG_INFO = INCLUDE_SOURCE;
-				MTL_FAST_MATH = YES;
-				ONLY_ACTIVE_ARCH = YES;
-				SDKROOT = iphoneos;
-				SWIFT_ACTIVE_COMPILATION_CONDITIONS = "DEBUG $(inherited)";
-				SWIFT_OPTIMIZATION_LEVEL = "-Onone";
 			}};
-			name = Debug;
+			name = {config_name};
 		}};
-\t\t{release_config_uuid} /* Release */ = {{
-			isa = XCBuildConfiguration;
-			buildSettings = {{
-				ALWAYS_SEARCH_USER_PATHS = NO;
-				ASSETCATALOG_COMPILER_GENERATE_SWIFT_ASSET_SYMBOL_EXTENSIONS = YES;
-				CLANG_ANALYZER_NONNULL = YES;
-				CLANG_ANALYZER_NUMBER_OBJECT_CONVERSION = YES_AGGRESSIVE;
-				CLANG_CXX_LANGUAGE_STANDARD = "gnu++20";
-				CLANG_ENABLE_MODULES = YES;
-				CLANG_ENABLE_OBJC_ARC = YES;
-				CLANG_ENABLE_OBJC_WEAK = YES;
-				CLANG_WARN_BLOCK_CAPTURE_AUTORELEASING = YES;
-				CLANG_WARN_BOOL_CONVERSION = YES;
-				CLANG_WARN_COMMA = YES;
-				CLANG_WARN_CONSTANT_CONVERSION = YES;
-				CLANG_WARN_DEPRECATED_OBJC_IMPLEMENTATIONS = YES;
-				CLANG_WARN_DIRECT_OBJC_ISA_USAGE = YES_ERROR;
-				CLANG_WARN_DOCUMENTATION_COMMENTS = YES;
-				CLANG_WARN_EMPTY_BODY = YES;
-				CLANG_WARN_ENUM_CONVERSION = YES;
-				CLANG_WARN_INFINITE_RECURSION = YES;
-				CLANG_WARN_INT_CONVERSION = YES;
-				CLANG_WARN_NON_LITERAL_NULL_CONVERSION = YES;
-				CLANG_WARN_OBJC_IMPLICIT_RETAIN_SELF = YES;
-				CLANG_WARN_OBJC_LITERAL_CONVERSION = YES;
-				CLANG_WARN_OBJC_ROOT_CLASS = YES_ERROR;
-				CLANG_WARN_QUOTED_INCLUDE_IN_FRAMEWORK_HEADER = YES;
-				CLANG_WARN_RANGE_LOOP_ANALYSIS = YES;
-				CLANG_WARN_STRICT_PROTOTYPES = YES;
-				CLANG_WARN_SUSPICIOUS_MOVE = YES;
-				CLANG_WARN_UNGUARDED_AVAILABILITY = YES_AGGRESSIVE;
-				CLANG_WARN_UNREACHABLE_CODE = YES;
-				CLANG_WARN__DUPLICATE_METHOD_MATCH = YES;
-				COPY_PHASE_STRIP = NO;
-				DEBUG_INFORMATION_FORMAT = "dwarf-with-dsym";
-				ENABLE_NS_ASSERTIONS = NO;
-				ENABLE_STRICT_OBJC_MSGSEND = YES;
-				ENABLE_USER_SCRIPT_SANDBOXING = YES;
-				GCC_C_LANGUAGE_STANDARD = gnu17;
-				GCC_NO_COMMON_BLOCKS = YES;
-				GCC_WARN_64_TO_32_BIT_CONVERSION = YES;
-				GCC_WARN_ABOUT_RETURN_TYPE = YES_ERROR;
-				GCC_WARN_UNDECLARED_SELECTOR = YES;
-				GCC_WARN_UNINITIALIZED_AUTOS = YES_AGGRESSIVE;
-				GCC_WARN_UNUSED_FUNCTION = YES;
-				GCC_WARN_UNUSED_VARIABLE = YES;
-				IPHONEOS_DEPLOYMENT_TARGET = 15.0;
-				LOCALIZATION_PREFERS_STRING_CATALOGS = YES;
-				MTL_ENABLE_DEBUG_INFO = NO;
-				MTL_FAST_MATH = YES;
-				SDKROOT = iphoneos;
-				SWIFT_COMPILATION_MODE = wholemodule;
-				VALIDATE_PRODUCT = YES;
-			}};
-			name = Release;
-		}};
-"""
-        
-        # Target build configurations
-        target_debug_uuid = self.generate_uuid()
-        target_release_uuid = self.generate_uuid()
+""")
         
-        content += f"""\t\t{target_debug_uuid} /* Debug */ = {{
-			isa = XCBuildConfiguration;
-			buildSettings = {{
-				ASSETCATALOG_COMPILER_APPICON_NAME = AppIcon;
-				ASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME = AccentColor;
-				CODE_SIGN_STYLE = Automatic;
-				CURRENT_PROJECT_VERSION = 1;
-				DEVELOPMENT_ASSET_PATHS = "";
-				ENABLE_PREVIEWS = YES;
-				GENERATE_INFOPLIST_FILE = NO;
-				INFOPLIST_FILE = {self.project_name}/Info.plist;
-				INFOPLIST_KEY_UIApplicationSceneManifest_Generation = YES;
-				INFOPLIST_KEY_UIApplicationSupportsIndirectInputEvents = YES;
-				INFOPLIST_KEY_UILaunchScreen_Generation = YES;
-				INFOPLIST_KEY_UISupportedInterfaceOrientations_iPad = "UIInterfaceOrientationPortrait UIInterfaceOrientationPortraitUpsideDown UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-				INFOPLIST_KEY_UISupportedInterfaceOrientations_iPhone = "UIInterfaceOrientationPortrait UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-				LD_RUNPATH_SEARCH_PATHS = (
-					"$(inherited)",
-					"@executable_path/Frameworks",
-				);
-				MARKETING_VERSION = 1.0;
-				PRODUCT_BUNDLE_IDENTIFIER = {self.bundle_id};
-				PRODUCT_NAME = "$(TARGET_NAME)";
-				SWIFT_EMIT_LOC_STRINGS = YES;
-				SWIFT_VERSION = 5.0;
-				TARGETED_DEVICE_FAMILY = "1,2";
-			}};
-			name = Debug;
-		}};
-\t\t{target_release_uuid} /* Release */ = {{
-			isa = XCBuildConfiguration;
-			buildSettings = {{
-				ASSETCATALOG_COMPILER_APPICON_NAME = AppIcon;
-				ASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME = AccentColor;
-				CODE_SIGN_STYLE = Automatic;
-				CURRENT_PROJECT_VERSION = 1;
-				DEVELOPMENT_ASSET_PATHS = "";
-				ENABLE_PREVIEWS = YES;
-				GENERATE_INFOPLIST_FILE = NO;
-				INFOPLIST_FILE = {self.project_name}/Info.plist;
-				INFOPLIST_KEY_UIApplicationSceneManifest_Generation = YES;
-				INFOPLIST_KEY_UIApplicationSupportsIndirectInputEvents = YES;
-				INFOPLIST_KEY_UILaunchScreen_Generation = YES;
-				INFOPLIST_KEY_UISupportedInterfaceOrientations_iPad = "UIInterfaceOrientationPortrait UIInterfaceOrientationPortraitUpsideDown UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-				INFOPLIST_KEY_UISupportedInterfaceOrientations_iPhone = "UIInterfaceOrientationPortrait UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-				LD_RUNPATH_SEARCH_PATHS = (
-					"$(inherited)",
-					"@executable_path/Frameworks",
-				);
-				MARKETING_VERSION = 1.0;
-				PRODUCT_BUNDLE_IDENTIFIER = {self.bundle_id};
-				PRODUCT_NAME = "$(TARGET_NAME)";
-				SWIFT_EMIT_LOC_STRINGS = YES;
-				SWIFT_VERSION = 5.0;
-				TARGETED_DEVICE_FAMILY = "1,2";
-			}};
-			name = Release;
-		}};
-/* End XCBuildConfiguration section */
+        write(f"""/* End XCBuildConfiguration section */
 
 /* Begin XCConfigurationList section */
 \t\t{build_config_list_uuid} /* Build configuration list for PBXNativeTarget "{self.project_name}" */ = {{
 			isa = XCConfigurationList;
 			buildConfigurations = (
-				{target_debug_uuid} /* Debug */,
-				{target_release_uuid} /* Release */,
-			);
+""" + ''.join(f"\t\t\t\t{config_uuid} /* {config_name} */,\n" for config_uuid, config_name in configs[self.project_name]) + f"""\t\t\t);
 			defaultConfigurationIsVisible = 0;
-			defaultConfigurationName = Release;
+			defaultConfigurationName = {self.default_configuration()};
 		}};
-\t\t{self.generate_uuid()} /* Build configuration list for PBXProject "{self.project_name}" */ = {{
+\t\t{project_config_list_uuid} /* Build configuration list for PBXProject "{self.project_name}" */ = {{
 			isa = XCConfigurationList;
 			buildConfigurations = (
-				{debug_config_uuid} /* Debug */,
-				{release_config_uuid} /* Release */,
-			);
+""" + ''.join(f"\t\t\t\t{config_uuid} /* {config_name} */,\n" for config_uuid, config_name in configs[None]) + f"""\t\t\t);
 			defaultConfigurationIsVisible = 0;
-			defaultConfigurationName = Release;
+			defaultConfigurationName = {self.default_configuration()};
 		}};
 /* End XCConfigurationList section */
 	}};
 	rootObject = {project_uuid} /* Project object */;
 }}
-"""
+""")
         
-        return content
+        return len(swift_files)
+    
+    def generate_schemes(self):
+        """{scheme name: content}: the app scheme runs the unit tests, <App>PerformanceTests the performance ones."""
+        unit, performance = (f"{self.project_name}{suffix}" for suffix in ('Tests', PERFORMANCE_SUFFIX))
+        schemes = {self.project_name: self.generate_scheme([target for target in (unit,) if target in self.tests])}
+        if performance in self.tests:
+            schemes[performance] = self.generate_scheme([performance])
+        return schemes
+    
+    def _buildable_reference(self, target, product, indent):
+        pad = ' ' * indent
+        return (f"""{pad}<BuildableReference
+{pad}   BuildableIdentifier = "primary"
+{pad}   BlueprintIdentifier = "{self.generate_uuid('target', target)}"
+{pad}   BuildableName = "{product}"
+{pad}   BlueprintName = "{target}"
+{pad}   ReferencedContainer = "container:{self.xcodeproj_dir}">
+{pad}</BuildableReference>
+""")
     
-    def generate_scheme(self):
+    def generate_scheme(self, testables=()):
+        # A variant project has one configuration for every action
+        run, release = ('Debug', 'Release') if self.variant is None else (self.variant, self.variant)
+        if not self.testable(run):
+            # Without ENABLE_TESTABILITY the hosted tests cannot @testable import the app
+            testables = ()
+        app = self._buildable_reference(self.project_name, f"{self.project_name}.app", 12)
+        runnable = self._buildable_reference(self.project_name, f"{self.project_name}.app", 9)
+        test_entries = ''.join(f"""         <BuildActionEntry
+            buildForTesting = "YES"
+            buildForRunning = "NO"
+            buildForProfiling = "NO"
+            buildForArchiving = "NO"
+            buildForAnalyzing = "NO">
+{self._buildable_reference(target, f"{target}.xctest", 12)}         </BuildActionEntry>
+""" for target in testables)
+        testable_references = ''.join(f"""         <TestableReference
+            skipped = "NO">
+{self._buildable_reference(target, f"{target}.xctest", 12)}         </TestableReference>
+""" for target in testables)
         return f"""<?xml version="1.0" encoding="UTF-8"?>
 <Scheme
    LastUpgradeVersion = "1500"
@@ -488,26 +1231,19 @@ targets:
             buildForProfiling = "YES"
             buildForArchiving = "YES"
             buildForAnalyzing = "YES">
-            <BuildableReference
-               BuildableIdentifier = "primary"
-               BlueprintIdentifier = "{self.generate_uuid()}"
-               BuildableName = "{self.project_name}.app"
-               BlueprintName = "{self.project_name}"
-               ReferencedContainer = "container:{self.project_name}.xcodeproj">
-            </BuildableReference>
-         </BuildActionEntry>
-      </BuildActionEntries>
+{app}         </BuildActionEntry>
+{test_entries}      </BuildActionEntries>
    </BuildAction>
    <TestAction
-      buildConfiguration = "Debug"
+      buildConfiguration = "{run}"
       selectedDebuggerIdentifier = "Xcode.DebuggerFoundation.Debugger.LLDB"
       selectedLauncherIdentifier = "Xcode.DebuggerFoundation.Launcher.LLDB"
       shouldUseLaunchSchemeArgsEnv = "YES">
       <Testables>
-      </Testables>
+{testable_references}      </Testables>
    </TestAction>
    <LaunchAction
-      buildConfiguration = "Debug"
+      buildConfiguration = "{run}"
       selectedDebuggerIdentifier = "Xcode.DebuggerFoundation.Debugger.LLDB"
       selectedLauncherIdentifier = "Xcode.DebuggerFoundation.Launcher.LLDB"
       launchStyle = "0"
@@ -518,43 +1254,99 @@ targets:
       allowLocationSimulation = "YES">
       <BuildableProductRunnable
          runnableDebuggingMode = "0">
-         <BuildableReference
-            BuildableIdentifier = "primary"
-            BlueprintIdentifier = "{self.generate_uuid()}"
-            BuildableName = "{self.project_name}.app"
-            BlueprintName = "{self.project_name}"
-            ReferencedContainer = "container:{self.project_name}.xcodeproj">
-         </BuildableReference>
-      </BuildableProductRunnable>
+{runnable}      </BuildableProductRunnable>
    </LaunchAction>
    <ProfileAction
-      buildConfiguration = "Release"
+      buildConfiguration = "{release}"
       shouldUseLaunchSchemeArgsEnv = "YES"
       savedToolIdentifier = ""
       useCustomWorkingDirectory = "NO"
       debugDocumentVersioning = "YES">
       <BuildableProductRunnable
          runnableDebuggingMode = "0">
-         <BuildableReference
-            BuildableIdentifier = "primary"
-            BlueprintIdentifier = "{self.generate_uuid()}"
-            BuildableName = "{self.project_name}.app"
-            BlueprintName = "{self.project_name}"
-            ReferencedContainer = "container:{self.project_name}.xcodeproj">
-         </BuildableReference>
-      </BuildableProductRunnable>
+{runnable}      </BuildableProductRunnable>
    </ProfileAction>
    <AnalyzeAction
-      buildConfiguration = "Debug">
+      buildConfiguration = "{run}">
    </AnalyzeAction>
    <ArchiveAction
-      buildConfiguration = "Release"
+      buildConfiguration = "{release}"
       revealArchiveInOrganizer = "YES">
    </ArchiveAction>
 </Scheme>
 """
 
+class SharedScan:
+    """What generate_variants computes once and hands to every variant's process."""
+
+    def __init__(self, manifest, excluded, shard_plan, tests):
+        self.manifest = manifest
+        self.excluded = excluded
+        self.shard_plan = shard_plan
+        self.tests = tests
+
+
+def _generate_variant(job):
+    # Runs in a worker process; the output is printed by the parent, in variant order
+    project_name, bundle_id, variant, shared = job
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        generator = XcodeprojGenerator(project_name, bundle_id, variant=variant)
+        # Icons are shared by every variant and rendered once by the parent
+        generator.assets_built = True
+        generator.create_basic_project(shared)
+    return output.getvalue()
+
+
+def generate_variants(project_name, bundle_id, variants, workers=None, prune_unreachable=False,
+                      shard_modules=False, profiler=None):
+    """Write one <project>-<variant>.xcodeproj per VARIANTS name in parallel, from a single scan.
+    
+    The sources are scanned, indexed and sharded once here; each worker only
+    renders or patches its own project, xcconfig directory and schemes.
+    """
+    unknown = [variant for variant in variants if variant not in VARIANTS]
+    if unknown or not variants:
+        raise ValueError(f"unknown variants {', '.join(unknown) or '(none given)'}; expected any of {', '.join(VARIANTS)}")
+    lead = XcodeprojGenerator(project_name, bundle_id, prune_unreachable, shard_modules, profiler, variants[0])
+    start = time.perf_counter()
+    lead.build_app_icons()
+    os.makedirs(lead.xcodeproj_dir, exist_ok=True)
+    # Any variant's manifest is a valid hint; workers compare root hashes against their own
+    with lead.profiler.phase('scan'):
+        scan = scan_sources(project_name, SourceManifest.load(f"{lead.xcodeproj_dir}/{MANIFEST_NAME}"))
+    if prune_unreachable:
+        with lead.profiler.phase('index'):
+            lead.find_unreachable(scan.manifest, lead.xcodeproj_dir)
+    if shard_modules:
+        with lead.profiler.phase('shards'):
+            lead.plan_module_shards(scan.manifest, lead.xcodeproj_dir)
+    lead.scan_tests()
+    shared = SharedScan(scan.manifest, lead.excluded, lead.shard_plan, lead.tests)
+    jobs = [(project_name, bundle_id, variant, shared) for variant in variants]
+    with lead.profiler.phase('variants', variants=len(jobs)):
+        with ProcessPoolExecutor(max_workers=min(len(jobs), workers or os.cpu_count() or 1)) as pool:
+            for output in pool.map(_generate_variant, jobs):
+                print(output, end='')
+    print(f"🧬 {len(jobs)} project variants ({', '.join(variants)}) from one scan of "
+          f"{len(scan.manifest.paths())} Swift files in {time.perf_counter() - start:.3f}s")
+
 if __name__ == "__main__":
-    generator = XcodeprojGenerator("SignalAir", "com.signalair.app")
-    generator.create_project()
-    print("✅ Xcode project created successfully!") 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the SignalAir Xcode project")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="write per-phase wall/CPU time and memory peaks as JSON, plus flame graph stacks")
+    parser.add_argument('--variants', metavar='NAMES',
+                        help=f"comma-separated subset of {','.join(VARIANTS)}: write one single-configuration "
+                             f"project per variant, in parallel")
+    parser.add_argument('--workers', type=int, help="processes for --variants (default: one per CPU)")
+    args = parser.parse_args()
+    profiler = profiling.Profiler() if args.profile else None
+    if args.variants:
+        generate_variants("SignalAir", "com.signalair.app", args.variants.split(','), args.workers, profiler=profiler)
+    else:
+        generator = XcodeprojGenerator("SignalAir", "com.signalair.app", profiler=profiler)
+        generator.create_project()
+    print("✅ Xcode project created successfully!")
+    if profiler is not None:
+        profiler.finish(args.profile) 
\ No newline at end of file
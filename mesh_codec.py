@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Python codec for the SignalAir binary mesh format, for captured traffic.
+
+Mirrors Shared/Models/BinaryMessageEncoder.swift and BinaryMessageDecoder.swift.
+A mesh frame is
+
+    version u8 (=1) | type u8 | id length u8 | id (UTF-8) | data length u32 LE | timestamp u32 LE | data
+
+A topology frame carries BinaryMessageEncoder.encodeTopology's layout in its
+data (decode_topology), and encodeChatMessage has a layout of its own
+(decode_chat). GOLDEN_FRAMES pins the bytes the Swift encoder produces;
+`mesh_codec.py --check` verifies the codec against them.
+
+A capture file is a sequence of records, each a u32 LE length followed by
+one frame. Captures are memory-mapped and frames hold memoryview slices of
+the map, so nothing is copied until a field is read. Headers are parsed a
+batch of records at a time, vectorized with NumPy when it is installed.
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PROTOCOL_VERSION = 1
+# BinaryMessageType raw values
+MESSAGE_TYPES = {
+    1: 'signal',
+    2: 'emergency',
+    3: 'chat',
+    4: 'system',
+    5: 'keyExchange',
+    6: 'game',
+    7: 'topology',
+}
+TYPE_CODES = {name: code for code, name in MESSAGE_TYPES.items()}
+# meshTypeToBinary sends keyExchangeResponse as keyExchange
+TYPE_CODES['keyExchangeResponse'] = TYPE_CODES['keyExchange']
+# version + type + id length + data length + timestamp
+MIN_FRAME_SIZE = 11
+BATCH_RECORDS = 1 << 16
+
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_TOPOLOGY_HEADER = struct.Struct('<BBII')
+
+# (description, encoder, arguments, frame bytes as written by the Swift encoder)
+GOLDEN_FRAMES = [
+    ("signal frame", 'frame', ('signal', "msg-1", b'\x01\x02', 1700000000),
+     "01 01 05 6d73672d31 02000000 00f15365 0102"),
+    ("emergency frame, UTF-8 id, no data", 'frame', ('emergency', "緊急", b'', 1),
+     "01 02 06 e7b78ae680a5 00000000 01000000"),
+    ("keyExchangeResponse is sent as keyExchange", 'frame', ('keyExchangeResponse', "k", b'\xff', 0x01020304),
+     "01 05 01 6b 01000000 04030201 ff"),
+    ("topology payload", 'topology', ({"A": ["B"]}, 1700000000),
+     "01 07 01000000 00f15365 01 41 01 01 42"),
+    ("chat payload", 'chat', (1700000000, "iPad", "c1", "hi"),
+     "01 03 00f15365 04 69506164 02 6331 0200 6869"),
+]
+
+
+class CodecError(ValueError):
+    pass
+
+
+class Frame:
+    """One decoded mesh frame; id and data are views into the capture until read."""
+
+    __slots__ = ('type', 'timestamp', 'raw_id', 'data', 'offset')
+
+    def __init__(self, type, timestamp, raw_id, data, offset=None):
+        self.type = type
+        self.timestamp = timestamp
+        self.raw_id = raw_id
+        self.data = data
+        self.offset = offset
+
+    @property
+    def type_name(self):
+        return MESSAGE_TYPES[self.type]
+
+    @property
+    def id(self):
+        return _utf8(self.raw_id)
+
+    def as_dict(self):
+        return {'offset': self.offset, 'type': self.type_name, 'id': self.id,
+                'timestamp': self.timestamp, 'data': bytes(self.data).hex()}
+
+
+def _utf8(raw):
+    try:
+        return bytes(raw).decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise CodecError(f"string is not valid UTF-8: {e}") from None
+
+
+def _short_string(text, what):
+    raw = text.encode('utf-8')
+    if len(raw) > 255:
+        raise CodecError(f"{what} is {len(raw)} bytes; the format allows 255")
+    return bytes((len(raw),)) + raw
+
+
+# -- single frames --------------------------------------------------------
+
+def encode_frame(message_type, message_id, data, timestamp):
+    """BinaryMessageEncoder.encode; message_type is a MeshMessageType name."""
+    if message_type not in TYPE_CODES:
+        raise CodecError(f"unknown message type {message_type!r}")
+    return b''.join((bytes((PROTOCOL_VERSION, TYPE_CODES[message_type])), _short_string(message_id, "message id"),
+                     _U32.pack(len(data)), _U32.pack(timestamp), bytes(data)))
+
+
+def decode_frame(buffer, offset=None):
+    """BinaryMessageDecoder.decode for one frame in any bytes-like buffer."""
+    view = memoryview(buffer)
+    if len(view) < MIN_FRAME_SIZE - 1:
+        raise CodecError("frame shorter than the minimum header")
+    if view[0] != PROTOCOL_VERSION:
+        raise CodecError(f"unsupported protocol version {view[0]}")
+    if view[1] not in MESSAGE_TYPES:
+        raise CodecError(f"invalid message type {view[1]}")
+    id_end = 3 + view[2]
+    if id_end + 8 > len(view):
+        raise CodecError("frame truncated in its header")
+    data_length, timestamp = struct.unpack_from('<II', view, id_end)
+    if id_end + 8 + data_length > len(view):
+        raise CodecError(f"data length {data_length} runs past the end of the frame")
+    return Frame(view[1], timestamp, view[3:id_end], view[id_end + 8:id_end + 8 + data_length], offset)
+
+
+def encode_topology(topology, timestamp):
+    """BinaryMessageEncoder.encodeTopology; at most 255 connections per node are sent."""
+    parts = [_TOPOLOGY_HEADER.pack(PROTOCOL_VERSION, TYPE_CODES['topology'], len(topology), timestamp)]
+    for node, connections in topology.items():
+        connections = list(connections)[:255]
+        parts.append(_short_string(node, "node id"))
+        parts.append(bytes((len(connections),)))
+        parts.extend(_short_string(connection, "connection id") for connection in connections)
+    return b''.join(parts)
+
+
+def decode_topology(buffer):
+    """BinaryMessageDecoder.decodeTopology: {node id: set of connected node ids}."""
+    view = memoryview(buffer)
+    if len(view) < _TOPOLOGY_HEADER.size:
+        raise CodecError("topology payload shorter than its header")
+    version, message_type, node_count, _ = _TOPOLOGY_HEADER.unpack_from(view)
+    if version != PROTOCOL_VERSION:
+        raise CodecError(f"unsupported protocol version {version}")
+    if message_type != TYPE_CODES['topology']:
+        raise CodecError(f"not a topology payload (type {message_type})")
+    offset = _TOPOLOGY_HEADER.size
+    topology = {}
+
+    def string():
+        nonlocal offset
+        if offset >= len(view) or offset + 1 + view[offset] > len(view):
+            raise CodecError("topology payload truncated")
+        end = offset + 1 + view[offset]
+        text = _utf8(view[offset + 1:end])
+        offset = end
+        return text
+
+    for _ in range(node_count):
+        node = string()
+        if offset >= len(view):
+            raise CodecError("topology payload truncated")
+        count = view[offset]
+        offset += 1
+        topology[node] = {string() for _ in range(count)}
+    return topology
+
+
+def encode_chat(timestamp, device_name, message_id, message):
+    """BinaryMessageEncoder.encodeChatMessage."""
+    text = message.encode('utf-8')
+    return b''.join((bytes((PROTOCOL_VERSION, TYPE_CODES['chat'])), _U32.pack(timestamp),
+                     _short_string(device_name, "device name"), _short_string(message_id, "message id"),
+                     _U16.pack(len(text)), text))
+
+
+def decode_chat(buffer):
+    """BinaryMessageDecoder.decodeChatMessage: (timestamp, device name, message id, message)."""
+    view = memoryview(buffer)
+    if len(view) < 8 or view[0] != PROTOCOL_VERSION or view[1] != TYPE_CODES['chat']:
+        raise CodecError("not a chat payload")
+    timestamp = _U32.unpack_from(view, 2)[0]
+    offset = 6
+    fields = []
+    for _ in range(2):
+        if offset >= len(view) or offset + 1 + view[offset] > len(view):
+            raise CodecError("chat payload truncated")
+        end = offset + 1 + view[offset]
+        fields.append(_utf8(view[offset + 1:end]))
+        offset = end
+    if offset + 2 > len(view):
+        raise CodecError("chat payload truncated")
+    length = _U16.unpack_from(view, offset)[0]
+    if offset + 2 + length > len(view):
+        raise CodecError("chat message runs past the end of the payload")
+    return timestamp, fields[0], fields[1], _utf8(view[offset + 2:offset + 2 + length])
+
+
+# -- captures ---------------------------------------------------------------
+
+def write_capture(path, frames):
+    """Write encoded frames as a capture file; return how many were written."""
+    count = 0
+    with open(path, 'wb') as f:
+        for frame in frames:
+            f.write(_U32.pack(len(frame)))
+            f.write(frame)
+            count += 1
+    return count
+
+
+def record_batches(view, batch_records=BATCH_RECORDS):
+    """Yield (frame offsets, frame lengths) lists for up to batch_records records at a time.
+
+    Raises CodecError at a record whose length runs past the end of the capture.
+    """
+    unpack = _U32.unpack_from
+    end = len(view)
+    position = 0
+    while position < end:
+        offsets = []
+        lengths = []
+        while position < end and len(offsets) < batch_records:
+            if position + 4 > end:
+                raise CodecError(f"truncated record header at offset {position}")
+            length = unpack(view, position)[0]
+            if position + 4 + length > end:
+                raise CodecError(f"record at offset {position} is {length} bytes but the capture ends first")
+            offsets.append(position + 4)
+            lengths.append(length)
+            position += 4 + length
+        yield offsets, lengths
+
+
+def parse_headers(view, offsets, lengths):
+    """Header fields of a batch of frames: (type, id length, data length, timestamp, valid).
+
+    NumPy arrays when NumPy is installed, lists otherwise. A frame is valid
+    when BinaryMessageDecoder.decode would accept it.
+    """
+    if np is not None and offsets:
+        return _parse_headers_numpy(view, offsets, lengths)
+    types, id_lengths, data_lengths, timestamps, valid = [], [], [], [], []
+    for offset, length in zip(offsets, lengths):
+        ok = length >= MIN_FRAME_SIZE and view[offset] == PROTOCOL_VERSION and view[offset + 1] in MESSAGE_TYPES
+        id_length = view[offset + 2] if length >= 3 else 0
+        ok = ok and MIN_FRAME_SIZE + id_length <= length
+        data_length, timestamp = struct.unpack_from('<II', view, offset + 3 + id_length) if ok else (0, 0)
+        types.append(view[offset + 1] if length >= 2 else 0)
+        id_lengths.append(id_length)
+        data_lengths.append(data_length)
+        timestamps.append(timestamp)
+        valid.append(ok and MIN_FRAME_SIZE + id_length + data_length <= length)
+    return types, id_lengths, data_lengths, timestamps, valid
+
+
+def _parse_headers_numpy(view, offsets, lengths):
+    buffer = np.frombuffer(view, dtype=np.uint8)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if buffer.size < 8:
+        # No frame fits, and the offset-0 fallback reads below would run past the end
+        empty = np.zeros(len(offsets), dtype=np.int64)
+        return (empty.astype(np.uint8), empty, empty, empty.astype(np.uint32),
+                np.zeros(len(offsets), dtype=bool))
+    # Frames too short for a header read from offset 0 instead, then count as invalid
+    valid = lengths >= MIN_FRAME_SIZE
+    safe = np.where(valid, offsets, 0)
+    types = buffer[safe + 1]
+    id_lengths = buffer[safe + 2].astype(np.int64)
+    valid &= (buffer[safe] == PROTOCOL_VERSION) & (types >= 1) & (types <= len(MESSAGE_TYPES))
+    valid &= MIN_FRAME_SIZE + id_lengths <= lengths
+    fields = np.where(valid, safe + 3 + id_lengths, 0)
+
+    def u32(at):
+        return (buffer[at].astype(np.uint32) | buffer[at + 1].astype(np.uint32) << 8
+                | buffer[at + 2].astype(np.uint32) << 16 | buffer[at + 3].astype(np.uint32) << 24)
+
+    data_lengths = np.where(valid, u32(fields), 0).astype(np.int64)
+    timestamps = np.where(valid, u32(fields + 4), 0)
+    valid &= MIN_FRAME_SIZE + id_lengths + data_lengths <= lengths
+    return types, id_lengths, data_lengths, timestamps, valid
+
+
+def _open_capture(path):
+    with open(path, 'rb') as f:
+        if not f.seek(0, 2):
+            return memoryview(b'')
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def decode_capture(path, types=None, strict=False, batch_records=BATCH_RECORDS):
+    """Yield the Frames of a capture in order, only those of types (names) if given.
+
+    Invalid frames are skipped, or raise CodecError with strict.
+    """
+    view = _open_capture(path)
+    wanted = None if types is None else {TYPE_CODES[name] for name in types}
+    for offsets, lengths in record_batches(view, batch_records):
+        frame_types, id_lengths, data_lengths, timestamps, valid = parse_headers(view, offsets, lengths)
+        if np is not None:
+            selected = valid if wanted is None else valid & np.isin(frame_types, list(wanted))
+            if strict and not valid.all():
+                bad = int(np.argmin(valid))
+                decode_frame(view[offsets[bad]:offsets[bad] + lengths[bad]], offsets[bad])
+            indexes = np.flatnonzero(selected).tolist()
+            frame_types, id_lengths, data_lengths, timestamps = (
+                frame_types.tolist(), id_lengths.tolist(), data_lengths.tolist(), timestamps.tolist())
+        else:
+            indexes = []
+            for index, ok in enumerate(valid):
+                if not ok:
+                    if strict:
+                        decode_frame(view[offsets[index]:offsets[index] + lengths[index]], offsets[index])
+                elif wanted is None or frame_types[index] in wanted:
+                    indexes.append(index)
+        for index in indexes:
+            start = offsets[index] + 3
+            data_start = start + id_lengths[index] + 8
+            yield Frame(frame_types[index], timestamps[index], view[start:start + id_lengths[index]],
+                        view[data_start:data_start + data_lengths[index]], offsets[index] - 4)
+
+
+class CaptureStats:
+    def __init__(self):
+        self.frames = 0
+        self.invalid = 0
+        self.by_type = {name: [0, 0] for name in MESSAGE_TYPES.values()}  # name -> [frames, data bytes]
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+
+def capture_stats(path, batch_records=BATCH_RECORDS):
+    """Frame counts and payload bytes per type without building any Frame."""
+    view = _open_capture(path)
+    stats = CaptureStats()
+    for offsets, lengths in record_batches(view, batch_records):
+        frame_types, _, data_lengths, timestamps, valid = parse_headers(view, offsets, lengths)
+        stats.frames += len(offsets)
+        if np is not None:
+            stats.invalid += int(len(valid) - valid.sum())
+            counts = np.bincount(frame_types[valid], minlength=len(MESSAGE_TYPES) + 1)
+            sizes = np.bincount(frame_types[valid], weights=data_lengths[valid], minlength=len(MESSAGE_TYPES) + 1)
+            for code, name in MESSAGE_TYPES.items():
+                stats.by_type[name][0] += int(counts[code])
+                stats.by_type[name][1] += int(sizes[code])
+            valid_timestamps = timestamps[valid]
+            batch_range = (int(valid_timestamps.min()), int(valid_timestamps.max())) if valid_timestamps.size else None
+        else:
+            batch_timestamps = []
+            for frame_type, data_length, timestamp, ok in zip(frame_types, data_lengths, timestamps, valid):
+                if not ok:
+                    stats.invalid += 1
+                    continue
+                entry = stats.by_type[MESSAGE_TYPES[frame_type]]
+                entry[0] += 1
+                entry[1] += data_length
+                batch_timestamps.append(timestamp)
+            batch_range = (min(batch_timestamps), max(batch_timestamps)) if batch_timestamps else None
+        if batch_range:
+            first, last = batch_range
+            stats.first_timestamp = first if stats.first_timestamp is None else min(stats.first_timestamp, first)
+            stats.last_timestamp = last if stats.last_timestamp is None else max(stats.last_timestamp, last)
+    return stats
+
+
+# -- golden frames ----------------------------------------------------------
+
+def check_golden():
+    """Problems encoding or decoding GOLDEN_FRAMES; empty when byte-compatible."""
+    problems = []
+    for description, kind, arguments, expected in GOLDEN_FRAMES:
+        expected = bytes.fromhex(expected)
+        if kind == 'frame':
+            encoded = encode_frame(*arguments)
+            frame = decode_frame(expected)
+            message_type, message_id, data, timestamp = arguments
+            decoded_ok = (frame.type == TYPE_CODES[message_type] and frame.id == message_id
+                          and bytes(frame.data) == data and frame.timestamp == timestamp)
+        elif kind == 'topology':
+            topology, timestamp = arguments
+            encoded = encode_topology(topology, timestamp)
+            decoded_ok = decode_topology(expected) == {node: set(peers) for node, peers in topology.items()}
+        else:
+            encoded = encode_chat(*arguments)
+            decoded_ok = decode_chat(expected) == arguments
+        if encoded != expected:
+            problems.append(f"{description}: encoded {encoded.hex()}, Swift writes {expected.hex()}")
+        if not decoded_ok:
+            problems.append(f"{description}: decoding {expected.hex()} does not give {arguments}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode SignalAir mesh frames from a capture file")
+    parser.add_argument('capture', nargs='?', help="capture file: u32 LE length + frame, repeated")
+    parser.add_argument('--type', action='append', choices=sorted(TYPE_CODES), dest='types',
+                        help="only these message types (may be repeated)")
+    parser.add_argument('--dump', action='store_true', help="print the frames as JSON lines instead of totals")
+    parser.add_argument('--strict', action='store_true', help="stop at the first invalid frame")
+    parser.add_argument('--check', action='store_true', help="verify the codec against GOLDEN_FRAMES")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = check_golden()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return 1
+        print(f"✅ {len(GOLDEN_FRAMES)} golden frames match the Swift encoder")
+        return 0
+    if not args.capture:
+        parser.error("a capture file is required unless --check is given")
+
+    start = time.perf_counter()
+    try:
+        if args.dump or args.strict:
+            count = 0
+            for frame in decode_capture(args.capture, args.types, args.strict):
+                if args.dump:
+                    print(json.dumps(frame.as_dict(), ensure_ascii=False))
+                count += 1
+            print(f"✅ {count} frames in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+            return 0
+        stats = capture_stats(args.capture)
+    except (OSError, CodecError) as e:
+        print(f"❌ 無法讀取 {args.capture}: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    for name, (count, size) in stats.by_type.items():
+        if count and (not args.types or name in args.types):
+            print(f"📡 {name}: {count} frames, {size} data bytes")
+    span = (f", timestamps {stats.first_timestamp}..{stats.last_timestamp}"
+            if stats.first_timestamp is not None else "")
+    print(f"{'⚠️' if stats.invalid else '✅'} {stats.frames} frames, {stats.invalid} invalid{span} "
+          f"in {elapsed:.2f}s ({stats.frames / elapsed if elapsed else float('inf'):.0f} frames/sec, "
+          f"{'NumPy' if np is not None else 'pure Python'} headers)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,651 @@
+#!/usr/bin/env python3
+"""Discrete-event simulator of the SignalAir mesh on a virtual asyncio clock.
+
+Thousands of virtual peers follow the rules of Core/Network/MeshManager.swift:
+
+- A broadcast goes straight to the sender's peers. Receivers relay it as
+  forwardMessage does: with a TTL of 10 (20 for emergencies), never to a
+  node already on the route path, and never back to the peer it came from.
+- Relays wait in a MessageQueue: emergencies first, then by priority. The
+  queue holds 500 entries (125 emergencies) and sends one message every
+  200ms.
+- Each reception passes SimpleFloodProtection (60 per neighbour per minute,
+  emergencies exempt) and the processedMessages duplicate check (1000 ids,
+  pruned to 500 when full).
+- When a peer connects or disconnects, the node sends its whole topology to
+  its direct peers, and they merge it into theirs. Heartbeats go out every
+  120s.
+
+Peers are placed at random in a square area and link to everyone within
+the radius that gives the requested mean degree. Each link draws its own
+latency and loss. The loop's clock jumps straight to the next scheduled
+event instead of waiting, so a 10k-node scenario runs in seconds.
+
+In the app, handleIncomingData does not call the relay path
+(handleMeshMessage) yet. ExtendedMeshMessage.forwarded also gives every hop
+a new message id. The simulator relays under the frame's own id, which is
+what the wire format carries; --fresh-ids reproduces the per-hop ids.
+"""
+
+import argparse
+import asyncio
+import collections
+import heapq
+import itertools
+import json
+import math
+import random
+import selectors
+import sys
+import time
+
+import mesh_codec
+
+QUEUE_INTERVAL = 0.2
+QUEUE_LIMIT = 500
+EMERGENCY_QUEUE_LIMIT = QUEUE_LIMIT // 4
+HEARTBEAT_INTERVAL = 120.0
+PROCESSED_LIMIT = 1000
+FLOOD_LIMIT = 60
+FLOOD_WINDOW = 60.0
+ID_BYTES = 36  # UUID().uuidString
+# kind -> (queue priority, initial TTL, max age in seconds, payload bytes)
+MESSAGE_KINDS = {
+    'emergency': (100, 20, 600.0, 128),
+    'signal': (10, 10, 300.0, 128),
+    'system': (8, 10, 300.0, 64),
+    'heartbeat': (7, 10, 300.0, 16),
+    'routingUpdate': (6, 10, 300.0, 0),
+    'chat': (5, 10, 300.0, 256),
+    'game': (4, 10, 300.0, 64),
+}
+EMERGENCY_PRIORITY = MESSAGE_KINDS['emergency'][0]
+DEFAULT_MIX = "signal=6,chat=3,emergency=1"
+
+
+class _VirtualSelector(selectors.SelectSelector):
+    """Never blocks: waiting for a timeout runs the calendar up to it and moves the clock there."""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self.calendar = []  # (when, sequence, callback, args)
+        self.sequence = itertools.count()
+
+    def select(self, timeout=None):
+        calendar = self.calendar
+        if timeout is None:
+            if not calendar:
+                raise RuntimeError("simulation stalled: nothing is scheduled")
+            limit = calendar[0][0]
+        else:
+            limit = self.now + timeout
+        pop = heapq.heappop
+        while calendar and calendar[0][0] <= limit:
+            self.now, _, callback, args = pop(calendar)
+            callback(*args)
+        self.now = max(self.now, limit)
+        return []
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """An asyncio loop on virtual time; sleeps and call_at cost no wall time.
+
+    schedule() is a cheaper call_at for the simulation's own events: plain
+    callbacks on a heap of tuples, run in time order between the loop's
+    timers, that cannot be cancelled and must not touch the loop.
+    """
+
+    def __init__(self):
+        super().__init__(_VirtualSelector())
+
+    def time(self):
+        return self._selector.now
+
+    def schedule(self, when, callback, *args):
+        heapq.heappush(self._selector.calendar, (when, next(self._selector.sequence), callback, args))
+
+
+class Message:
+    __slots__ = ('id', 'origin', 'kind', 'priority', 'source', 'ttl', 'route', 'created', 'max_age', 'size', 'payload')
+
+    def __init__(self, id, origin, kind, source, ttl, route, created, size, payload=None):
+        self.id = id
+        self.origin = origin  # index into Simulation.broadcasts, None for control traffic
+        self.kind = kind
+        self.priority, _, self.max_age, _ = MESSAGE_KINDS[kind]
+        self.source = source
+        self.ttl = ttl
+        self.route = route
+        self.created = created
+        self.size = size
+        self.payload = payload
+
+
+class Node:
+    __slots__ = ('id', 'alive', 'peers', 'processed', 'flood', 'emergency_queue', 'queue', 'queued', 'tick_pending',
+                 'phase', 'view')
+
+    def __init__(self, id, phase):
+        self.id = id
+        self.alive = False
+        self.peers = {}        # peer -> (latency, loss, edge bit)
+        self.processed = {}    # message ids in insertion order
+        self.flood = {}        # peer -> deque of reception times
+        self.emergency_queue = collections.deque()
+        self.queue = {}        # priority -> deque
+        self.queued = 0
+        self.tick_pending = False
+        self.phase = phase     # offset of this node's 200ms queue timer
+        self.view = 0          # known topology, as a bitmask over Simulation.edges
+
+
+class Broadcast:
+    __slots__ = ('kind', 'source', 'created', 'reached', 'latencies', 'deliveries')
+
+    def __init__(self, kind, source, created, node_count):
+        self.kind = kind
+        self.source = source
+        self.created = created
+        self.reached = bytearray(node_count)
+        self.latencies = []
+        self.deliveries = 0
+
+
+class Simulation:
+    def __init__(self, nodes=1000, degree=10.0, area=1000.0, max_peers=0, latency=0.05, loss=0.02,
+                 bandwidth=2e6, join=10.0, duration=60.0, settle=30.0, rate=1.0, mix=DEFAULT_MIX, churn=0,
+                 fresh_ids=False, sample=10.0, max_transmissions=5_000_000, seed=1):
+        self.rng = random.Random(seed)
+        self.random = self.rng.random
+        self.node_count = nodes
+        self.max_peers = max_peers
+        self.latency = latency
+        self.loss = loss
+        self.bandwidth = bandwidth
+        self.join = join
+        self.duration = duration
+        self.settle = settle
+        self.rate = rate
+        self.mix = parse_mix(mix)
+        self.churn = churn
+        self.fresh_ids = fresh_ids
+        self.sample = sample
+        self.max_transmissions = max_transmissions
+        self.loop = None
+        self.nodes = [Node(i, self.rng.uniform(0, QUEUE_INTERVAL)) for i in range(nodes)]
+        self.edges, self.node_edges = self.place(nodes, degree, area)
+        self.live_edges = 0
+        self.ids = itertools.count()
+        self.broadcasts = []
+        self.stats = collections.Counter()
+        self.samples = []          # (time, coverage, mean stale links)
+        self.last_topology_event = 0.0
+        self.last_view_change = 0.0
+        self.converged_at = None
+        self.ended_at = 0.0
+
+    def place(self, count, degree, area):
+        """Candidate links of a random geometric graph with the given mean degree."""
+        radius = math.sqrt(degree * area * area / (math.pi * max(count - 1, 1)))
+        points = [(self.rng.uniform(0, area), self.rng.uniform(0, area)) for _ in range(count)]
+        cells = collections.defaultdict(list)
+        for i, (x, y) in enumerate(points):
+            cells[int(x // radius), int(y // radius)].append(i)
+        edges = []
+        for (cx, cy), members in cells.items():
+            for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+                others = cells.get((cx + dx, cy + dy))
+                if not others:
+                    continue
+                for i in members:
+                    xi, yi = points[i]
+                    for j in others:
+                        if (dx, dy) == (0, 0) and j <= i:
+                            continue
+                        xj, yj = points[j]
+                        if (xi - xj) ** 2 + (yi - yj) ** 2 <= radius * radius:
+                            edges.append((i, j))
+        node_edges = [[] for _ in range(count)]
+        for index, (i, j) in enumerate(edges):
+            node_edges[i].append(index)
+            node_edges[j].append(index)
+        return edges, node_edges
+
+    # -- links and topology exchange ----------------------------------------
+
+    def connect(self, a, b, bit):
+        latency = self.latency * self.rng.uniform(0.5, 1.5)
+        loss = min(self.rng.uniform(0, 2 * self.loss), 1.0)
+        a.peers[b.id] = b.peers[a.id] = (latency, loss, bit)
+        self.live_edges |= bit
+        for node in (a, b):
+            # handlePeerConnected: add the link, then send the topology to every peer
+            node.view |= bit
+            self.send_topology(node)
+
+    def join_node(self, node):
+        node.alive = True
+        self.last_topology_event = self.time()
+        for index in self.node_edges[node.id]:
+            i, j = self.edges[index]
+            other = self.nodes[j if i == node.id else i]
+            if not other.alive:
+                continue
+            if self.max_peers and (len(node.peers) >= self.max_peers or len(other.peers) >= self.max_peers):
+                continue
+            self.connect(node, other, 1 << index)
+        self.schedule(self.time() + self.rng.uniform(0, HEARTBEAT_INTERVAL), self.heartbeat, node)
+
+    def leave_node(self, node):
+        node.alive = False
+        self.stats['left'] += 1
+        self.last_topology_event = self.time()
+        node_mask = sum(1 << index for index in self.node_edges[node.id])
+        peers = list(node.peers)
+        node.peers.clear()
+        node.emergency_queue.clear()
+        node.queue.clear()
+        node.queued = 0
+        for peer_id in peers:
+            peer = self.nodes[peer_id]
+            self.live_edges &= ~peer.peers.pop(node.id)[2]
+            # handlePeerDisconnected: topology.removePeer, then send the topology
+            peer.view &= ~node_mask
+            peer.flood.pop(node.id, None)
+            self.send_topology(peer)
+
+    def send_topology(self, node):
+        edges = node.view.bit_count()
+        # encodeTopology's size, counting one node per known link plus one
+        size = 10 + (edges + 1) * (2 + ID_BYTES) + 2 * edges * (1 + ID_BYTES)
+        message = self.new_message('routingUpdate', node.id, size, payload=node.view)
+        for peer_id in node.peers:
+            self.transmit(node, peer_id, message)
+
+    def heartbeat(self, node):
+        if not node.alive:
+            return
+        if node.peers:
+            message = self.new_message('heartbeat', node.id, MESSAGE_KINDS['heartbeat'][3])
+            for peer_id in node.peers:
+                self.transmit(node, peer_id, message)
+        self.schedule(self.time() + HEARTBEAT_INTERVAL, self.heartbeat, node)
+
+    # -- messages -------------------------------------------------------------
+
+    def new_message(self, kind, source, payload_size, origin=None, payload=None):
+        _, ttl, _, _ = MESSAGE_KINDS[kind]
+        size = mesh_codec.MIN_FRAME_SIZE + ID_BYTES + payload_size
+        return Message(next(self.ids), origin, kind, source, ttl, (source,), self.time(), size, payload)
+
+    def originate(self, kind):
+        alive = [node for node in self.nodes if node.alive and node.peers]
+        if not alive:
+            return
+        node = self.rng.choice(alive)
+        broadcast = Broadcast(kind, node.id, self.time(), self.node_count)
+        self.broadcasts.append(broadcast)
+        message = self.new_message(kind, node.id, MESSAGE_KINDS[kind][3], origin=len(self.broadcasts) - 1)
+        self.mark_processed(node, message.id)
+        # broadcastMessage sends to every connected peer directly, bypassing the queue
+        for peer_id in node.peers:
+            self.transmit(node, peer_id, message)
+
+    def transmit(self, sender, peer_id, message):
+        latency, loss, _ = sender.peers[peer_id]
+        stats = self.stats
+        stats['transmissions'] += 1
+        stats['bytes'] += message.size
+        if stats['transmissions'] > self.max_transmissions:
+            return
+        if loss and self.random() < loss:
+            stats['lost'] += 1
+            return
+        self.schedule(self.time() + latency + message.size * 8 / self.bandwidth,
+                      self.receive, self.nodes[peer_id], sender.id, message)
+
+    def mark_processed(self, node, message_id):
+        processed = node.processed
+        processed[message_id] = None
+        if len(processed) > PROCESSED_LIMIT:
+            for key in list(itertools.islice(processed, len(processed) - PROCESSED_LIMIT // 2)):
+                del processed[key]
+
+    def receive(self, node, sender_id, message):
+        if sender_id not in node.peers:
+            self.stats['dropped_link_down'] += 1
+            return
+        stats = self.stats
+        stats['receptions'] += 1
+        now = self.time()
+        if message.priority != EMERGENCY_PRIORITY:
+            history = node.flood.get(sender_id)
+            if history is None:
+                history = node.flood[sender_id] = collections.deque()
+            while history and history[0] <= now - FLOOD_WINDOW:
+                history.popleft()
+            if len(history) >= FLOOD_LIMIT:
+                stats['flood_blocked'] += 1
+                return
+            history.append(now)
+        if message.id in node.processed:
+            stats['duplicates'] += 1
+            return
+        self.mark_processed(node, message.id)
+
+        if message.kind == 'routingUpdate':
+            view = node.view | message.payload
+            if view != node.view:
+                node.view = view
+                self.last_view_change = now
+            return
+        if message.kind == 'heartbeat':
+            return
+        if message.source == node.id:
+            return
+        self.deliver(node, message, now)
+        self.forward(node, sender_id, message, now)
+
+    def deliver(self, node, message, now):
+        broadcast = self.broadcasts[message.origin]
+        broadcast.deliveries += 1
+        self.stats['deliveries'] += 1
+        if broadcast.reached[node.id]:
+            self.stats['duplicate_deliveries'] += 1
+        else:
+            broadcast.reached[node.id] = 1
+            broadcast.latencies.append(now - broadcast.created)
+
+    def expired(self, message, now):
+        return message.ttl <= 0 or now - message.created > message.max_age
+
+    def forward(self, node, sender_id, message, now):
+        if self.expired(message, now):
+            self.stats['expired'] += 1
+            return
+        if node.id in message.route:
+            self.stats['loops'] += 1
+            return
+        route = message.route
+        if not any(peer != sender_id and peer not in route for peer in node.peers):
+            return
+        relayed = Message(next(self.ids) if self.fresh_ids else message.id, message.origin, message.kind,
+                          message.source, message.ttl - 1, route + (node.id,), message.created, message.size)
+        self.enqueue(node, relayed)
+
+    def enqueue(self, node, message):
+        self.stats['queued'] += 1
+        if message.priority == EMERGENCY_PRIORITY:
+            node.emergency_queue.append(message)
+            node.queued += 1
+            if len(node.emergency_queue) > EMERGENCY_QUEUE_LIMIT:
+                node.emergency_queue.popleft()
+                node.queued -= 1
+                self.stats['queue_dropped'] += 1
+        else:
+            queue = node.queue.get(message.priority)
+            if queue is None:
+                queue = node.queue[message.priority] = collections.deque()
+            queue.append(message)
+            node.queued += 1
+            if node.queued - len(node.emergency_queue) > QUEUE_LIMIT:
+                # The normal queue is kept sorted by priority and loses its last entry
+                node.queue[min(p for p, q in node.queue.items() if q)].pop()
+                node.queued -= 1
+                self.stats['queue_dropped'] += 1
+        self.schedule_tick(node)
+
+    def schedule_tick(self, node):
+        if node.tick_pending:
+            return
+        node.tick_pending = True
+        now = self.time()
+        ticks = math.floor((now - node.phase) / QUEUE_INTERVAL) + 1
+        self.schedule(node.phase + ticks * QUEUE_INTERVAL, self.tick, node)
+
+    def dequeue(self, node, now):
+        # MessageQueue.dequeue drops expired entries before taking the first
+        while node.queued:
+            if node.emergency_queue:
+                message = node.emergency_queue.popleft()
+            else:
+                message = node.queue[max(p for p, q in node.queue.items() if q)].popleft()
+            node.queued -= 1
+            if not self.expired(message, now):
+                return message
+            self.stats['expired'] += 1
+        return None
+
+    def tick(self, node):
+        node.tick_pending = False
+        if not node.alive:
+            return
+        message = self.dequeue(node, self.time())
+        if message is not None:
+            self.stats['relays'] += 1
+            for peer_id in node.peers:
+                if peer_id not in message.route:
+                    self.transmit(node, peer_id, message)
+        if node.queued:
+            self.schedule_tick(node)
+
+    # -- scenario ---------------------------------------------------------------
+
+    def partitions(self):
+        """Live node id -> bitmask of the live links in its connected component."""
+        parent = {node.id: node.id for node in self.nodes if node.alive}
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for node_id in parent:
+            for peer_id in self.nodes[node_id].peers:
+                a, b = find(node_id), find(peer_id)
+                if a != b:
+                    parent[a] = b
+        links = collections.defaultdict(int)
+        for node_id in parent:
+            root = find(node_id)
+            for _, _, bit in self.nodes[node_id].peers.values():
+                links[root] |= bit
+        return {node_id: links[find(node_id)] for node_id in parent}
+
+    def coverage(self):
+        """(share of its partition's links the average node knows, mean links it lists that are
+        down or out of reach, whether every view is exact)."""
+        targets = self.partitions()
+        sizes = {}
+        known = total = stale = 0
+        converged = True
+        for node_id, target in targets.items():
+            view = self.nodes[node_id].view
+            converged = converged and view == target
+            if target not in sizes:
+                sizes[target] = target.bit_count()
+            total += sizes[target]
+            if not self.stats['left']:
+                # Links only go down when a node leaves; until then no view holds a link outside its partition
+                known += view.bit_count()
+            else:
+                known += (view & target).bit_count()
+                stale += (view & ~target).bit_count()
+        return (known / total if total else 1.0), (stale / len(targets) if targets else 0.0), converged
+
+    async def sampler(self):
+        while True:
+            await asyncio.sleep(self.sample)
+            now = self.time()
+            coverage, stale, converged = self.coverage()
+            if converged and self.converged_at is None:
+                self.converged_at = now
+            elif not converged:
+                self.converged_at = None
+            self.samples.append((now, coverage, stale))
+
+    async def workload(self):
+        kinds, weights = zip(*self.mix.items())
+        end = self.join + self.duration
+        await asyncio.sleep(self.join)
+        while True:
+            await asyncio.sleep(self.rng.expovariate(self.rate))
+            if self.time() >= end:
+                return
+            self.originate(self.rng.choices(kinds, weights)[0])
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.time = self.loop.time
+        self.schedule = self.loop.schedule
+        for node in self.nodes:
+            self.schedule(self.rng.uniform(0, self.join), self.join_node, node)
+        for node in self.rng.sample(self.nodes, min(self.churn, self.node_count)):
+            self.schedule(self.join + self.rng.uniform(0, self.duration), self.leave_node, node)
+        tasks = [asyncio.ensure_future(self.workload()), asyncio.ensure_future(self.sampler())]
+        end = self.join + self.duration + self.settle
+        while self.time() < end and self.stats['transmissions'] <= self.max_transmissions:
+            await asyncio.sleep(min(1.0, end - self.time()))
+        self.stats['truncated'] = int(self.stats['transmissions'] > self.max_transmissions)
+        self.ended_at = self.time()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return self.report()
+
+    def report(self):
+        stats = self.stats
+        alive = sum(node.alive for node in self.nodes)
+        reach = [sum(b.reached) / max(alive - 1, 1) for b in self.broadcasts]
+        latencies = sorted(itertools.chain.from_iterable(b.latencies for b in self.broadcasts))
+        coverage, stale, _ = self.coverage()
+        # Broadcasts only run after the join phase
+        span = self.ended_at - self.join if self.ended_at > self.join else self.ended_at or 1.0
+        return {
+            'nodes': self.node_count,
+            'links': self.live_edges.bit_count(),
+            'candidate_links': len(self.edges),
+            'virtual_seconds': self.ended_at,
+            'broadcasts': len(self.broadcasts),
+            'throughput': {
+                'deliveries_per_second': stats['deliveries'] / span,
+                'transmissions_per_second': stats['transmissions'] / span,
+                'bytes_per_second': stats['bytes'] / span,
+            },
+            'duplicate_delivery_ratio': stats['duplicate_deliveries'] / stats['deliveries'] if stats['deliveries'] else 0.0,
+            'redundant_reception_ratio': stats['duplicates'] / stats['receptions'] if stats['receptions'] else 0.0,
+            'mean_reach': sum(reach) / len(reach) if reach else 0.0,
+            'delivery_latency': {
+                'p50': percentile(latencies, 0.5),
+                'p90': percentile(latencies, 0.9),
+                'max': latencies[-1] if latencies else None,
+            },
+            'topology': {
+                'coverage': coverage,
+                'stale_links_per_node': stale,
+                'last_change': self.last_view_change,
+                'convergence_time': (self.converged_at - self.last_topology_event
+                                     if self.converged_at is not None else None),
+                'samples': self.samples,
+            },
+            'counters': dict(stats),
+        }
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in MESSAGE_KINDS or kind in ('heartbeat', 'routingUpdate'):
+            raise ValueError(f"unknown broadcast kind {kind!r}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def simulate(**options):
+    """Run one scenario (keyword arguments as for Simulation) and return its report."""
+    loop = VirtualEventLoop()
+    try:
+        return loop.run_until_complete(Simulation(**options).run())
+    finally:
+        loop.close()
+
+
+def print_report(report, wall):
+    counters = report['counters']
+    throughput = report['throughput']
+    latency = report['delivery_latency']
+    topology = report['topology']
+    print(f"🕸️ {report['nodes']} nodes, {report['links']} links, {report['virtual_seconds']:.0f}s simulated "
+          f"in {wall:.1f}s ({counters.get('transmissions', 0) / wall:.0f} transmissions/sec)")
+    if counters.get('truncated'):
+        print("⚠️ Stopped early at --max-transmissions")
+    print(f"📡 {report['broadcasts']} broadcasts reached {report['mean_reach']:.1%} of nodes on average; "
+          f"latency p50 {fmt_seconds(latency['p50'])}, p90 {fmt_seconds(latency['p90'])}")
+    print(f"📈 {throughput['deliveries_per_second']:.1f} deliveries/s, "
+          f"{throughput['transmissions_per_second']:.0f} transmissions/s, "
+          f"{throughput['bytes_per_second'] / 1024:.1f} KiB/s")
+    print(f"🔁 Duplicate deliveries {report['duplicate_delivery_ratio']:.1%}, "
+          f"redundant receptions {report['redundant_reception_ratio']:.1%}")
+    print(f"🧱 Lost {counters.get('lost', 0)}, flood-blocked {counters.get('flood_blocked', 0)}, "
+          f"queue drops {counters.get('queue_dropped', 0)}, expired {counters.get('expired', 0)}")
+    converged = topology['convergence_time']
+    print(f"🗺️ Topology views cover {topology['coverage']:.1%} of the links in reach "
+          f"({topology['stale_links_per_node']:.1f} stale per node), last change at {topology['last_change']:.1f}s, "
+          + (f"converged {converged:.1f}s after the last join/leave" if converged is not None else "not converged"))
+
+
+def fmt_seconds(value):
+    return "-" if value is None else f"{value * 1000:.0f}ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the SignalAir mesh relay and topology exchange at scale")
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--degree', type=float, default=10.0, help="mean number of peers in radio range")
+    parser.add_argument('--max-peers', type=int, default=0, help="cap on connected peers per node (0: none)")
+    parser.add_argument('--area', type=float, default=1000.0, help="side of the square area in metres")
+    parser.add_argument('--latency', type=float, default=0.05, help="mean per-link latency in seconds")
+    parser.add_argument('--loss', type=float, default=0.02, help="mean per-link loss probability")
+    parser.add_argument('--bandwidth', type=float, default=2e6, help="link bandwidth in bits per second")
+    parser.add_argument('--join', type=float, default=10.0, help="seconds over which the nodes join")
+    parser.add_argument('--duration', type=float, default=60.0, help="seconds of broadcast traffic after joining")
+    parser.add_argument('--settle', type=float, default=30.0, help="seconds simulated after the traffic stops")
+    parser.add_argument('--rate', type=float, default=1.0, help="network-wide broadcasts per second")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="broadcast kinds and weights")
+    parser.add_argument('--churn', type=int, default=0, help="nodes that leave during the traffic")
+    parser.add_argument('--fresh-ids', action='store_true',
+                        help="give every relayed copy a new id, as ExtendedMeshMessage.forwarded does")
+    parser.add_argument('--sample', type=float, default=10.0, help="seconds between topology convergence samples")
+    parser.add_argument('--max-transmissions', type=int, default=5_000_000,
+                        help="stop a runaway scenario after this many transmissions")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='FILE', help="also write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    options = {key: value for key, value in vars(args).items() if key != 'json'}
+    start = time.perf_counter()
+    try:
+        report = simulate(**options)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print_report(report, time.perf_counter() - start)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"📊 Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Partition the app's Swift sources into framework targets.
+
+SHARDS lists the frameworks from the bottom layer up, each with the source
+directories it starts from. A framework may only depend on frameworks below
+it, so a file that needs something from a higher layer (or from the app) is
+moved up to that layer until every file fits; what is left in a framework
+compiles on its own. Another module only sees public and open
+declarations, so a file whose internal types or globals are used from a
+different target stays in the app, taking everything that needs it along;
+so does a non-public extension of a type the sources do not declare, whose
+members are used without naming the file. A file used from another target
+that does not import its framework is moved up into the user's target.
+The resulting framework graph is checked for cycles before anything is
+generated.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import swift_index
+
+DEFAULT_ROOT = "SignalAir-iOS/SignalAir"
+# Which framework got which files last time, kept inside the .xcodeproj
+STATE_NAME = ".module-shards.json"
+# (framework name, source prefixes relative to the source root), lowest layer first
+SHARDS = (
+    ('SignalAirProtocol', ('Core/Protocol/', 'Shared/Models/')),
+    ('SignalAirNetwork', ('Core/Network/',)),
+    ('SignalAirSecurity', ('Core/Security/', 'Security/')),
+    ('SignalAirFeatures', ('Features/',)),
+)
+APP = None
+
+# A tree that shards: {path: source}, and the frameworks it must produce
+FIXTURE = {
+    'Core/Protocol/Packet.swift': "public struct Packet { public init() {} }\n",
+    'Core/Protocol/Header.swift': "struct Header {}\n",
+    'Core/Network/Link.swift': ("import SignalAirProtocol\n"
+                                "public final class Link { public let packet = Packet(); public init() {} }\n"),
+    'Core/Network/Retry.swift': "struct Retry { let header = Header() }\n",
+    'Core/Network/Names.swift': "extension Notification.Name { static let meshChanged = Self(\"mesh\") }\n",
+    'Core/Security/Shield.swift': "public struct Shield { public init() {} }\n",
+    'App/SignalAirApp.swift': ("import SwiftUI\nimport SignalAirNetwork\nimport SignalAirProtocol\n"
+                               "@main struct SignalAirApp: App { let link = Link(); let packet = Packet(); "
+                               "let shield = Shield() }\n"),
+}
+FIXTURE_MODULES = {
+    'SignalAirProtocol': ['Core/Protocol/Packet.swift'],
+    'SignalAirNetwork': ['Core/Network/Link.swift'],
+}
+
+
+class ShardError(ValueError):
+    pass
+
+
+class ShardPlan:
+    def __init__(self, modules, app, moved, module_deps, internal=None, unimported=None):
+        self.modules = modules          # framework name -> sorted paths
+        self.app = app                  # paths left in the app target
+        self.moved = moved              # path -> (wanted framework, final framework or APP, blocking path)
+        self.module_deps = module_deps  # framework name or APP -> sorted framework names it links
+        # path kept in the app -> (path using it, or None for an extension, sorted internal names)
+        self.internal = internal or {}
+        # path moved into its user's target -> (path using it, framework the user does not import)
+        self.unimported = unimported or {}
+
+    @property
+    def assignments(self):
+        owners = {path: APP for path in self.app}
+        for module, paths in self.modules.items():
+            owners.update(dict.fromkeys(paths, module))
+        return owners
+
+
+def find_cycle(graph):
+    """A list of nodes forming a cycle in {node: successors}, or None."""
+    state = {}
+    for start in graph:
+        if start in state:
+            continue
+        path = [start]
+        iterators = [iter(graph.get(start, ()))]
+        state[start] = 'open'
+        while iterators:
+            node = next(iterators[-1], None)
+            if node is None:
+                state[path.pop()] = 'done'
+                iterators.pop()
+            elif state.get(node) == 'open':
+                return path[path.index(node):] + [node]
+            elif node not in state:
+                state[node] = 'open'
+                path.append(node)
+                iterators.append(iter(graph.get(node, ())))
+    return None
+
+
+def plan_shards(index, shards=SHARDS, paths=None):
+    """Assign the indexed files (or just paths) to frameworks; see the module docstring."""
+    graph = index.dependencies(paths)
+    layers = [name for name, _ in shards] + [APP]
+    top = len(shards)
+    wanted = {}
+    layer = {}
+    for path in graph:
+        wanted[path] = next((i for i, (_, prefixes) in enumerate(shards) if path.startswith(prefixes)), top)
+        layer[path] = wanted[path]
+
+    dependents = {path: set() for path in graph}
+    for path, targets in graph.items():
+        for target in targets:
+            dependents[target].add(path)
+    # Names each file uses from each file it depends on that are not public
+    internal_uses = {}
+    for path, targets in graph.items():
+        used = set(index.files[path]['referenced']).union(index.files[path]['extended'])
+        for target in targets:
+            entry = index.files[target]
+            names = used.intersection(entry['declared']).difference(entry['public'])
+            if names:
+                internal_uses[path, target] = sorted(names)
+
+    blockers = {}
+    internal = {}
+    unimported = {}
+    declared = index.declarers()
+    for path in graph:
+        entry = index.files[path]
+        names = sorted(name for name in entry['extended'] if name not in declared and name not in entry['public'])
+        if names and layer[path] < top:
+            internal[path] = (None, names)
+            layer[path] = top
+            blockers[path] = None
+    queue = list(graph)
+    while queue:
+        while queue:
+            path = queue.pop()
+            for target in graph[path]:
+                if layer[target] > layer[path]:
+                    layer[path] = layer[target]
+                    blockers[path] = target
+                    queue.extend(dependents[path])
+        # Internal declarations used across a target boundary pin their file to the app
+        for (path, target), names in sorted(internal_uses.items()):
+            if layer[target] != layer[path] and target not in internal:
+                internal[target] = (path, names)
+                layer[target] = top
+                blockers[target] = path
+                queue.extend(dependents[target])
+        if queue:
+            continue
+        # A framework is only visible where it is imported; otherwise the file joins its user
+        for path in sorted(graph):
+            for target in sorted(graph[path]):
+                module = layers[layer[target]]
+                if layer[target] < layer[path] and module not in index.files[path]['imports']:
+                    unimported[target] = (path, module)
+                    layer[target] = layer[path]
+                    blockers[target] = path
+                    queue.extend(dependents[target])
+
+    modules = {name: sorted(path for path in graph if layer[path] == i) for i, (name, _) in enumerate(shards)}
+    modules = {name: paths for name, paths in modules.items() if paths}
+    if not modules and internal:
+        path, (user, names) = min(internal.items())
+        raise ShardError(f"no framework is left once files whose internal declarations are used from another "
+                         f"target stay in the app (e.g. {path}: {internal_reason(user, names)}); "
+                         f"make them public to shard")
+    if not modules and unimported:
+        path, (user, module) = min(unimported.items())
+        raise ShardError(f"no framework is left once files join users that do not import them "
+                         f"(e.g. {user} uses {path} without import {module})")
+    app = sorted(path for path in graph if layer[path] == top)
+    moved = {path: (layers[wanted[path]], layers[layer[path]], blockers[path])
+             for path in graph if layer[path] != wanted[path]}
+    module_deps = {}
+    for path, targets in graph.items():
+        owner = layers[layer[path]]
+        for target in targets:
+            if layers[layer[target]] != owner:
+                module_deps.setdefault(owner, set()).add(layers[layer[target]])
+    for owner in [APP] + list(modules):
+        module_deps.setdefault(owner, set())
+    # The app links every framework, not just the ones it names directly
+    module_deps[APP].update(modules)
+
+    cycle = find_cycle(module_deps)
+    if cycle:
+        raise ShardError("framework dependency cycle: " + " -> ".join(name or 'app' for name in cycle))
+    return ShardPlan(modules, app, moved, {owner: sorted(deps, key=layers.index)
+                                           for owner, deps in module_deps.items()}, internal, unimported)
+
+
+def internal_reason(user, names):
+    if user is None:
+        return f"non-public extension of {', '.join(names)}"
+    return f"internal {', '.join(names)} used by {user}"
+
+
+def load_state(xcodeproj_dir, name=STATE_NAME):
+    try:
+        with open(os.path.join(xcodeproj_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(xcodeproj_dir, modules, name=STATE_NAME):
+    state_file = os.path.join(xcodeproj_dir, name)
+    if not modules:
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        return
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(modules, f, indent=1, sort_keys=True)
+
+
+def print_plan(plan):
+    for module, paths in plan.modules.items():
+        links = ', '.join(plan.module_deps[module]) or 'nothing'
+        print(f"📦 {module}: {len(paths)} files, links {links}")
+    print(f"📱 app: {len(plan.app)} files")
+    for path, (wanted, final, blocker) in sorted(plan.moved.items()):
+        if path in plan.internal:
+            print(f"  ↑ {path}: {wanted} -> app ({internal_reason(*plan.internal[path])})")
+        elif path in plan.unimported:
+            user, module = plan.unimported[path]
+            print(f"  ↑ {path}: {wanted} -> {final or 'app'} ({user} does not import {module})")
+        else:
+            print(f"  ↑ {path}: {wanted} -> {final or 'app'} (needs {blocker})")
+
+
+def check_fixture():
+    """Plan FIXTURE in a temporary tree; returns the plan, which must produce FIXTURE_MODULES."""
+    with tempfile.TemporaryDirectory() as root:
+        for path, source in FIXTURE.items():
+            os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+            with open(os.path.join(root, path), 'w', encoding='utf-8') as f:
+                f.write(source)
+        return plan_shards(swift_index.index_sources(root))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show how the sources split into framework targets")
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="source root the SHARDS prefixes are relative to")
+    parser.add_argument('--entry', default="App/SignalAirApp.swift",
+                        help="only shard files reachable from this entry point")
+    parser.add_argument('--check', action='store_true', help="check the planner against FIXTURE and exit")
+    args = parser.parse_args(argv)
+    if args.check:
+        try:
+            plan = check_fixture()
+        except ShardError as e:
+            print(f"❌ FIXTURE did not shard: {e}", file=sys.stderr)
+            return 1
+        print_plan(plan)
+        if plan.modules != FIXTURE_MODULES:
+            print(f"❌ FIXTURE sharded into {plan.modules}, expected {FIXTURE_MODULES}", file=sys.stderr)
+            return 1
+        print(f"✅ FIXTURE shards into {len(plan.modules)} frameworks as expected")
+        return 0
+    index = swift_index.index_sources(args.root)
+    paths = index.reachable([args.entry]) if args.entry in index.files else None
+    try:
+        plan = plan_shards(index, paths=paths)
+    except ShardError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print_plan(plan)
+    sharded = sum(len(paths) for paths in plan.modules.values())
+    print(f"✅ {sharded} of {sharded + len(plan.app)} files in {len(plan.modules)} acyclic frameworks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
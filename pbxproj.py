@@ -0,0 +1,1138 @@
+#!/usr/bin/env python3
+"""Parser, object graph and writer for Xcode project.pbxproj files."""
+
+import argparse
+import filecmp
+import hashlib
+import io
+import json
+import marshal
+import os
+import posixpath
+import re
+import struct
+import sys
+import tempfile
+
+from profiling import NULL_PROFILER
+
+# One token per match: block comment, quoted string, bare word or punctuation,
+# with any leading whitespace and // line comments consumed as a prefix
+_TOKEN_RE = re.compile(
+    r'\s*(?://[^\n]*\s*)*'
+    r'([{}()=;,]|/\*.*?\*/|"[^"\\]*(?:\\.[^"\\]*)*"|(?:[^\s{}()=;,"/]+|/(?![*/]))+)',
+    re.S,
+)
+_PUNCTUATION = frozenset('{}()=;,')
+_SAFE_RE = re.compile(r'^[A-Za-z0-9_$/:.]+$')
+_ESCAPES = {'n': '\n', 't': '\t', '"': '"', '\\': '\\'}
+
+# Objects Xcode writes on a single line
+_INLINE_ISAS = {'PBXBuildFile', 'PBXFileReference'}
+# Keys whose UUID values Xcode does not annotate with a comment
+_UNANNOTATED_KEYS = {'remoteGlobalIDString', 'TestTargetID'}
+# Keys whose value is an object ID or a list of object IDs
+_REFERENCE_KEYS = frozenset({
+    'baseConfigurationReference', 'buildConfigurationList', 'buildConfigurations',
+    'buildPhases', 'buildRules', 'children', 'containerPortal', 'dependencies',
+    'fileRef', 'files', 'mainGroup', 'package', 'packageProductDependencies',
+    'packageReferences', 'productRef', 'productRefGroup', 'productReference',
+    'remoteGlobalIDString', 'target', 'targetProxy', 'targets',
+})
+_PHASE_NAMES = {
+    'PBXSourcesBuildPhase': 'Sources',
+    'PBXFrameworksBuildPhase': 'Frameworks',
+    'PBXResourcesBuildPhase': 'Resources',
+    'PBXHeadersBuildPhase': 'Headers',
+    'PBXCopyFilesBuildPhase': 'CopyFiles',
+    'PBXShellScriptBuildPhase': 'ShellScript',
+}
+_FILE_TYPES = {
+    '.swift': 'sourcecode.swift',
+    '.h': 'sourcecode.c.h',
+    '.m': 'sourcecode.c.objc',
+    '.plist': 'text.plist.xml',
+    '.xcassets': 'folder.assetcatalog',
+    '.bundle': 'wrapper.plug-in',
+    '.scnassets': 'wrapper.scnassets',
+    '.png': 'image.png',
+    '.json': 'text.json',
+    '.strings': 'text.plist.strings',
+    '.xcprivacy': 'text.xml',
+    '.xcconfig': 'text.xcconfig',
+}
+
+
+class PBXParseError(ValueError):
+    pass
+
+
+def stable_uuid(role, *path):
+    """Deterministic 24-character ID derived from an object's role and path."""
+    key = '\0'.join((role,) + path)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest().upper()[:24]
+
+
+def normalize_path(path):
+    """Canonical form of a project-relative path, e.g. './SignalAir//App/' -> 'SignalAir/App'."""
+    path = posixpath.normpath(path.replace(os.sep, '/'))
+    return '' if path == '.' else path
+
+
+def file_type_for(path):
+    return _FILE_TYPES.get(os.path.splitext(path)[1], 'text')
+
+
+def resolve_paths(get, object_id, parent_path=''):
+    """Yield (id, project-relative path) for object_id and every group or file below it.
+
+    get looks up an object by ID; parent_path is where object_id's parent resolves.
+    """
+    stack = [(object_id, parent_path)]
+    while stack:
+        object_id, parent_path = stack.pop()
+        obj = get(object_id)
+        if obj is None or parent_path is None:
+            continue
+        source_tree = obj.get('sourceTree', '<group>')
+        path = obj.get('path', '')
+        if source_tree == '<group>':
+            path = normalize_path(posixpath.join(parent_path, path)) if path else parent_path
+        elif source_tree == 'SOURCE_ROOT':
+            path = normalize_path(path)
+        elif source_tree != '<absolute>':
+            # SDK frameworks and build products live outside the source tree
+            continue
+        yield object_id, path
+        for child_id in obj.get('children', ()):
+            stack.append((child_id, path))
+
+
+def _unescape(raw):
+    if '\\' not in raw:
+        return raw
+    return re.sub(r'\\(.)', lambda m: _ESCAPES.get(m.group(1), m.group(1)), raw, flags=re.S)
+
+
+def _quote(value):
+    if _SAFE_RE.match(value):
+        return value
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n').replace('\t', '\\t'))
+    return f'"{escaped}"'
+
+
+def _tokenize(text):
+    """Split text into raw tokens in one C-level pass.
+
+    Tokens keep their delimiters so the kind is known from the first
+    characters: '/*' comment, '"' quoted string, punctuation, else a bare word.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    leftover = _TOKEN_RE.sub('', text)
+    if leftover.strip() and not leftover.lstrip().startswith('//'):
+        stray = leftover.strip()[0]
+        raise PBXParseError(f"Unexpected character {stray!r} at offset {text.find(stray)}")
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.comments = {}
+
+    def _next(self):
+        tokens = self.tokens
+        pos = self.pos
+        try:
+            token = tokens[pos]
+            while token[:2] == '/*':
+                pos += 1
+                token = tokens[pos]
+        except IndexError:
+            raise PBXParseError("Unexpected end of file") from None
+        self.pos = pos + 1
+        return token
+
+    def _attach_comment(self, key):
+        # A comment directly after a UUID names the object it refers to
+        tokens = self.tokens
+        pos = self.pos
+        if pos < len(tokens) and tokens[pos][:2] == '/*':
+            self.comments.setdefault(key, tokens[pos][2:-2].strip())
+            self.pos = pos + 1
+
+    def _expect(self, punct):
+        token = self._next()
+        if token != punct:
+            raise PBXParseError(f"Expected {punct!r}, got {token!r} at token {self.pos}")
+
+    def parse(self):
+        if self._next() != '{':
+            raise PBXParseError("Project file must start with '{'")
+        return self._dict()
+
+    def _string(self, token):
+        if token in _PUNCTUATION:
+            raise PBXParseError(f"Unexpected {token!r} at token {self.pos}")
+        value = _unescape(token[1:-1]) if token[0] == '"' else token
+        self._attach_comment(value)
+        return value
+
+    def _value(self, token):
+        if token == '{':
+            return self._dict()
+        if token == '(':
+            return self._list()
+        return self._string(token)
+
+    def _dict(self):
+        result = {}
+        next_token = self._next
+        while True:
+            token = next_token()
+            if token == '}':
+                return result
+            key = self._string(token)
+            if next_token() != '=':
+                raise PBXParseError(f"Expected '=' after {key!r} at token {self.pos}")
+            result[key] = self._value(next_token())
+            if next_token() != ';':
+                raise PBXParseError(f"Expected ';' after {key!r} at token {self.pos}")
+
+    def _list(self):
+        result = []
+        next_token = self._next
+        while True:
+            token = next_token()
+            if token == ')':
+                return result
+            result.append(self._value(token))
+            token = next_token()
+            if token == ')':
+                return result
+            if token != ',':
+                raise PBXParseError(f"Expected ',' in list, got {token!r} at token {self.pos}")
+
+
+class PBXProj:
+    """In-memory project graph indexed by UUID, isa and path."""
+
+    def __init__(self, root, name="Project", comments=None):
+        self.root = root
+        self.objects = root.setdefault('objects', {})
+        self.name = name
+        self.comments = comments if comments is not None else {}
+        self._by_isa = {}
+        self._by_path = {}
+        self._parent = {}
+        self._build_files = {}  # fileRef -> build file ids
+        self._phase_of = {}     # build file -> build phase listing it
+        # Resolved project-relative paths of groups and file references, built on first use
+        self._paths = None
+        self._by_resolved = None
+        for object_id, obj in self.objects.items():
+            self._index(object_id, obj)
+
+    # -- loading / saving -------------------------------------------------
+
+    @classmethod
+    def parse(cls, text, name="Project"):
+        parser = _Parser(text)
+        root = parser.parse()
+        return cls(root, name=name, comments=parser.comments)
+
+    @classmethod
+    def load(cls, project_file, use_cache=True):
+        """Load a project file, from its binary cache when the text is unchanged.
+
+        The cache is trusted when size and mtime match; otherwise the text is
+        hashed and only re-parsed if the content really changed.
+        """
+        name = project_name_for(project_file)
+        cache_file = cache_file_for(project_file)
+        cached = _read_cache(cache_file) if use_cache else None
+        with open(project_file, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                return _decode_graph(cached[3], name)
+            data = f.read()
+        digest = hashlib.sha1(data).digest()
+        if cached is not None and cached[2] == digest:
+            # Same content with a new mtime (checkout, touch); refresh the key only
+            _write_cache_header(cache_file, stat.st_size, stat.st_mtime_ns, digest)
+            return _decode_graph(cached[3], name)
+        project = cls.parse(data.decode('utf-8'), name=name)
+        if use_cache:
+            _write_cache(cache_file, project, stat.st_size, stat.st_mtime_ns, digest)
+        return project
+
+    def dumps(self):
+        buffer = io.StringIO()
+        self.dump(buffer)
+        return buffer.getvalue()
+
+    def save(self, project_file):
+        changed = write_if_changed(project_file, self.dump)
+        if changed:
+            with open(project_file, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                digest = hashlib.sha1(f.read()).digest()
+            _write_cache(cache_file_for(project_file), self, stat.st_size, stat.st_mtime_ns, digest)
+        return changed
+
+    # -- indexes ----------------------------------------------------------
+
+    def _index(self, object_id, obj):
+        self._by_isa.setdefault(obj.get('isa'), {})[object_id] = None
+        path = obj.get('path')
+        if path is not None:
+            self._by_path.setdefault(path, {})[object_id] = None
+        for child in obj.get('children', ()):
+            self._parent[child] = object_id
+        if obj.get('isa') == 'PBXBuildFile':
+            self._build_files.setdefault(obj.get('fileRef'), {})[object_id] = None
+        for build_file in obj.get('files', ()):
+            self._phase_of[build_file] = object_id
+
+    def _unindex(self, object_id, obj):
+        self._by_isa.get(obj.get('isa'), {}).pop(object_id, None)
+        path = obj.get('path')
+        if path is not None:
+            self._by_path.get(path, {}).pop(object_id, None)
+        for child in obj.get('children', ()):
+            if self._parent.get(child) == object_id:
+                del self._parent[child]
+        if obj.get('isa') == 'PBXBuildFile':
+            self._build_files.get(obj.get('fileRef'), {}).pop(object_id, None)
+            self._phase_of.pop(object_id, None)
+        for build_file in obj.get('files', ()):
+            if self._phase_of.get(build_file) == object_id:
+                del self._phase_of[build_file]
+        if self._paths is not None:
+            resolved = self._paths.pop(object_id, None)
+            if resolved is not None:
+                self._by_resolved.get(resolved, {}).pop(object_id, None)
+
+    def _place(self, object_id, parent_path):
+        """Resolve the path of object_id and everything below it, given its parent's path."""
+        for object_id, path in resolve_paths(self.objects.get, object_id, parent_path):
+            self._paths[object_id] = path
+            self._by_resolved.setdefault(path, {})[object_id] = None
+
+    def resolved_paths(self):
+        """Map groups and file references below the main group to their project-relative path."""
+        if self._paths is None:
+            self._paths = {}
+            self._by_resolved = {}
+            self._place(self.main_group, '')
+        return self._paths
+
+    def at_path(self, path, isa=None):
+        """Objects whose resolved path is path, regardless of how their group nests it."""
+        self.resolved_paths()
+        ids = self._by_resolved.get(normalize_path(path), ())
+        return [object_id for object_id in ids
+                if isa is None or self.objects[object_id].get('isa') == isa]
+
+    def build_file_for(self, file_ref_id, phase_id):
+        """The build file adding file_ref_id to phase_id, or None."""
+        for build_file_id in self._build_files.get(file_ref_id, ()):
+            if self._phase_of.get(build_file_id) == phase_id:
+                return build_file_id
+        return None
+
+    def get(self, object_id):
+        return self.objects.get(object_id)
+
+    def objects_of(self, isa):
+        return [(object_id, self.objects[object_id]) for object_id in self._by_isa.get(isa, ())]
+
+    def find_by_path(self, path, isa=None):
+        ids = self._by_path.get(path, ())
+        return [object_id for object_id in ids
+                if isa is None or self.objects[object_id].get('isa') == isa]
+
+    def parent_of(self, object_id):
+        return self._parent.get(object_id)
+
+    # -- mutation ---------------------------------------------------------
+
+    def new_uuid(self, role, *path):
+        object_id = stable_uuid(role, *path)
+        salt = 0
+        while object_id in self.objects:
+            salt += 1
+            object_id = stable_uuid(role, *path, str(salt))
+        return object_id
+
+    def add_object(self, object_id, obj, comment=None):
+        if object_id in self.objects:
+            raise ValueError(f"Duplicate object id {object_id}")
+        self.objects[object_id] = obj
+        self._index(object_id, obj)
+        if comment:
+            self.comments[object_id] = comment
+        return object_id
+
+    def remove_object(self, object_id):
+        obj = self.objects.pop(object_id)
+        self._unindex(object_id, obj)
+        self.comments.pop(object_id, None)
+        return obj
+
+    def add_child(self, group_id, child_id):
+        self.objects[group_id].setdefault('children', []).append(child_id)
+        self._parent[child_id] = group_id
+        if self._paths is not None:
+            self._place(child_id, self._paths.get(group_id))
+
+    def set_children(self, group_id, children):
+        group = self.objects[group_id]
+        for child_id in group.get('children', ()):
+            if self._parent.get(child_id) == group_id:
+                del self._parent[child_id]
+        group['children'] = list(children)
+        for child_id in group['children']:
+            self._parent[child_id] = group_id
+        # Re-resolved on next use
+        self._paths = self._by_resolved = None
+
+    def references(self, obj):
+        """Yield the object IDs obj refers to."""
+        for key, value in obj.items():
+            if key in _REFERENCE_KEYS:
+                if isinstance(value, list):
+                    yield from value
+                else:
+                    yield value
+
+    def reference_counts(self):
+        """Number of references held to each object, counted in one pass."""
+        counts = {}
+        for obj in self.objects.values():
+            for ref in self.references(obj):
+                counts[ref] = counts.get(ref, 0) + 1
+        return counts
+
+    def remove_objects(self, object_ids):
+        """Remove objects along with everything only they kept alive; return the removed IDs.
+
+        Removing a file reference removes its build files, removing a group
+        removes its contents, and a group left without children is removed
+        too. Any other object whose reference count drops to zero is
+        collected. References to removed objects are then dropped from the
+        remaining objects in a single sweep.
+        """
+        counts = self.reference_counts()
+        protected = {self.root.get('rootObject'), self.main_group, self.project.get('productRefGroup')}
+        remaining_children = {}
+        doomed = set()
+        queue = list(object_ids)
+        while queue:
+            object_id = queue.pop()
+            obj = self.objects.get(object_id)
+            if obj is None or object_id in doomed or object_id in protected:
+                continue
+            doomed.add(object_id)
+            if obj.get('isa') == 'PBXFileReference':
+                queue.extend(self._build_files.get(object_id, ()))
+            for ref in self.references(obj):
+                counts[ref] -= 1
+                if counts[ref] == 0 or obj.get('isa') == 'PBXGroup' and self._parent.get(ref) == object_id:
+                    queue.append(ref)
+            parent_id = self._parent.get(object_id)
+            if parent_id is not None and parent_id in self.objects:
+                if parent_id not in remaining_children:
+                    remaining_children[parent_id] = len(self.objects[parent_id].get('children', ()))
+                remaining_children[parent_id] -= 1
+                if remaining_children[parent_id] == 0:
+                    queue.append(parent_id)
+
+        for object_id, obj in self.objects.items():
+            if object_id in doomed:
+                continue
+            for key in [key for key in obj if key in _REFERENCE_KEYS]:
+                value = obj[key]
+                if isinstance(value, list):
+                    if any(ref in doomed for ref in value):
+                        obj[key] = [ref for ref in value if ref not in doomed]
+                elif value in doomed:
+                    del obj[key]
+        for object_id in doomed:
+            self.remove_object(object_id)
+        return doomed
+
+    def remove_paths(self, paths):
+        """Remove the files or groups at project-relative paths; return the paths not found."""
+        found = []
+        missing = []
+        for path in paths:
+            ids = self.at_path(path, 'PBXFileReference') or [
+                group_id for group_id in self.at_path(path, 'PBXGroup')
+                if self.objects[group_id].get('path')]
+            if ids:
+                found.extend(ids)
+            else:
+                missing.append(path)
+        if found:
+            self.remove_objects(found)
+        return missing
+
+    def move_files(self, moves):
+        """Move or rename files given (old path, new path) pairs.
+
+        Each reference is re-parented to the group mirroring its new directory;
+        its build files keep compiling it. Groups emptied by the moves are removed.
+        """
+        self.resolved_paths()
+        detached = {}
+        for old_path, new_path in moves:
+            file_ref_id = self.file_reference(old_path)
+            if file_ref_id is None:
+                raise KeyError(f"No file reference for {old_path}")
+            if self.file_reference(new_path) is not None:
+                raise ValueError(f"{new_path} is already in the project")
+            parent_id = self._parent.get(file_ref_id)
+            if parent_id is not None:
+                detached.setdefault(parent_id, set()).add(file_ref_id)
+            obj = self.objects[file_ref_id]
+            self._unindex(file_ref_id, obj)
+            name = posixpath.basename(new_path)
+            obj['path'] = name
+            obj.pop('name', None)
+            obj['sourceTree'] = '<group>'
+            if 'lastKnownFileType' in obj:
+                obj['lastKnownFileType'] = file_type_for(new_path)
+            self._index(file_ref_id, obj)
+            self.comments[file_ref_id] = name
+            for build_file_id in self._build_files.get(file_ref_id, ()):
+                phase_id = self._phase_of.get(build_file_id)
+                self.comments[build_file_id] = f"{name} in {self.comment_for(phase_id) if phase_id else 'Sources'}"
+            # Attached after the old parents are filtered below
+            detached.setdefault(None, []).append((file_ref_id, new_path))
+
+        emptied = []
+        for parent_id, children in detached.items():
+            if parent_id is None:
+                continue
+            group = self.objects[parent_id]
+            group['children'] = [child for child in group.get('children', ()) if child not in children]
+            if not group['children']:
+                emptied.append(parent_id)
+        for file_ref_id, new_path in detached.get(None, ()):
+            self.add_child(self.ensure_group(posixpath.dirname(normalize_path(new_path))), file_ref_id)
+        emptied = [group_id for group_id in emptied if not self.objects[group_id].get('children')]
+        if emptied:
+            self.remove_objects(emptied)
+
+    @property
+    def project(self):
+        return self.objects[self.root['rootObject']]
+
+    @property
+    def main_group(self):
+        return self.project['mainGroup']
+
+    def find_child_group(self, group_id, name):
+        for child_id in self.objects[group_id].get('children', ()):
+            child = self.objects.get(child_id)
+            if child and child.get('isa') == 'PBXGroup' and name in (child.get('path'), child.get('name')):
+                return child_id
+        return None
+
+    def find_group(self, group_path):
+        group_id = self.main_group
+        for component in filter(None, group_path.split('/')):
+            group_id = self.find_child_group(group_id, component)
+            if group_id is None:
+                return None
+        return group_id
+
+    def file_reference(self, path):
+        """Return the PBXFileReference for a project-relative path, or None.
+
+        Looked up by resolved path, so older entries that reference the full
+        path from a "Recovered References" group are found too.
+        """
+        matches = self.at_path(path, 'PBXFileReference')
+        return matches[0] if matches else None
+
+    def ensure_group(self, group_path):
+        """Return the group for a slash-separated path below the main group, creating it if needed."""
+        group_id = self.main_group
+        walked = []
+        for component in filter(None, group_path.split('/')):
+            walked.append(component)
+            child_id = next((candidate for candidate in self.at_path('/'.join(walked), 'PBXGroup')
+                             if self._parent.get(candidate) == group_id), None)
+            if child_id is None:
+                child_id = self.find_child_group(group_id, component)
+            if child_id is None:
+                child_id = self.add_object(self.new_uuid('group', '/'.join(walked)), {
+                    'isa': 'PBXGroup',
+                    'children': [],
+                    'path': component,
+                    'sourceTree': '<group>',
+                }, comment=component)
+                self.add_child(group_id, child_id)
+            group_id = child_id
+        return group_id
+
+    def target(self, name=None):
+        for target_id, target in self.objects_of('PBXNativeTarget'):
+            if name is None and target.get('productType') == 'com.apple.product-type.application':
+                return target_id
+            if name is not None and target.get('name') == name:
+                return target_id
+        return None
+
+    def build_phase(self, target_id, isa='PBXSourcesBuildPhase'):
+        for phase_id in self.objects[target_id].get('buildPhases', ()):
+            phase = self.objects.get(phase_id)
+            if phase and phase.get('isa') == isa:
+                return phase_id
+        return None
+
+    def add_file_reference(self, path, group_id, file_ref_id=None):
+        name = os.path.basename(path)
+        return self._add_to_group(group_id, file_ref_id or self.new_uuid('file_ref', path), {
+            'isa': 'PBXFileReference',
+            'lastKnownFileType': file_type_for(path),
+            'path': name,
+            'sourceTree': '<group>',
+        }, comment=name)
+
+    def _add_to_group(self, group_id, object_id, obj, comment):
+        self.add_object(object_id, obj, comment=comment)
+        self.add_child(group_id, object_id)
+        return object_id
+
+    def add_build_file(self, file_ref_id, phase_id, build_file_id=None):
+        phase_name = self.comment_for(phase_id)
+        file_path = self.objects[file_ref_id].get('path', file_ref_id)
+        build_file_id = self.add_object(build_file_id or self.new_uuid('build_file', phase_id, file_path), {
+            'isa': 'PBXBuildFile',
+            'fileRef': file_ref_id,
+        }, comment=f"{self.comment_for(file_ref_id)} in {phase_name}")
+        self.objects[phase_id].setdefault('files', []).append(build_file_id)
+        self._phase_of[build_file_id] = phase_id
+        return build_file_id
+
+    def add_file(self, path, target_name=None, file_ref_id=None, build_file_id=None):
+        """Add a source file (project-relative path) to its group and the target's Sources phase.
+
+        Existing references are reused: a path that is already referenced, from
+        any group, or already built by the phase is not added again.
+        """
+        existing = self.file_reference(path)
+        if existing is None:
+            group_id = self.ensure_group(os.path.dirname(path))
+            file_ref_id = self.add_file_reference(path, group_id, file_ref_id)
+        else:
+            file_ref_id = existing
+        target_id = self.target(target_name)
+        if target_id is None:
+            return file_ref_id, None
+        phase_id = self.build_phase(target_id)
+        if phase_id is None:
+            return file_ref_id, None
+        build_file = self.build_file_for(file_ref_id, phase_id)
+        if build_file is None:
+            build_file = self.add_build_file(file_ref_id, phase_id, build_file_id)
+        return file_ref_id, build_file
+
+    def dedupe(self):
+        """Collapse file references resolving to the same path and repeated build files.
+
+        The reference inside the group mirroring its directory is kept; build
+        files of the others are pointed at it. Returns (references removed,
+        build files removed).
+        """
+        self.resolved_paths()
+        removed_refs = removed_build_files = 0
+        emptied = set()
+        for path, ids in list(self._by_resolved.items()):
+            refs = [object_id for object_id in ids if self.objects[object_id].get('isa') == 'PBXFileReference']
+            if len(refs) < 2:
+                continue
+            name = posixpath.basename(path)
+            keep = next((ref for ref in refs if self.objects[ref].get('path') == name), refs[0])
+            for ref in refs:
+                if ref == keep:
+                    continue
+                for build_file_id in list(self._build_files.get(ref, ())):
+                    self._build_files[ref].pop(build_file_id)
+                    self.objects[build_file_id]['fileRef'] = keep
+                    self._build_files.setdefault(keep, {})[build_file_id] = None
+                    phase_id = self._phase_of.get(build_file_id)
+                    if phase_id is not None:
+                        self.comments[build_file_id] = f"{self.comment_for(keep)} in {self.comment_for(phase_id)}"
+                parent_id = self._parent.get(ref)
+                if parent_id is not None:
+                    self.objects[parent_id]['children'].remove(ref)
+                    emptied.add(parent_id)
+                self.remove_object(ref)
+                removed_refs += 1
+
+        for isa in list(self._by_isa):
+            if not isa or not isa.endswith('BuildPhase'):
+                continue
+            for phase_id, phase in self.objects_of(isa):
+                built = {}
+                files = []
+                for build_file_id in phase.get('files', ()):
+                    file_ref_id = self.objects.get(build_file_id, {}).get('fileRef')
+                    kept = built.get(file_ref_id) if file_ref_id is not None else None
+                    if kept is not None:
+                        if kept != build_file_id:
+                            self.remove_object(build_file_id)
+                            removed_build_files += 1
+                        continue
+                    if file_ref_id is not None:
+                        built[file_ref_id] = build_file_id
+                    files.append(build_file_id)
+                if len(files) != len(phase.get('files', ())):
+                    phase['files'] = files
+                    for build_file_id in files:
+                        self._phase_of[build_file_id] = phase_id
+
+        # Groups emptied by the merge (typically "Recovered References")
+        for group_id in emptied:
+            group = self.objects.get(group_id)
+            if group is not None and not group.get('children') and group_id != self.main_group:
+                parent_id = self._parent.get(group_id)
+                if parent_id is not None:
+                    self.objects[parent_id]['children'].remove(group_id)
+                self.remove_object(group_id)
+        return removed_refs, removed_build_files
+
+    # -- serialization ----------------------------------------------------
+
+    def comment_for(self, object_id):
+        comment = self.comments.get(object_id)
+        if comment is not None:
+            return comment
+        obj = self.objects.get(object_id)
+        if obj is None:
+            return None
+        isa = obj.get('isa')
+        if isa == 'PBXProject':
+            return 'Project object'
+        if isa in _PHASE_NAMES:
+            return obj.get('name', _PHASE_NAMES[isa])
+        if isa in ('PBXContainerItemProxy', 'PBXTargetDependency'):
+            return isa
+        if isa == 'XCConfigurationList':
+            return self._config_list_comment(object_id)
+        return obj.get('name') or obj.get('path')
+
+    def _config_list_comment(self, list_id):
+        for owner_isa in ('PBXProject', 'PBXNativeTarget', 'PBXAggregateTarget'):
+            for owner_id, owner in self.objects_of(owner_isa):
+                if owner.get('buildConfigurationList') == list_id:
+                    owner_name = self.name if owner_isa == 'PBXProject' else owner.get('name')
+                    return f'Build configuration list for {owner_isa} "{owner_name}"'
+        return None
+
+    def _ref(self, value, key=None):
+        text = _quote(value)
+        if key in _UNANNOTATED_KEYS or value not in self.objects:
+            return text
+        comment = self.comment_for(value)
+        return f"{text} /* {comment} */" if comment else text
+
+    def _inline(self, value, key=None):
+        if isinstance(value, dict):
+            return '{' + ''.join(f"{_quote(k)} = {self._inline(v, k)}; " for k, v in value.items()) + '}'
+        if isinstance(value, list):
+            return '(' + ''.join(f"{self._inline(v, key)}, " for v in value) + ')'
+        return self._ref(value, key)
+
+    def _write_value(self, write, value, indent, key=None):
+        if isinstance(value, dict):
+            write('{\n')
+            for k, v in value.items():
+                write('\t' * (indent + 1) + f"{_quote(k)} = ")
+                self._write_value(write, v, indent + 1, k)
+                write(';\n')
+            write('\t' * indent + '}')
+        elif isinstance(value, list):
+            write('(\n')
+            for item in value:
+                write('\t' * (indent + 1))
+                self._write_value(write, item, indent + 1, key)
+                write(',\n')
+            write('\t' * indent + ')')
+        else:
+            write(self._ref(value, key))
+
+    def _write_object(self, write, object_id, obj):
+        write('\t\t' + self._ref(object_id) + ' = ')
+        if obj.get('isa') in _INLINE_ISAS:
+            write(self._inline(obj))
+        else:
+            self._write_value(write, obj, 2)
+        write(';\n')
+
+    def dump(self, f):
+        write = f.write
+        write('// !$*UTF8*$!\n{\n')
+        for key, value in self.root.items():
+            write(f"\t{_quote(key)} = ")
+            if key == 'objects':
+                self._write_objects(write)
+            else:
+                self._write_value(write, value, 1, key)
+            write(';\n')
+        write('}\n')
+
+    def _write_objects(self, write):
+        write('{\n')
+        for isa in sorted(isa for isa, ids in self._by_isa.items() if ids):
+            write(f"\n/* Begin {isa} section */\n")
+            for object_id in self._by_isa[isa]:
+                self._write_object(write, object_id, self.objects[object_id])
+            write(f"/* End {isa} section */\n")
+        write('\t}')
+
+
+class ProjectTransaction:
+    """Queue project edits and apply them with one parse and one atomic write.
+
+    Used as a context manager the queued operations are committed on a clean
+    exit and discarded if the block raises; a failed commit leaves the project
+    file untouched.
+    """
+
+    def __init__(self, project_file, profiler=None):
+        self.project_file = project_file
+        self.profiler = profiler or NULL_PROFILER
+        self._operations = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def __len__(self):
+        return len(self._operations)
+
+    def add_file(self, path, target_name=None, file_ref_id=None, build_file_id=None):
+        self._operations.append(('add_file', path, target_name, file_ref_id, build_file_id))
+        return self
+
+    def add_group(self, group_path):
+        self._operations.append(('add_group', group_path))
+        return self
+
+    def add_to_build_phase(self, path, target_name=None, phase='PBXSourcesBuildPhase', build_file_id=None):
+        self._operations.append(('add_to_build_phase', path, target_name, phase, build_file_id))
+        return self
+
+    def dedupe(self):
+        self._operations.append(('dedupe',))
+        return self
+
+    def remove(self, path):
+        self._operations.append(('remove', path))
+        return self
+
+    def move(self, old_path, new_path):
+        self._operations.append(('move', old_path, new_path))
+        return self
+
+    def rename(self, path, new_name):
+        return self.move(path, posixpath.join(posixpath.dirname(path), new_name))
+
+    def extend(self, operations):
+        """Queue operations given as dicts, e.g. {"op": "add_file", "path": ...}."""
+        for operation in operations:
+            operation = dict(operation)
+            getattr(self, operation.pop('op'))(**operation)
+        return self
+
+    def rollback(self):
+        self._operations.clear()
+
+    def apply(self, project):
+        index = 0
+        while index < len(self._operations):
+            kind = self._operations[index][0]
+            if kind in ('remove', 'move'):
+                # Consecutive removes or moves are applied as one bulk pass
+                end = index
+                while end < len(self._operations) and self._operations[end][0] == kind:
+                    end += 1
+                getattr(self, '_apply_' + kind)(project, [operation[1:] for operation in self._operations[index:end]])
+                index = end
+            else:
+                getattr(self, '_apply_' + kind)(project, *self._operations[index][1:])
+                index += 1
+        return project
+
+    def commit(self):
+        if not self._operations:
+            return None
+        with self.profiler.phase('parse'):
+            project = PBXProj.load(self.project_file)
+        with self.profiler.phase('patch', operations=len(self._operations)):
+            self.apply(project)
+        with self.profiler.phase('write'):
+            project.save(self.project_file)
+        self._operations.clear()
+        return project
+
+    def _apply_add_file(self, project, path, target_name, file_ref_id, build_file_id):
+        project.add_file(path, target_name, file_ref_id, build_file_id)
+
+    def _apply_add_group(self, project, group_path):
+        project.ensure_group(group_path)
+
+    def _apply_add_to_build_phase(self, project, path, target_name, phase, build_file_id):
+        file_ref_id = project.file_reference(path)
+        if file_ref_id is None:
+            raise KeyError(f"No file reference for {path}")
+        target_id = project.target(target_name)
+        if target_id is None:
+            raise KeyError(f"No target named {target_name}")
+        phase_id = project.build_phase(target_id, phase)
+        if phase_id is None:
+            raise KeyError(f"Target {target_name or 'app'} has no {phase}")
+        if project.build_file_for(file_ref_id, phase_id) is None:
+            project.add_build_file(file_ref_id, phase_id, build_file_id)
+
+    def _apply_dedupe(self, project):
+        project.dedupe()
+
+    def _apply_remove(self, project, operations):
+        missing = project.remove_paths([path for path, in operations])
+        if missing:
+            raise KeyError(f"Not in the project: {', '.join(missing)}")
+
+    def _apply_move(self, project, operations):
+        project.move_files(operations)
+
+
+# -- binary cache -----------------------------------------------------------
+# .project.pbxproj.cache next to the project: a fixed header keyed on the text's
+# size, mtime and SHA-1, then the marshalled graph. Equal strings are interned
+# to one object so marshal stores each once; objects and comments are kept as
+# parallel id/value arrays, and the root as ordered (key, value) pairs whose
+# 'objects' value is left out and filled back in place on load.
+
+_CACHE_MAGIC = b'PBXC'
+CACHE_VERSION = 2
+_CACHE_HEADER = struct.Struct('<4sIQQ20s')
+
+
+def cache_file_for(project_file):
+    directory, name = os.path.split(project_file)
+    return os.path.join(directory, f".{name}.cache")
+
+
+def _read_cache(cache_file):
+    """Return (size, mtime_ns, sha1, payload) or None if missing or stale."""
+    try:
+        with open(cache_file, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _CACHE_HEADER.size:
+        return None
+    magic, version, size, mtime_ns, digest = _CACHE_HEADER.unpack_from(data)
+    if magic != _CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+    return size, mtime_ns, digest, memoryview(data)[_CACHE_HEADER.size:]
+
+
+def _intern(value, table):
+    if isinstance(value, str):
+        return table.setdefault(value, value)
+    if isinstance(value, dict):
+        return {table.setdefault(key, key): _intern(item, table) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_intern(item, table) for item in value]
+    return value
+
+
+def _encode_graph(project):
+    table = {}
+    root = [(key, None if key == 'objects' else value) for key, value in project.root.items()]
+    object_ids = list(project.objects)
+    comment_ids = list(project.comments)
+    return marshal.dumps((
+        _intern(root, table),
+        [table.setdefault(object_id, object_id) for object_id in object_ids],
+        [_intern(project.objects[object_id], table) for object_id in object_ids],
+        [table.setdefault(object_id, object_id) for object_id in comment_ids],
+        [_intern(project.comments[object_id], table) for object_id in comment_ids],
+    ))
+
+
+def _decode_graph(payload, name):
+    pairs, object_ids, objects, comment_ids, comments = marshal.loads(payload)
+    # Rebuilt in the text's key order, so dump writes rootObject where it was
+    root = {key: dict(zip(object_ids, objects)) if key == 'objects' else value for key, value in pairs}
+    return PBXProj(root, name=name, comments=dict(zip(comment_ids, comments)))
+
+
+def _write_cache(cache_file, project, size, mtime_ns, digest):
+    # Best effort: a read-only checkout just keeps parsing the text
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, CACHE_VERSION, size, mtime_ns, digest))
+            f.write(_encode_graph(project))
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+
+
+def _write_cache_header(cache_file, size, mtime_ns, digest):
+    try:
+        with open(cache_file, 'r+b') as f:
+            f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, CACHE_VERSION, size, mtime_ns, digest))
+    except OSError:
+        pass
+
+
+def check_cache(project_file):
+    """Whether load -> save -> load from the cache -> save writes the same bytes twice."""
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, os.path.basename(os.path.dirname(os.path.abspath(project_file))),
+                            'project.pbxproj')
+        os.makedirs(os.path.dirname(copy))
+        with open(project_file, 'rb') as source, open(copy, 'wb') as f:
+            f.write(source.read())
+        PBXProj.load(copy).save(copy)
+        with open(copy, 'rb') as f:
+            first = f.read()
+        stat = os.stat(copy)
+        cached = _read_cache(cache_file_for(copy))
+        if cached is None or cached[:2] != (stat.st_size, stat.st_mtime_ns):
+            raise PBXParseError(f"no cache was written for {copy}")
+        project = PBXProj.load(copy)
+        with open(copy, 'w', encoding='utf-8') as f:
+            # Not save(): a skipped rewrite would compare the file with itself
+            project.dump(f)
+        with open(copy, 'rb') as f:
+            return f.read() == first
+
+
+def atomic_write(path, writer, skip_unchanged=False, buffering=-1):
+    """Write via a temp file in the same directory and rename it over path.
+
+    With skip_unchanged the rendered file is compared with the existing one
+    and discarded when identical, leaving path and its mtime untouched.
+    Returns True if path was replaced.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', buffering=buffering) as f:
+            writer(f)
+            f.flush()
+            os.fsync(f.fileno())
+        exists = os.path.exists(path)
+        if skip_unchanged and exists and filecmp.cmp(tmp_path, path, shallow=False):
+            os.unlink(tmp_path)
+            return False
+        if exists:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path, writer, buffering=-1):
+    return atomic_write(path, writer, skip_unchanged=True, buffering=buffering)
+
+
+def _umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def project_name_for(project_file):
+    xcodeproj_dir = os.path.basename(os.path.dirname(os.path.abspath(project_file)))
+    return os.path.splitext(xcodeproj_dir)[0]
+
+
+DEFAULT_PROJECT = "SignalAir-iOS/SignalAir Rescue.xcodeproj/project.pbxproj"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a batch of edits to project.pbxproj in one write")
+    parser.add_argument('--project', default=DEFAULT_PROJECT)
+    parser.add_argument('--target', help="target name (default: the app target)")
+    parser.add_argument('--add-file', action='append', default=[], metavar='PATH')
+    parser.add_argument('--add-group', action='append', default=[], metavar='PATH')
+    parser.add_argument('--add-to-sources', action='append', default=[], metavar='PATH')
+    parser.add_argument('--remove', action='append', default=[], metavar='PATH',
+                        help="remove a file or group, its build files and any groups left empty")
+    parser.add_argument('--move', action='append', default=[], nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--rename', action='append', default=[], nargs=2, metavar=('PATH', 'NEW_NAME'))
+    parser.add_argument('--dedupe', action='store_true',
+                        help="collapse duplicate file references and build files")
+    parser.add_argument('--ops', action='append', default=[], metavar='FILE',
+                        help="JSON lines file of operations ('-' for stdin)")
+    parser.add_argument('--check-cache', action='store_true',
+                        help="check that a project loaded from the binary cache saves byte-identically")
+    args = parser.parse_args(argv)
+
+    if args.check_cache:
+        try:
+            same = check_cache(args.project)
+        except (OSError, PBXParseError) as e:
+            print(f"❌ 無法讀取 {args.project}: {e}", file=sys.stderr)
+            return 1
+        print(f"✅ Cached load of {args.project} saves byte-identically" if same
+              else f"❌ {args.project} saves differently after a cached load")
+        return 0 if same else 1
+
+    transaction = ProjectTransaction(args.project)
+    for group_path in args.add_group:
+        transaction.add_group(group_path)
+    for path in args.add_file:
+        transaction.add_file(path, args.target)
+    for path in args.add_to_sources:
+        transaction.add_to_build_phase(path, args.target)
+    for path in args.remove:
+        transaction.remove(path)
+    for old_path, new_path in args.move:
+        transaction.move(old_path, new_path)
+    for path, new_name in args.rename:
+        transaction.rename(path, new_name)
+    if args.dedupe:
+        transaction.dedupe()
+    for ops_file in args.ops:
+        stream = sys.stdin if ops_file == '-' else open(ops_file, encoding='utf-8')
+        with stream:
+            transaction.extend(json.loads(line) for line in stream if line.strip())
+
+    count = len(transaction)
+    try:
+        transaction.commit()
+    except (KeyError, ValueError, PBXParseError) as e:
+        print(f"❌ 專案未變更: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Applied {count} operations to {args.project}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
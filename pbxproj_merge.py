@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Structural three-way merge of project.pbxproj, usable as a git merge driver.
+
+base, ours and theirs are parsed into object graphs and merged by object ID
+and key rather than by line: a value changed on one side only takes that
+side's version, lists of object IDs (children, files, buildPhases, ...) are merged
+by membership, and any other value changed differently on both sides,
+build-setting lists included, is a conflict. Every object and list is visited once per side, so a merge stays
+linear in the size of the project. The result is written canonically: each
+section sorted by object ID and keys sorted with isa first, as Xcode does.
+
+    git config merge.pbxproj.driver "python3 pbxproj_merge.py %O %A %B"
+    echo '*.pbxproj merge=pbxproj' >> .gitattributes
+
+(`pbxproj_merge.py --install` does the first line; `--check` runs MERGE_CASES.)
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+from pbxproj import _REFERENCE_KEYS, PBXParseError, PBXProj, atomic_write, project_name_for
+from pbxproj_verify import check_project
+
+DRIVER_NAME = "pbxproj"
+DRIVER_COMMAND = "python3 pbxproj_merge.py %O %A %B"
+
+_MISSING = object()
+
+# ((keys below an object, base, ours, theirs), expected merge or None for a conflict), checked by --check
+MERGE_CASES = [
+    # Object IDs merge by membership
+    ((('children',), ['A', 'B'], ['A', 'B', 'C'], ['A', 'D', 'B']), ['A', 'D', 'B', 'C']),
+    ((('files',), ['A', 'B', 'C'], ['A', 'C'], ['A', 'B', 'C', 'D']), ['A', 'C', 'D']),
+    # Setting values repeat tokens, so a membership merge would scramble them
+    ((('buildSettings', 'OTHER_LDFLAGS'), ['-framework', 'Foo'], ['-framework', 'Foo', '-framework', 'Bar'],
+      ['-framework', 'Foo', '-framework', 'Baz']), None),
+    ((('buildSettings', 'OTHER_LDFLAGS'), ['-framework', 'Foo'], ['-framework', 'Foo', '-framework', 'Bar'],
+      ['-framework', 'Foo']), ['-framework', 'Foo', '-framework', 'Bar']),
+]
+
+
+class MergeResult:
+    def __init__(self, project, conflicts, dangling):
+        self.project = project
+        self.conflicts = conflicts  # (path, ours, theirs); ours or theirs is None when deleted there
+        self.dangling = dangling    # (object id, key, missing id) left by a reference to a deleted object
+
+
+def merge_lists(base, ours, theirs):
+    """Merge lists by membership, or return _MISSING when the items are not hashable.
+
+    Ours' order is kept, items theirs removed are dropped and items theirs
+    added are inserted after the item that precedes them in theirs.
+    """
+    try:
+        base_items = set(base)
+        theirs_items = set(theirs)
+    except TypeError:
+        return _MISSING
+    merged = [item for item in ours if item in theirs_items or item not in base_items]
+    present = set(merged)
+    added_after = {}
+    anchor = None
+    for item in theirs:
+        if item in present:
+            anchor = item
+        elif item not in base_items:
+            added_after.setdefault(anchor, []).append(item)
+            present.add(item)
+    if not added_after:
+        return merged
+    result = list(added_after.get(None, ()))
+    for item in merged:
+        result.append(item)
+        result.extend(added_after.get(item, ()))
+    return result
+
+
+def merge_values(base, ours, theirs, path, conflicts, favor=None):
+    if ours == theirs:
+        return ours
+    if base == ours:
+        return theirs
+    if base == theirs:
+        return ours
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        return merge_dicts(base if isinstance(base, dict) else {}, ours, theirs, path, conflicts, favor)
+    # Only the object-ID lists of an object are sets; a list anywhere else (a build setting) is a value
+    if (isinstance(ours, list) and isinstance(theirs, list)
+            and len(path) == 3 and path[0] == 'objects' and path[2] in _REFERENCE_KEYS):
+        merged = merge_lists(base if isinstance(base, list) else [], ours, theirs)
+        if merged is not _MISSING:
+            return merged
+    conflicts.append((path, None if ours is _MISSING else ours, None if theirs is _MISSING else theirs))
+    return theirs if favor == 'theirs' else ours
+
+
+def merge_dicts(base, ours, theirs, path, conflicts, favor=None):
+    merged = {}
+    for key in list(ours) + [key for key in theirs if key not in ours]:
+        value = merge_values(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING),
+                             path + (key,), conflicts, favor)
+        if value is not _MISSING:
+            merged[key] = value
+    # Keys only base had were deleted on both sides
+    return merged
+
+
+def canonical(value):
+    """value with dict keys sorted, isa first; lists keep their order."""
+    if isinstance(value, dict):
+        keys = sorted(value, key=lambda key: (key != 'isa', key))
+        return {key: canonical(value[key]) for key in keys}
+    if isinstance(value, list):
+        return [canonical(item) for item in value]
+    return value
+
+
+def merge_projects(base, ours, theirs, favor=None):
+    """Merge three PBXProj graphs; favor ('ours' or 'theirs') picks the side conflicts resolve to."""
+    conflicts = []
+    root = merge_dicts(base.root, ours.root, theirs.root, (), conflicts, favor)
+    objects = root.pop('objects', {})
+    root = canonical(root)
+    root['objects'] = {object_id: canonical(objects[object_id]) for object_id in sorted(objects)}
+    root = {key: root[key] for key in sorted(root)}
+    comments = {**theirs.comments, **ours.comments}
+    merged = PBXProj(root, name=ours.name, comments={object_id: comment for object_id, comment in comments.items()
+                                                      if object_id in root['objects']})
+    # A side adding a reference to an object the other side deleted leaves it dangling
+    return MergeResult(merged, conflicts, check_project(merged).unresolved)
+
+
+def merge_files(base_file, ours_file, theirs_file, output_file=None, favor=None):
+    """Merge the three files into output_file (default: ours_file, as git expects)."""
+    name = project_name_for(ours_file)
+    projects = []
+    for path in (base_file, ours_file, theirs_file):
+        with open(path, 'r', encoding='utf-8') as f:
+            projects.append(PBXProj.parse(f.read(), name=name))
+    result = merge_projects(*projects, favor=favor)
+    atomic_write(output_file or ours_file, result.project.dump)
+    return result
+
+
+def check_cases():
+    """Problems found merging MERGE_CASES, as messages."""
+    problems = []
+    for (keys, base, ours, theirs), expected in MERGE_CASES:
+        key = '/'.join(keys)
+        conflicts = []
+        merged = merge_values(base, ours, theirs, ('objects', 'ID') + keys, conflicts)
+        if expected is None and not conflicts:
+            problems.append(f"{key}: expected a conflict, merged to {merged}")
+        elif expected is not None and (conflicts or merged != expected):
+            problems.append(f"{key}: expected {expected}, got {merged} with {len(conflicts)} conflicts")
+    return problems
+
+
+def install_driver():
+    for key, value in (('name', "structural project.pbxproj merge"), ('driver', DRIVER_COMMAND)):
+        subprocess.run(['git', 'config', f"merge.{DRIVER_NAME}.{key}", value], check=True)
+
+
+def describe(value):
+    if value is None:
+        return "deleted"
+    text = repr(value)
+    return text if len(text) <= 60 else text[:57] + "..."
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Three-way merge of project.pbxproj by object graph (git merge driver)")
+    parser.add_argument('base', nargs='?', help="common ancestor (%%O)")
+    parser.add_argument('ours', nargs='?', help="our version (%%A); receives the result")
+    parser.add_argument('theirs', nargs='?', help="their version (%%B)")
+    parser.add_argument('-o', '--output', help="write the result here instead of over ours")
+    parser.add_argument('--favor', choices=('ours', 'theirs'),
+                        help="resolve conflicting values to this side and exit 0")
+    parser.add_argument('--install', action='store_true',
+                        help=f"register the driver as merge.{DRIVER_NAME} in the repository's git config")
+    parser.add_argument('--check', action='store_true', help="verify the merge rules against MERGE_CASES")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = check_cases()
+        for problem in problems:
+            print(f"❌ {problem}", file=sys.stderr)
+        if problems:
+            return 1
+        print(f"✅ {len(MERGE_CASES)} merge cases behave as expected")
+        return 0
+
+    if args.install:
+        try:
+            install_driver()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        print(f"🪝 Registered merge.{DRIVER_NAME}; .gitattributes routes *.pbxproj to it")
+        return 0
+    if not (args.base and args.ours and args.theirs):
+        parser.error("base, ours and theirs are required")
+
+    start = time.perf_counter()
+    try:
+        result = merge_files(args.base, args.ours, args.theirs, args.output, args.favor)
+    except PBXParseError as e:
+        # Not something we can parse; leave it to git's line merge
+        print(f"⚠️ {e}; falling back to a line merge", file=sys.stderr)
+        output = args.output or args.ours
+        if output != args.ours:
+            with open(args.ours, 'rb') as src, open(output, 'wb') as dst:
+                dst.write(src.read())
+        return 1 if subprocess.run(['git', 'merge-file', output, args.base, args.theirs]).returncode else 0
+    except OSError as e:
+        print(f"❌ 無法讀取: {e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+
+    for path, ours, theirs in result.conflicts:
+        print(f"{'⚠️' if args.favor else '❌'} {'/'.join(path)}: ours {describe(ours)}, theirs {describe(theirs)}", file=sys.stderr)
+    for object_id, key, ref in result.dangling:
+        print(f"❌ objects/{object_id}/{key} refers to {ref}, which the other side deleted", file=sys.stderr)
+    count = len(result.project.objects)
+    if result.dangling or result.conflicts and not args.favor:
+        print(f"❌ {len(result.conflicts)} conflicts, {len(result.dangling)} dangling references in {count} objects "
+              f"({elapsed * 1000:.0f}ms); {args.favor or 'ours'} was kept for each conflict", file=sys.stderr)
+        return 1
+    print(f"✅ Merged {count} objects in {elapsed * 1000:.0f}ms"
+          + (f", {len(result.conflicts)} conflicts resolved to {args.favor}" if result.conflicts else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Read-only queries over project.pbxproj without a full parse.
+
+The file is memory-mapped; section boundaries and object offsets are indexed
+lazily and only the objects or sections a query touches are parsed.
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import posixpath
+import re
+import sys
+
+from pbxproj import DEFAULT_PROJECT, PBXParseError, _Parser, normalize_path, resolve_paths
+
+_SECTION_RE = re.compile(rb'/\* Begin (\w+) section \*/\n')
+_OBJECT_RE = re.compile(rb'^\t\t([^\s/]+)(?: /\*.*?\*/)? = \{', re.M)
+_ROOT_RE = re.compile(rb'^\trootObject = ([^\s;/]+)', re.M)
+_OBJECTS_RE = re.compile(rb'^\tobjects = \{', re.M)
+# Sections holding what the main group's tree can contain
+_TREE_SECTIONS = ('PBXGroup', 'PBXVariantGroup', 'XCVersionGroup', 'PBXFileReference')
+
+
+class ProjectIndex:
+    def __init__(self, project_file=DEFAULT_PROJECT):
+        self.project_file = project_file
+        self._file = open(project_file, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._sections = None
+        self._offsets = {}
+        self._parsed_sections = {}
+        self._objects = {}
+        self._paths = None
+        self._root_object = None
+        self.comments = {}
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # -- lazy indexes -----------------------------------------------------
+
+    @property
+    def sections(self):
+        """isa -> (start, end) byte range of each section body."""
+        if self._sections is None:
+            sections = {}
+            mm = self._map
+            for match in _SECTION_RE.finditer(mm):
+                isa = match.group(1)
+                end = mm.find(b'/* End ' + isa + b' section */', match.end())
+                if end < 0:
+                    raise PBXParseError(f"Unterminated {isa.decode()} section")
+                sections[isa.decode()] = (match.end(), end)
+            self._sections = sections
+        return self._sections
+
+    def _object_offsets(self, isa):
+        """Sorted (offset, uuid) pairs for the objects of one section."""
+        offsets = self._offsets.get(isa)
+        if offsets is None:
+            start, end = self.sections.get(isa, (0, 0))
+            offsets = [(match.start(), match.group(1).decode())
+                       for match in _OBJECT_RE.finditer(self._map, start, end)]
+            self._offsets[isa] = offsets
+        return offsets
+
+    def _parse(self, start, end):
+        parser = _Parser('{' + self._map[start:end].decode('utf-8') + '}')
+        objects = parser.parse()
+        self.comments.update(parser.comments)
+        return objects
+
+    def _object_at(self, isa, index):
+        offsets = self._object_offsets(isa)
+        start, object_id = offsets[index]
+        if object_id not in self._objects:
+            end = offsets[index + 1][0] if index + 1 < len(offsets) else self.sections[isa][1]
+            self._objects.update(self._parse(start, end))
+        return object_id, self._objects[object_id]
+
+    # -- object access ----------------------------------------------------
+
+    def section(self, isa):
+        """Parse one whole section; returns uuid -> object."""
+        objects = self._parsed_sections.get(isa)
+        if objects is None:
+            start, end = self.sections.get(isa, (0, 0))
+            objects = self._parse(start, end) if end > start else {}
+            self._objects.update(objects)
+            self._parsed_sections[isa] = objects
+        return objects
+
+    def object(self, object_id):
+        if object_id in self._objects:
+            return self._objects[object_id]
+        for isa in self.sections:
+            for index, (_, candidate) in enumerate(self._object_offsets(isa)):
+                if candidate == object_id:
+                    return self._object_at(isa, index)[1]
+        # Remember undefined IDs so they are not searched for again
+        self._objects[object_id] = None
+        return None
+
+    def _matching_indexes(self, isa, text):
+        start, end = self.sections.get(isa, (0, 0))
+        starts = [offset for offset, _ in self._object_offsets(isa)]
+        needle = text.encode()
+        indexes = []
+        position = self._map.find(needle, start, end)
+        while position >= 0:
+            index = bisect.bisect_right(starts, position) - 1
+            if index >= 0 and (not indexes or indexes[-1] != index):
+                indexes.append(index)
+            position = self._map.find(needle, position + len(needle), end)
+        return indexes
+
+    def containing(self, isa, text):
+        """IDs of the objects in a section whose text contains text, without parsing them."""
+        offsets = self._object_offsets(isa)
+        return [offsets[index][1] for index in self._matching_indexes(isa, text)]
+
+    def search(self, isa, text):
+        """Parse and return only the objects of a section whose text contains text."""
+        return dict(self._object_at(isa, index) for index in self._matching_indexes(isa, text))
+
+    @property
+    def root_object(self):
+        """The top-level rootObject ID, looked up outside the objects dictionary."""
+        if self._root_object is None:
+            mm = self._map
+            objects = _OBJECTS_RE.search(mm)
+            if objects is None:
+                raise PBXParseError("no objects dictionary")
+            # Objects are indented by two tabs, so the first one-tab close ends the dictionary
+            end = mm.find(b'\n\t};\n', objects.end())
+            if end < 0:
+                raise PBXParseError("unterminated objects dictionary")
+            match = _ROOT_RE.search(mm, end) or _ROOT_RE.search(mm, 0, objects.start())
+            if match is None:
+                raise PBXParseError("no rootObject")
+            self._root_object = match.group(1).decode()
+        return self._root_object
+
+    def main_group(self):
+        project = self.object(self.root_object)
+        if project is None:
+            raise PBXParseError(f"rootObject {self.root_object} is not defined")
+        return project['mainGroup']
+
+    def comment_for(self, object_id):
+        return self.comments.get(object_id, object_id)
+
+    # -- queries ----------------------------------------------------------
+
+    def file_references(self, name):
+        """File references whose path or name ends with name."""
+        return {object_id: obj for object_id, obj in self.search('PBXFileReference', name).items()
+                if any(value == name or value.endswith('/' + name)
+                       for value in (obj.get('path', ''), obj.get('name', '')))}
+
+    def build_phases_containing(self, name, isa='PBXSourcesBuildPhase', target=None):
+        """(target name, phase id, build file id) for every phase that builds a file called name."""
+        file_refs = self.file_references(name)
+        build_files = {}
+        for file_ref_id in file_refs:
+            for object_id, obj in self.search('PBXBuildFile', file_ref_id).items():
+                if obj.get('fileRef') == file_ref_id:
+                    build_files[object_id] = file_ref_id
+        if not build_files:
+            return []
+        phase_targets = {}
+        for target_id, native_target in self.section('PBXNativeTarget').items():
+            for phase_id in native_target.get('buildPhases', ()):
+                phase_targets[phase_id] = native_target.get('name', target_id)
+        hits = []
+        for build_file_id in build_files:
+            # Phases can list thousands of files; locate the ID instead of parsing them
+            for phase_id in self.containing(isa, build_file_id):
+                target_name = phase_targets.get(phase_id)
+                if target is None or target_name == target:
+                    hits.append((target_name, phase_id, build_file_id))
+        return hits
+
+    def resolved_paths(self):
+        """Map groups and file references below the main group to their project-relative path.
+
+        Resolved as PBXProj.resolved_paths does, so a reference whose own path
+        spells out directories sits in those directories.
+        """
+        if self._paths is None:
+            for isa in _TREE_SECTIONS:
+                self.section(isa)
+            main_group = self.main_group()
+            self._paths = dict(resolve_paths(self._objects.get, main_group))
+        return self._paths
+
+    def group(self, group_path):
+        """The group at a slash separated path; returns (uuid, group) or None.
+
+        The path is matched against resolved paths first, then walked through
+        group names for groups that have no directory of their own.
+        """
+        groups = self.section('PBXGroup')
+        directory = normalize_path(group_path.strip('/'))
+        for object_id, path in self.resolved_paths().items():
+            if path == directory and object_id in groups:
+                return object_id, groups[object_id]
+        group_id = self.main_group()
+        for component in filter(None, group_path.split('/')):
+            for child_id in groups[group_id].get('children', ()):
+                child = groups.get(child_id)
+                if child is not None and component in (child.get('path'), child.get('name')):
+                    group_id = child_id
+                    break
+            else:
+                return None
+        return group_id, groups[group_id]
+
+    def group_files(self, group_path, recursive=False):
+        """Resolved paths of the file references in a directory (and below it if recursive).
+
+        None when neither a group nor any file reference resolves there.
+        """
+        directory = normalize_path(group_path.strip('/'))
+        prefix = f"{directory}/" if directory else ''
+        groups = self.section('PBXGroup')
+        paths = self.resolved_paths()
+        names = {path for object_id, path in paths.items()
+                 if object_id not in groups and path.startswith(prefix)
+                 and (recursive or posixpath.dirname(path) == directory)}
+        found = self.group(group_path)
+        if found is not None:
+            # Products and SDK frameworks live outside the source tree and resolve to no path
+            for child_id in found[1].get('children', ()):
+                child = self.object(child_id)
+                if child is not None and child_id not in paths:
+                    names.add(f"{prefix}{child.get('name') or child.get('path')}")
+        elif not names:
+            return None
+        return sorted(names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query project.pbxproj without parsing all of it")
+    parser.add_argument('--project', default=DEFAULT_PROJECT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('sections', help="list sections and their object counts")
+    command = commands.add_parser('object', help="print one object")
+    command.add_argument('uuid')
+    command = commands.add_parser('in-sources', help="exit 0 if a file is compiled by a Sources phase")
+    command.add_argument('name')
+    command.add_argument('--target')
+    command = commands.add_parser('group', help="list the files of a group, e.g. SignalAir/Core/Security")
+    command.add_argument('path')
+    command.add_argument('-r', '--recursive', action='store_true')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.project):
+        print(f"❌ 找不到 {args.project}", file=sys.stderr)
+        return 2
+
+    with ProjectIndex(args.project) as index:
+        if args.command == 'sections':
+            for isa in index.sections:
+                print(f"{isa:32} {len(index._object_offsets(isa)):6}")
+        elif args.command == 'object':
+            obj = index.object(args.uuid)
+            if obj is None:
+                print(f"❌ {args.uuid} is not defined", file=sys.stderr)
+                return 1
+            for key, value in obj.items():
+                print(f"{key} = {value}")
+        elif args.command == 'in-sources':
+            hits = index.build_phases_containing(args.name, target=args.target)
+            for target_name, phase_id, build_file_id in hits:
+                print(f"✅ {args.name} in {target_name} Sources ({phase_id}) via {build_file_id}")
+            if not hits:
+                print(f"❌ {args.name} is not in any Sources phase")
+                return 1
+        elif args.command == 'group':
+            try:
+                names = index.group_files(args.path, args.recursive)
+            except PBXParseError as e:
+                print(f"❌ 無法讀取 {args.project}: {e}", file=sys.stderr)
+                return 1
+            if names is None:
+                print(f"❌ Group {args.path} not found", file=sys.stderr)
+                return 1
+            for name in names:
+                print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Integrity checks for project.pbxproj in one linear pass over its objects.
+
+Reports references to undefined objects, objects unreachable from the root
+object, files built more than once by the same phase and Swift files on disk
+that no Sources phase compiles (unless the generator deliberately left them
+out as unreachable). Cheap enough to run as a pre-commit hook.
+"""
+
+import argparse
+import os
+import shlex
+import stat
+import subprocess
+import sys
+import time
+
+from pbxproj import _REFERENCE_KEYS, DEFAULT_PROJECT, PBXParseError, PBXProj, project_name_for
+from source_manifest import scan_sources
+from swift_index import load_excluded
+
+_BUILD_PHASES = frozenset({
+    'PBXCopyFilesBuildPhase', 'PBXFrameworksBuildPhase', 'PBXHeadersBuildPhase',
+    'PBXResourcesBuildPhase', 'PBXShellScriptBuildPhase', 'PBXSourcesBuildPhase',
+})
+
+# Checks the staged blob, so a partially staged project is judged on what will be committed
+HOOK_SCRIPT = """#!/bin/sh
+# Installed by pbxproj_verify.py --install-hook
+project={project}
+git diff --cached --name-only | grep -qxF "$project" || exit 0
+git show ":$project" | exec python3 pbxproj_verify.py --project "$project" --stdin
+"""
+
+
+class IntegrityReport:
+    def __init__(self):
+        self.unresolved = []             # (object id, key, missing id)
+        self.orphans = []                # object ids unreachable from rootObject
+        self.duplicate_build_files = []  # (phase id, file ref id, [build file ids])
+        self.missing_from_sources = []   # project-relative paths
+        self.object_count = 0
+
+    @property
+    def ok(self):
+        return not (self.unresolved or self.orphans or self.duplicate_build_files or self.missing_from_sources)
+
+
+def check_project(project, project_root=None, source_roots=None, excluded=()):
+    """Check a PBXProj; project_root enables the on-disk Sources check, which skips excluded paths."""
+    objects = project.objects
+    report = IntegrityReport()
+    report.object_count = len(objects)
+    root_id = project.root.get('rootObject')
+    edges = {}
+    build_file_refs = {}
+    phases = []
+
+    # Single pass: record every reference, flagging the unresolved ones
+    for object_id, obj in objects.items():
+        isa = obj.get('isa')
+        targets = []
+        for key, value in obj.items():
+            if key not in _REFERENCE_KEYS:
+                continue
+            if key == 'remoteGlobalIDString' and obj.get('containerPortal') != root_id:
+                # Points into another project
+                continue
+            for ref in (value if isinstance(value, list) else (value,)):
+                targets.append(ref)
+                if ref not in objects:
+                    report.unresolved.append((object_id, key, ref))
+        if isa == 'PBXProject':
+            target_attributes = obj.get('attributes', {}).get('TargetAttributes', {})
+            for ref in target_attributes:
+                if ref not in objects:
+                    report.unresolved.append((object_id, 'TargetAttributes', ref))
+        elif isa == 'PBXBuildFile':
+            build_file_refs[object_id] = obj.get('fileRef') or obj.get('productRef')
+        elif isa in _BUILD_PHASES:
+            phases.append((object_id, obj))
+        edges[object_id] = targets
+    if root_id not in objects:
+        report.unresolved.append(('', 'rootObject', root_id))
+
+    # Reachability from the root object
+    seen = {root_id}
+    stack = [root_id]
+    while stack:
+        for ref in edges.get(stack.pop(), ()):
+            if ref not in seen:
+                seen.add(ref)
+                stack.append(ref)
+    report.orphans = [object_id for object_id in objects if object_id not in seen]
+
+    # The same file built twice by one phase, directly or through two build files
+    compiled = set()
+    for phase_id, phase in phases:
+        by_file_ref = {}
+        for build_file_id in phase.get('files', ()):
+            file_ref_id = build_file_refs.get(build_file_id)
+            if file_ref_id is not None:
+                by_file_ref.setdefault(file_ref_id, []).append(build_file_id)
+        for file_ref_id, build_file_ids in by_file_ref.items():
+            if len(build_file_ids) > 1:
+                report.duplicate_build_files.append((phase_id, file_ref_id, build_file_ids))
+        if phase.get('isa') == 'PBXSourcesBuildPhase':
+            compiled.update(by_file_ref)
+
+    if project_root is not None and root_id in objects:
+        paths = project.resolved_paths()
+        compiled_paths = {paths[file_ref_id] for file_ref_id in compiled if file_ref_id in paths}
+        if source_roots is None:
+            source_roots = default_source_roots(project, paths, project_root)
+        for source_root in source_roots:
+            for swift_file in scan_sources(os.path.join(project_root, source_root)).manifest.paths():
+                path = os.path.normpath(os.path.join(source_root, swift_file))
+                if path not in compiled_paths and path not in excluded:
+                    report.missing_from_sources.append(path)
+    return report
+
+
+def default_source_roots(project, paths, project_root):
+    """Directories of the groups directly under the main group that have a path on disk."""
+    roots = []
+    for child_id in project.get(project.main_group).get('children', ()):
+        child = project.get(child_id)
+        if child and child.get('isa') == 'PBXGroup' and child.get('path') and child_id in paths \
+                and os.path.isdir(os.path.join(project_root, paths[child_id])):
+            roots.append(paths[child_id])
+    return roots
+
+
+def install_hook(project_file):
+    git_dir = subprocess.run(['git', 'rev-parse', '--git-dir'], capture_output=True,
+                             text=True, check=True).stdout.strip()
+    hook_file = os.path.join(git_dir, 'hooks', 'pre-commit')
+    if os.path.exists(hook_file):
+        raise FileExistsError(f"{hook_file} already exists; add pbxproj_verify.py to it by hand")
+    os.makedirs(os.path.dirname(hook_file), exist_ok=True)
+    with open(hook_file, 'w') as f:
+        f.write(HOOK_SCRIPT.format(project=shlex.quote(project_file)))
+    os.chmod(hook_file, os.stat(hook_file).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return hook_file
+
+
+def print_report(project, report, elapsed):
+    for object_id, key, ref in report.unresolved:
+        print(f"❌ {project.comment_for(object_id) if object_id else 'root'} ({object_id}) "
+              f"{key} -> undefined {ref}")
+    for object_id in report.orphans:
+        print(f"⚠️ Orphan {project.get(object_id).get('isa')} {project.comment_for(object_id)} ({object_id})")
+    for phase_id, file_ref_id, build_file_ids in report.duplicate_build_files:
+        print(f"❌ {project.comment_for(file_ref_id)} is built {len(build_file_ids)} times by "
+              f"{project.comment_for(phase_id)} ({phase_id}): {', '.join(build_file_ids)}")
+    for path in report.missing_from_sources:
+        print(f"❌ {path} is not in any Sources phase")
+    summary = (f"{report.object_count} objects in {elapsed * 1000:.0f}ms: "
+               f"{len(report.unresolved)} unresolved, {len(report.orphans)} orphans, "
+               f"{len(report.duplicate_build_files)} duplicate build files, "
+               f"{len(report.missing_from_sources)} missing from Sources")
+    print(("✅ " if report.ok else "❌ ") + summary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check project.pbxproj for dangling references and missing sources")
+    parser.add_argument('--project', default=DEFAULT_PROJECT)
+    parser.add_argument('--source-root', action='append',
+                        help="directory (relative to the project root) whose Swift files must be compiled; "
+                             "defaults to the top-level groups")
+    parser.add_argument('--no-disk', action='store_true', help="skip the on-disk Sources check")
+    parser.add_argument('--stdin', action='store_true',
+                        help="read the project text from stdin (e.g. git show :PATH); --project still "
+                             "locates the sources")
+    parser.add_argument('--install-hook', action='store_true',
+                        help="install a git pre-commit hook running this check; refused while the project fails it")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.stdin:
+            project = PBXProj.parse(sys.stdin.read(), name=project_name_for(args.project))
+        else:
+            project = PBXProj.load(args.project)
+    except (OSError, PBXParseError) as e:
+        print(f"❌ 無法讀取 {args.project}: {e}", file=sys.stderr)
+        return 1
+    project_root = None if args.no_disk else os.path.dirname(os.path.dirname(os.path.abspath(args.project)))
+    try:
+        report = check_project(project, project_root, args.source_root,
+                               load_excluded(os.path.dirname(os.path.abspath(args.project))))
+    except FileNotFoundError as e:
+        print(f"❌ 找不到 {e.filename}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    print_report(project, report, elapsed)
+    if args.install_hook:
+        if not report.ok:
+            # The hook would reject every commit that touches the project until this is fixed
+            print(f"❌ Not installing the hook: {args.project} fails the check already", file=sys.stderr)
+            return 1
+        try:
+            print(f"🪝 Installed {install_hook(args.project)}")
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
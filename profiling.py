@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Opt-in per-phase wall time, CPU time and memory for the project tooling.
+
+Code marks its phases with `with profiler.phase('scan'):`; phases nest. A
+Profiler records, for each one, wall and CPU time and the tracemalloc peak
+above the memory traced when the phase started. save() writes the phases as
+JSON plus collapsed stacks ("create_project;write;render 1234", self time in
+microseconds) next to it, which flamegraph.pl, inferno and speedscope read.
+
+NULL_PROFILER is the default everywhere and records nothing. Tracing
+allocations slows Python code down, so compare profiled runs with each
+other rather than with unprofiled timings.
+"""
+
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+FOLDED_SUFFIX = ".folded"
+
+
+class _NullProfiler:
+    enabled = False
+
+    @contextlib.contextmanager
+    def phase(self, name, **info):
+        yield {}
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.phases = []  # finished phases, in the order they started
+        self._open = []
+        self._origin = time.perf_counter()
+
+    def _traced(self):
+        if not self.memory:
+            return 0, 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return tracemalloc.get_traced_memory()
+
+    def _fold_peak(self, peak):
+        for record in self._open:
+            record['_peak'] = max(record['_peak'], peak)
+
+    @contextlib.contextmanager
+    def phase(self, name, **info):
+        """Time the block as phase name; info (e.g. a file count) is stored with it."""
+        current, peak = self._traced()
+        # Resetting the peak for this phase must not lose the one of the phases around it
+        self._fold_peak(peak)
+        if self.memory:
+            tracemalloc.reset_peak()
+        record = {'stack': [parent['name'] for parent in self._open] + [name], 'name': name,
+                  'start': time.perf_counter() - self._origin, **info,
+                  '_base': current, '_peak': current, '_children': 0.0}
+        self.phases.append(record)
+        self._open.append(record)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall'] = time.perf_counter() - wall
+            record['cpu'] = time.process_time() - cpu
+            current, peak = self._traced()
+            self._open.pop()
+            record['_peak'] = max(record['_peak'], peak)
+            self._fold_peak(record['_peak'])
+            record['peak_bytes'] = record['_peak'] - record['_base']
+            record['net_bytes'] = current - record['_base']
+            if self._open:
+                self._open[-1]['_children'] += record['wall']
+
+    def report(self):
+        phases = [{key: value for key, value in record.items() if not key.startswith('_')}
+                  for record in self.phases if 'wall' in record]
+        for phase in phases:
+            phase['stack'] = ';'.join(phase['stack'])
+        return {
+            'wall': sum(record['wall'] for record in self.phases if len(record['stack']) == 1 and 'wall' in record),
+            'memory': self.memory,
+            'phases': phases,
+        }
+
+    def folded(self):
+        """Collapsed stacks with each phase's self time in microseconds, one line per stack."""
+        totals = {}
+        for record in self.phases:
+            if 'wall' not in record:
+                continue
+            stack = ';'.join(name.replace(';', ':').replace(' ', '_') for name in record['stack'])
+            totals[stack] = totals.get(stack, 0) + max(record['wall'] - record['_children'], 0.0)
+        return ''.join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in totals.items())
+
+    def save(self, path):
+        """Write the JSON report to path and the collapsed stacks beside it; return both paths."""
+        folded_path = os.path.splitext(path)[0] + FOLDED_SUFFIX
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=1)
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            f.write(self.folded())
+        return path, folded_path
+
+    def finish(self, path):
+        """Print the phases and save them to path (see save())."""
+        self.print_summary()
+        report_path, folded_path = self.save(path)
+        print(f"📊 Profile written to {report_path} (flame graph stacks: {folded_path})")
+
+    def print_summary(self):
+        for record in self.phases:
+            if 'wall' not in record:
+                continue
+            memory = f", peak +{record['peak_bytes'] / 1024:.0f} KiB" if self.memory else ""
+            print(f"⏱️ {'  ' * (len(record['stack']) - 1)}{record['name']}: "
+                  f"{record['wall'] * 1000:.1f}ms wall, {record['cpu'] * 1000:.1f}ms CPU{memory}")
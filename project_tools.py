@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""One entry point for SignalAir project maintenance.
+
+    project_tools.py add SignalAir/Core/Mesh/Flood.swift + verify + query in-sources Flood.swift
+
+Subcommands are chained with '+' and share one loaded project, which is
+written back once at the end (or before a subcommand that reads the file
+itself). Each subcommand imports its modules only when it runs, so a bare
+invocation stays within STARTUP_BUDGET_MS.
+"""
+
+import os
+import sys
+
+DEFAULT_PROJECT = "SignalAir-iOS/SignalAir Rescue.xcodeproj/project.pbxproj"
+CHAIN_SEPARATOR = '+'
+# Wall time allowed for `project_tools.py --help`, interpreter start included
+STARTUP_BUDGET_MS = 60
+# Modules a bare invocation must not import
+HEAVY_MODULES = ('argparse', 'pbxproj', 'create_xcodeproj', 'pbxproj_verify', 'pbxproj_query', 'app_icons', 'swift_index', 'module_shards', 'profiling', 'mesh_codec', 'numpy', 'mesh_sim', 'asyncio', 'scaffold', 'subprocess')
+
+
+class Session:
+    """The project shared by a chain of subcommands; loaded on first use, saved once."""
+
+    def __init__(self, project_file=DEFAULT_PROJECT):
+        self.project_file = project_file
+        self._project = None
+        self.dirty = False
+
+    @property
+    def project(self):
+        if self._project is None:
+            from pbxproj import PBXProj
+            self._project = PBXProj.load(self.project_file)
+        return self._project
+
+    def flush(self):
+        if self.dirty:
+            self._project.save(self.project_file)
+            self.dirty = False
+
+    def reset(self):
+        """Forget the loaded project after another tool rewrote the file."""
+        self.flush()
+        self._project = None
+
+
+def _parser(command, description):
+    import argparse
+    return argparse.ArgumentParser(prog=f"project_tools.py {command}", description=description)
+
+
+def cmd_generate(session, argv):
+    parser = _parser('generate', "Generate the Xcode project from the SignalAir sources")
+    parser.add_argument('--name', default="SignalAir")
+    parser.add_argument('--bundle-id', default="com.signalair.app")
+    parser.add_argument('--basic', action='store_true', help="skip xcodegen and write project.pbxproj directly")
+    parser.add_argument('--prune-unreachable', action='store_true',
+                        help="leave Swift files unreachable from the app entry point out of Sources")
+    parser.add_argument('--shard-modules', action='store_true',
+                        help="split the sources into the framework targets of module_shards.SHARDS")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="write per-phase wall/CPU time and memory peaks as JSON, plus flame graph stacks")
+    parser.add_argument('--variants', metavar='NAMES',
+                        help="comma-separated create_xcodeproj.VARIANTS (Debug,Release,Benchmark): write one "
+                             "single-configuration <name>-<variant>.xcodeproj each, in parallel from one scan")
+    parser.add_argument('--workers', type=int, help="processes for --variants (default: one per CPU)")
+    parser.add_argument('--root', help="directory holding the NAME source directory "
+                                       "(default: the one holding the --project .xcodeproj)")
+    args = parser.parse_args(argv)
+    # The generator works relative to the directory holding the sources, like create_xcodeproj.py
+    root = args.root or os.path.dirname(os.path.dirname(os.path.abspath(session.project_file)))
+    if not os.path.isdir(os.path.join(root, args.name)):
+        print(f"❌ 找不到 {os.path.join(root, args.name)}: no sources to generate from", file=sys.stderr)
+        return 1
+    from create_xcodeproj import XcodeprojGenerator, generate_variants
+    from profiling import Profiler
+    session.flush()
+    profiler = Profiler() if args.profile else None
+    variants = args.variants.split(',') if args.variants else []
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        generator = XcodeprojGenerator(args.name, args.bundle_id, prune_unreachable=args.prune_unreachable,
+                                       shard_modules=args.shard_modules, profiler=profiler,
+                                       variant=variants[0] if variants else None)
+        if variants:
+            generate_variants(args.name, args.bundle_id, variants, args.workers,
+                              prune_unreachable=args.prune_unreachable, shard_modules=args.shard_modules,
+                              profiler=profiler)
+        elif args.basic:
+            generator.create_basic_project()
+        else:
+            generator.create_project()
+    finally:
+        os.chdir(cwd)
+    # Later subcommands in the chain work on the project just generated (the first variant's)
+    session.reset()
+    session.project_file = os.path.join(root, generator.xcodeproj_dir, 'project.pbxproj')
+    print(f"📌 Chained commands now use {session.project_file}")
+    if profiler is not None:
+        profiler.finish(args.profile)
+    return 0
+
+
+def cmd_add(session, argv):
+    parser = _parser('add', "Add Swift files to their groups and the target's Sources phase")
+    parser.add_argument('paths', nargs='+', metavar='PATH')
+    parser.add_argument('--target', help="target name (default: the app target)")
+    args = parser.parse_args(argv)
+    project = session.project
+    added = 0
+    for path in args.paths:
+        if project.file_reference(path) is None:
+            added += 1
+        project.add_file(path, args.target)
+    session.dirty = True
+    print(f"✅ Added {added} files ({len(args.paths) - added} already in the project)")
+    return 0
+
+
+def cmd_remove(session, argv):
+    parser = _parser('remove', "Remove files or groups with their build files and emptied groups")
+    parser.add_argument('paths', nargs='+', metavar='PATH')
+    args = parser.parse_args(argv)
+    missing = session.project.remove_paths(args.paths)
+    session.dirty = True
+    for path in missing:
+        print(f"⚠️ {path} is not in the project")
+    print(f"🗑️ Removed {len(args.paths) - len(missing)} paths")
+    return 1 if missing else 0
+
+
+def cmd_verify(session, argv):
+    parser = _parser('verify', "Check for dangling references, orphans, duplicates and missing sources")
+    parser.add_argument('--no-disk', action='store_true', help="skip the on-disk Sources check")
+    args = parser.parse_args(argv)
+    import time
+    from pbxproj_verify import check_project, load_excluded, print_report
+    start = time.perf_counter()
+    project = session.project
+    xcodeproj_dir = os.path.dirname(os.path.abspath(session.project_file))
+    project_root = None if args.no_disk else os.path.dirname(xcodeproj_dir)
+    report = check_project(project, project_root, excluded=load_excluded(xcodeproj_dir))
+    print_report(project, report, time.perf_counter() - start)
+    return 0 if report.ok else 1
+
+
+def cmd_query(session, argv):
+    # The query engine maps the file itself, so pending edits are written first
+    session.flush()
+    import pbxproj_query
+    return pbxproj_query.main(['--project', session.project_file] + argv)
+
+
+def cmd_icons(session, argv):
+    # Verification reads the project file itself
+    session.flush()
+    import app_icons
+    return app_icons.main(['--project', session.project_file] + argv)
+
+
+def cmd_unreachable(session, argv):
+    # --prune rewrites the project file itself
+    session.flush()
+    import swift_index
+    status = swift_index.main(argv)
+    session.reset()
+    return status
+
+
+def cmd_shards(session, argv):
+    import module_shards
+    return module_shards.main(argv)
+
+
+def cmd_capture(session, argv):
+    import mesh_codec
+    return mesh_codec.main(argv)
+
+
+def cmd_simulate(session, argv):
+    import mesh_sim
+    return mesh_sim.main(argv)
+
+
+def cmd_scaffold(session, argv):
+    import scaffold
+    args = scaffold.build_parser('project_tools.py scaffold').parse_args(argv)
+    register = not args.no_register and os.path.exists(session.project_file)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(session.project_file)))
+    status, result = scaffold.run(args, session.project if register else None, project_root)
+    if result is not None and result.registered and not args.check:
+        session.dirty = True
+    return status
+
+
+def cmd_budget(session, argv):
+    parser = _parser('budget', "Measure bare startup time against STARTUP_BUDGET_MS")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+    import statistics
+    import subprocess
+    import time
+    script = os.path.abspath(__file__)
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--help'], stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    # A bare invocation must not pull in any subcommand's modules
+    probe = subprocess.run([sys.executable, '-c',
+                            f"import sys; sys.argv = ['project_tools.py', '--help']; "
+                            f"sys.path.insert(0, {os.path.dirname(script)!r}); import project_tools, io, contextlib; "
+                            f"contextlib.redirect_stdout(io.StringIO()).__enter__(); project_tools.main(); "
+                            f"print(*[m for m in project_tools.HEAVY_MODULES if m in sys.modules], file=sys.stderr)"],
+                           capture_output=True, text=True, check=True)
+    loaded = probe.stderr.split()
+    median = statistics.median(timings)
+    print(f"⏱️ Startup median {median:.1f}ms, max {max(timings):.1f}ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f}ms)")
+    if loaded:
+        print(f"❌ Bare startup imported {', '.join(loaded)}")
+    if median > args.budget_ms:
+        print("❌ Startup is over budget")
+    if loaded or median > args.budget_ms:
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+COMMANDS = {
+    'generate': (cmd_generate, "generate the Xcode project from the sources"),
+    'add': (cmd_add, "add Swift files to the project"),
+    'remove': (cmd_remove, "remove files or groups from the project"),
+    'verify': (cmd_verify, "check project integrity"),
+    'query': (cmd_query, "read-only queries (sections, object, in-sources, group)"),
+    'icons': (cmd_icons, "render app icons from their 1024x1024 master and verify them"),
+    'unreachable': (cmd_unreachable, "list (or --prune) Swift files unreachable from the app entry point"),
+    'shards': (cmd_shards, "show how the sources split into framework targets and what blocks each move"),
+    'capture': (cmd_capture, "decode mesh frames from a capture file, or --check the codec against the Swift bytes"),
+    'simulate': (cmd_simulate, "simulate mesh relay and topology exchange over thousands of virtual peers"),
+    'scaffold': (cmd_scaffold, "create source files from the create_*.sh templates, writing only what changed"),
+    'budget': (cmd_budget, "check startup time against the budget"),
+}
+
+
+def usage():
+    lines = [f"usage: project_tools.py [--project FILE] COMMAND [ARGS] [{CHAIN_SEPARATOR} COMMAND [ARGS] ...]",
+             "", "commands:"]
+    lines += [f"  {name:10} {description}" for name, (_, description) in COMMANDS.items()]
+    lines += ["", "Run 'project_tools.py COMMAND -h' for a command's options."]
+    return '\n'.join(lines)
+
+
+def split_chain(argv):
+    chain = [[]]
+    for arg in argv:
+        if arg == CHAIN_SEPARATOR:
+            chain.append([])
+        else:
+            chain[-1].append(arg)
+    return [segment for segment in chain if segment]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    project_file = DEFAULT_PROJECT
+    if argv[:1] == ['--project'] and len(argv) > 1:
+        project_file, argv = argv[1], argv[2:]
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+
+    chain = split_chain(argv)
+    unknown = [segment[0] for segment in chain if segment[0] not in COMMANDS]
+    if unknown:
+        print(f"❌ Unknown command: {', '.join(unknown)}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    session = Session(project_file)
+    status = 0
+    try:
+        for command, *args in chain:
+            status = COMMANDS[command][0](session, args)
+            if status:
+                # Later commands assume the earlier ones succeeded
+                break
+        session.flush()
+    except (KeyError, ValueError, OSError) as e:
+        print(f"❌ {command}: {e}", file=sys.stderr)
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
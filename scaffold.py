@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Scaffold the SignalAir sources from the templates in the create_*.sh scripts.
+
+Each script's `cat > "path" << 'EOF'` heredocs are compiled once into
+templates holding the file's bytes and their SHA-256. A file is only
+written when the digest of what is on disk differs, so re-running on an
+up-to-date tree writes nothing and leaves every mtime (and Xcode's build
+state) alone. Files are emitted on a thread pool, and any file the project
+does not reference yet is added to its group and the app's Sources phase
+in the same run.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pbxproj import DEFAULT_PROJECT, PBXParseError, PBXProj, atomic_write
+
+DEFAULT_ROOT = "SignalAir-iOS"
+# Setup order from setup_complete_project.sh; a later part wins when two write the same path
+PARTS = {
+    'app': "create_app_files.sh",
+    'models': "create_model_files.sh",
+    'services': "create_service_files.sh",
+    'features': "create_feature_files.sh",
+    'legal': "create_legal_purchase_files.sh",
+    'remaining': "create_remaining_features.sh",
+}
+
+_HEREDOC = re.compile(r'''cat > "([^"]+)" << (['"]?)(\w+)\2\s*$''')
+# Lines outside heredocs that only talk to the terminal
+_IGNORED = re.compile(r'''\s*(#.*|echo\b.*)?$''')
+
+
+class ScaffoldError(ValueError):
+    pass
+
+
+class Template:
+    __slots__ = ('path', 'part', 'text', 'data', 'digest')
+
+    def __init__(self, path, part, text):
+        self.path = path
+        self.part = part
+        self.text = text
+        self.data = text.encode('utf-8')
+        self.digest = hashlib.sha256(self.data).digest()
+
+
+def compile_script(script, part=None):
+    """Templates for the heredocs of a create_*.sh script, in script order.
+
+    Only quoted delimiters ('EOF') are accepted: their bodies are literal, so
+    the template is exactly what bash would write. Any other command is an
+    error rather than something silently skipped.
+    """
+    with open(script, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    templates = []
+    index = 1 if lines and lines[0].startswith('#!') else 0
+    while index < len(lines):
+        line = lines[index]
+        match = _HEREDOC.match(line)
+        if match is None:
+            if not _IGNORED.match(line):
+                raise ScaffoldError(f"{script}:{index + 1}: unsupported command: {line.strip()}")
+            index += 1
+            continue
+        path, quote, delimiter = match.groups()
+        if not quote:
+            raise ScaffoldError(f"{script}:{index + 1}: unquoted << {delimiter} would expand shell variables")
+        try:
+            end = lines.index(delimiter, index + 1)
+        except ValueError:
+            raise ScaffoldError(f"{script}:{index + 1}: {path} has no closing {delimiter}") from None
+        body = lines[index + 1:end]
+        templates.append(Template(path, part, ''.join(line + '\n' for line in body)))
+        index = end + 1
+    return templates
+
+
+def compile_parts(parts=None, scripts_dir=None):
+    """{path: Template} for the given PARTS names (default: all), later parts overriding earlier ones."""
+    scripts_dir = scripts_dir or os.path.dirname(os.path.abspath(__file__))
+    templates = {}
+    for part in parts or PARTS:
+        if part not in PARTS:
+            raise ScaffoldError(f"unknown part {part!r}; expected any of {', '.join(PARTS)}")
+        for template in compile_script(os.path.join(scripts_dir, PARTS[part]), part):
+            templates[template.path] = template
+    return templates
+
+
+def _current_digest(path, size):
+    try:
+        if os.stat(path).st_size != size:
+            # Cannot match; no need to read it
+            return b''
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).digest()
+    except FileNotFoundError:
+        return None
+
+
+def _emit(job):
+    template, path, check = job
+    current = _current_digest(path, len(template.data))
+    if current == template.digest:
+        return 'unchanged'
+    if not check:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        atomic_write(path, lambda f: f.write(template.text))
+    return 'created' if current is None else 'updated'
+
+
+class ScaffoldResult:
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.unchanged = []
+        self.registered = []
+        self.bytes_written = 0
+
+
+def scaffold(templates, root=DEFAULT_ROOT, project=None, project_root=None, workers=None, check=False):
+    """Write the templates whose content differs under root; register unreferenced files in project.
+
+    With check nothing is written or registered; the result says what would be.
+    """
+    result = ScaffoldResult()
+    ordered = sorted(templates.values(), key=lambda template: template.path)
+    jobs = [(template, os.path.join(root, template.path), check) for template in ordered]
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        for template, status in zip(ordered, pool.map(_emit, jobs)):
+            getattr(result, status).append(template.path)
+            if status != 'unchanged' and not check:
+                result.bytes_written += len(template.data)
+    if project is not None:
+        project_root = project_root or root
+        for template in ordered:
+            path = os.path.relpath(os.path.join(root, template.path), project_root).replace(os.sep, '/')
+            if project.file_reference(path) is None:
+                result.registered.append(path)
+                if not check:
+                    project.add_file(path)
+    return result
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Create the SignalAir source files from the "
+                                                            "create_*.sh templates, writing only what changed")
+    parser.add_argument('parts', nargs='*', metavar='PART',
+                        help=f"any of {', '.join(PARTS)} (default: all, in setup order)")
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="directory containing SignalAir/")
+    parser.add_argument('--no-register', action='store_true', help="leave the Xcode project alone")
+    parser.add_argument('--check', action='store_true',
+                        help="write nothing; exit 1 if any file or project entry is out of date")
+    parser.add_argument('--workers', type=int)
+    return parser
+
+
+def run(args, project=None, project_root=None):
+    """Scaffold as parsed by build_parser; returns (exit status, ScaffoldResult or None)."""
+    start = time.perf_counter()
+    try:
+        templates = compile_parts(args.parts)
+    except (OSError, ScaffoldError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2, None
+    result = scaffold(templates, args.root, None if args.no_register else project, project_root,
+                      args.workers, args.check)
+    elapsed = time.perf_counter() - start
+    verb = "would be" if args.check else "was"
+    for label, paths in (('created', result.created), ('updated', result.updated),
+                         ('added to the project', result.registered)):
+        for path in paths:
+            print(f"{'⚠️' if args.check else '📝'} {path} {verb} {label}")
+    print(f"🏗️ {len(templates)} templates: {len(result.created)} created, {len(result.updated)} updated, "
+          f"{len(result.unchanged)} unchanged, {len(result.registered)} registered; "
+          f"{result.bytes_written} bytes written in {elapsed:.3f}s")
+    if args.check and (result.created or result.updated or result.registered):
+        return 1, result
+    return 0, result
+
+
+def main(argv=None):
+    parser = build_parser()
+    parser.add_argument('--project', default=DEFAULT_PROJECT)
+    args = parser.parse_args(argv)
+    project = None
+    if not args.no_register:
+        try:
+            project = PBXProj.load(args.project)
+        except (OSError, PBXParseError) as e:
+            print(f"❌ 無法讀取 {args.project}: {e}", file=sys.stderr)
+            return 1
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(args.project)))
+    status, result = run(args, project, project_root)
+    if result is not None and result.registered and not args.check:
+        project.save(args.project)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Incremental source-tree scanning backed by a persisted manifest."""
+
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MANIFEST_VERSION = 3
+MANIFEST_NAME = ".source-manifest.json"
+# Directories Xcode treats as a single item; they are recorded but never descended into
+BUNDLE_EXTENSIONS = (
+    '.xcassets', '.appiconset', '.imageset', '.colorset', '.dataset', '.symbolset',
+    '.lproj', '.bundle', '.framework', '.xcframework', '.app', '.appex',
+    '.xcdatamodeld', '.xcdatamodel', '.scnassets', '.docc', '.playground',
+    '.xcodeproj', '.xcworkspace',
+)
+
+
+class SourceManifest:
+    """Per-directory snapshot of a source tree.
+
+    dirs maps a directory path (relative to root, '' for root) to
+    {"mtime_ns", "ino", "files": {name: [size, mtime_ns, ino]}, "subdirs": [...],
+    "bundles": [...], "hash"}, where hash covers the names of every file,
+    directory and bundle below it.
+    """
+
+    def __init__(self, root, suffixes, dirs=None):
+        self.root = root
+        self.suffixes = tuple(suffixes)
+        self.dirs = dirs if dirs is not None else {}
+
+    @classmethod
+    def load(cls, manifest_file):
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != MANIFEST_VERSION:
+            return None
+        return cls(data['root'], data['suffixes'], data['dirs'])
+
+    def save(self, manifest_file):
+        tmp_file = manifest_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'root': self.root,
+                'suffixes': list(self.suffixes),
+                'dirs': self.dirs,
+            }, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_file, manifest_file)
+
+    def files(self):
+        """Yield (relative_path, [size, mtime_ns, ino]) for every tracked file."""
+        for directory, entry in self.dirs.items():
+            for name, stat in entry['files'].items():
+                yield (f"{directory}/{name}" if directory else name), stat
+
+    def paths(self):
+        return sorted(path for path, _ in self.files())
+
+    def bundles(self):
+        """Sorted relative paths of the bundle directories (see BUNDLE_EXTENSIONS)."""
+        return sorted(f"{directory}/{name}" if directory else name
+                      for directory, entry in self.dirs.items() for name in entry['bundles'])
+
+    def subtree_hash(self, directory=''):
+        entry = self.dirs.get(directory)
+        return entry.get('hash') if entry else None
+
+
+class ScanResult:
+    def __init__(self, manifest, added, removed, renamed, dirs_scanned, dirs_reused, bundles_changed=False):
+        self.manifest = manifest
+        self.added = added
+        self.removed = removed
+        self.renamed = renamed
+        self.dirs_scanned = dirs_scanned
+        self.dirs_reused = dirs_reused
+        self.bundles_changed = bundles_changed
+
+    @property
+    def changed(self):
+        return bool(self.added or self.removed or self.renamed or self.bundles_changed)
+
+    def summary(self):
+        return (f"+{len(self.added)} -{len(self.removed)} ~{len(self.renamed)} "
+                f"({self.dirs_scanned} dirs scanned, {self.dirs_reused} unchanged)")
+
+
+def _scan_dir(root, directory, previous, suffixes):
+    path = os.path.join(root, directory) if directory else root
+    dir_stat = os.stat(path)
+    if previous is not None and previous['mtime_ns'] == dir_stat.st_mtime_ns \
+            and previous['ino'] == dir_stat.st_ino:
+        # No entry was added, removed or renamed here; reuse the snapshot.
+        # Copied because the subtree hash is recomputed on the new entry.
+        return directory, dict(previous), False
+    files = {}
+    subdirs = []
+    bundles = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name.startswith('.'):
+                    continue
+                if entry.name.endswith(BUNDLE_EXTENSIONS):
+                    bundles.append(entry.name)
+                else:
+                    subdirs.append(entry.name)
+            elif entry.name.endswith(suffixes):
+                stat = entry.stat(follow_symlinks=False)
+                files[entry.name] = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+    subdirs.sort()
+    bundles.sort()
+    return directory, {
+        'mtime_ns': dir_stat.st_mtime_ns,
+        'ino': dir_stat.st_ino,
+        'files': files,
+        'subdirs': subdirs,
+        'bundles': bundles,
+    }, True
+
+
+def _hash_subtrees(dirs):
+    """Set a Merkle hash on every entry from its file and bundle names and its subdirectories' hashes."""
+    for directory in sorted(dirs, key=lambda d: d.count('/') + bool(d), reverse=True):
+        entry = dirs[directory]
+        digest = hashlib.sha1()
+        for name in sorted(entry['files']):
+            digest.update(b'f\0' + name.encode() + b'\n')
+        for name in entry['bundles']:
+            digest.update(b'b\0' + name.encode() + b'\n')
+        for name in entry['subdirs']:
+            child = dirs.get(f"{directory}/{name}" if directory else name)
+            if child is not None:
+                digest.update(b'd\0' + name.encode() + b'\0' + child['hash'].encode() + b'\n')
+        entry['hash'] = digest.hexdigest()[:16]
+
+
+def scan_sources(root, previous=None, suffixes=('.swift',), workers=None):
+    """Scan root, reusing entries from previous for directories whose mtime is unchanged.
+
+    Directories are fanned out across a thread pool; scandir/stat release the
+    GIL so sibling directories are listed in parallel. Raises FileNotFoundError
+    if root itself does not exist.
+    """
+    suffixes = tuple(suffixes)
+    if previous is not None and (previous.root != root or previous.suffixes != suffixes):
+        previous = None
+    old_dirs = previous.dirs if previous is not None else {}
+    dirs = {}
+    scanned = reused = 0
+
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        root_future = pool.submit(_scan_dir, root, '', old_dirs.get(''), suffixes)
+        pending = {root_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    directory, entry, fresh = future.result()
+                except FileNotFoundError:
+                    if future is root_future:
+                        # A missing root is an error, not an empty tree
+                        raise
+                    # Removed while scanning; the parent's next scan drops it
+                    continue
+                dirs[directory] = entry
+                if fresh:
+                    scanned += 1
+                else:
+                    reused += 1
+                for name in entry['subdirs']:
+                    child = f"{directory}/{name}" if directory else name
+                    pending.add(pool.submit(_scan_dir, root, child, old_dirs.get(child), suffixes))
+
+    _hash_subtrees(dirs)
+    manifest = SourceManifest(root, suffixes, dirs)
+    if previous is None:
+        return ScanResult(manifest, manifest.paths(), [], [], scanned, reused)
+
+    old_files = dict(previous.files())
+    new_files = dict(manifest.files())
+    added = {path for path in new_files if path not in old_files}
+    removed = {path for path in old_files if path not in new_files}
+
+    # A removed and an added path sharing an inode and size is a rename
+    removed_by_inode = {(old_files[path][2], old_files[path][0]): path for path in removed}
+    renamed = []
+    for path in sorted(added):
+        size, _, ino = new_files[path]
+        old_path = removed_by_inode.pop((ino, size), None)
+        if old_path is not None:
+            renamed.append((old_path, path))
+            added.discard(path)
+            removed.discard(old_path)
+    return ScanResult(manifest, sorted(added), sorted(removed), renamed, scanned, reused,
+                      manifest.bundles() != previous.bundles())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""Index Swift sources by the type names they declare and reference.
+
+Each file is tokenized (comments and string contents skipped, identifiers
+inside string interpolation kept) into the names it declares, the types it
+extends and every identifier it mentions. Results are cached per content
+hash in CACHE_NAME, and stale files are tokenized on a process pool.
+
+From the entry point, a file is reachable if a reachable file mentions a
+type, global function or global constant it declares, or if it extends a
+type declared by a reachable file. Member accesses (`.name`), argument
+labels and names a file declares as its own members or locals are not
+counted as mentions; a name declared by several files resolves to the ones
+closest to the mentioning file in the directory tree. Extensions of
+types not declared in the sources (SwiftUI's Color, Foundation's Data, ...)
+are always treated as reachable, since their members are used without
+naming the file's types. Files that import a TEST_MODULES module can only
+belong to a test bundle and are never reachable from the app.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from source_manifest import scan_sources
+
+DEFAULT_ROOT = "SignalAir-iOS"
+DEFAULT_ENTRY = "SignalAir/App/SignalAirApp.swift"
+CACHE_NAME = ".swift-index.json"
+# Kept in the .xcodeproj: project-relative paths deliberately left out of Sources
+EXCLUDED_NAME = ".excluded-sources.json"
+CACHE_VERSION = 3
+# Build output that can contain generated Swift files
+EXCLUDED_DIRS = frozenset({'build', 'DerivedData', '.build'})
+TEST_MODULES = frozenset({'XCTest', 'Testing'})
+# Below this many stale files the pool costs more than it saves
+POOL_THRESHOLD = 32
+
+_TYPE_KEYWORDS = frozenset({'class', 'struct', 'enum', 'protocol', 'actor', 'typealias'})
+_GLOBAL_KEYWORDS = frozenset({'func', 'var', 'let', 'case'})
+# Statements that can only appear at file scope in a script (main.swift, swift run files)
+_SCRIPT_KEYWORDS = frozenset({'for', 'while', 'guard', 'repeat', 'switch', 'do', 'defer', 'if'})
+_KEYWORDS = frozenset({
+    'as', 'associatedtype', 'async', 'await', 'break', 'case', 'catch', 'class', 'continue',
+    'convenience', 'default', 'defer', 'deinit', 'do', 'dynamic', 'else', 'enum', 'extension',
+    'fallthrough', 'false', 'fileprivate', 'final', 'for', 'func', 'get', 'guard', 'if', 'import',
+    'in', 'indirect', 'infix', 'init', 'inout', 'internal', 'is', 'lazy', 'let', 'mutating', 'nil',
+    'nonisolated', 'nonmutating', 'open', 'operator', 'optional', 'override', 'postfix', 'prefix',
+    'private', 'protocol', 'public', 'repeat', 'required', 'rethrows', 'return', 'self', 'Self',
+    'set', 'some', 'any', 'static', 'struct', 'subscript', 'super', 'switch', 'throw', 'throws',
+    'true', 'try', 'typealias', 'unowned', 'var', 'weak', 'where', 'while', 'willSet', 'didSet',
+    'actor', 'consuming', 'borrowing',
+})
+
+# Attributes the compiler defines; any other @Name is a property wrapper, result builder,
+# global actor or macro declared somewhere and referenced by its use
+_BUILTIN_ATTRIBUTES = frozenset({
+    'attached', 'autoclosure', 'available', 'backDeployed', 'convention', 'discardableResult',
+    'dynamicCallable', 'dynamicMemberLookup', 'escaping', 'freestanding', 'frozen', 'globalActor',
+    'IBAction', 'IBDesignable', 'IBInspectable', 'IBOutlet', 'IBSegueAction', 'inlinable', 'inline',
+    'main', 'NSApplicationMain', 'NSCopying', 'NSManaged', 'nonobjc', 'objc', 'objcMembers',
+    'preconcurrency', 'propertyWrapper', 'requires_stored_property_inits', 'resultBuilder',
+    'retroactive', 'Sendable', 'testable', 'UIApplicationMain', 'unchecked', 'unknown',
+    'usableFromInline', 'warn_unqualified_access',
+})
+
+_TOKEN_RE = re.compile(r'''
+    (?P<line_comment>//[^\n]*)
+  | (?P<directive>\#(?:if|elseif|else|endif|warning|error|sourceLocation)\b[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<string>\#*"""|\#*")
+  | (?P<attribute>@[A-Za-z_]\w*)
+  | (?P<member>\.\s*`?[A-Za-z_]\w*`?)
+  | (?P<label>(?<=[(,])\s*(?:`?\w+`?\s+)?`?[A-Za-z_]\w*`?\s*:)
+  | (?P<ident>`?[A-Za-z_]\w*`?)
+  | (?P<brace>[{}])
+''', re.X)
+
+
+def _skip_block_comment(text, position):
+    """Position just after the block comment opened before position; they nest."""
+    depth = 1
+    while depth and position < len(text):
+        opening = text.find('/*', position)
+        closing = text.find('*/', position)
+        if closing < 0:
+            return len(text)
+        if 0 <= opening < closing:
+            depth += 1
+            position = opening + 2
+        else:
+            depth -= 1
+            position = closing + 2
+    return position
+
+
+def _scan_string(text, position, delimiter, interpolations):
+    """Position just after a string literal; interpolated source goes to interpolations."""
+    hashes = delimiter.count('#')
+    quote = delimiter[hashes:]
+    terminator = quote + '#' * hashes
+    escape = '\\' + '#' * hashes
+    while position < len(text):
+        if text.startswith(terminator, position):
+            return position + len(terminator)
+        if text.startswith(escape, position):
+            position += len(escape)
+            if text.startswith('(', position):
+                depth = 1
+                start = position + 1
+                position += 1
+                while depth and position < len(text):
+                    depth += {'(': 1, ')': -1}.get(text[position], 0)
+                    position += 1
+                interpolations.append(text[start:position - 1])
+            else:
+                position += 1
+        elif quote == '"' and text[position] == '\n':
+            # Unterminated single-line string; resume on the next line
+            return position
+        else:
+            position += 1
+    return position
+
+
+def tokenize(text):
+    """Return {'declared', 'extended', 'imports', 'public', 'referenced'} for one Swift source.
+
+    public holds the declared names marked public or open, the ones another module can
+    use, and the extended names whose extension is public.
+    """
+    declared = set()
+    exported = set()
+    members = set()
+    variables = set()
+    script = False
+    extended = set()
+    imports = set()
+    referenced = set()
+    pending = [text]
+    while pending:
+        source = pending.pop()
+        depth = 0
+        previous = None
+        # Set by a file-scope public/open until the declaration it modifies is named
+        access = False
+        position = 0
+        while True:
+            match = _TOKEN_RE.search(source, position)
+            if match is None:
+                break
+            position = match.end()
+            kind = match.lastgroup
+            if kind in ('line_comment', 'directive'):
+                continue
+            if kind == 'block_comment':
+                position = _skip_block_comment(source, position)
+                continue
+            if kind == 'string':
+                position = _scan_string(source, position, match.group(), pending)
+                previous = None
+                access = False
+                continue
+            if kind == 'attribute':
+                if match.group()[1:] not in _BUILTIN_ATTRIBUTES:
+                    referenced.add(match.group()[1:])
+                previous = None
+                continue
+            if kind in ('member', 'label'):
+                previous = None
+                access = False
+                continue
+            if kind == 'brace':
+                depth += 1 if match.group() == '{' else -1
+                previous = None
+                access = False
+                continue
+            name = match.group().strip('`')
+            if (previous in _TYPE_KEYWORDS or previous in _GLOBAL_KEYWORDS) and name not in _KEYWORDS:
+                if depth:
+                    # Nested types are reached through their outer type, like members
+                    members.add(name)
+                elif previous in ('let', 'var'):
+                    variables.add(name)
+                else:
+                    declared.add(name)
+                if access and not depth:
+                    exported.add(name)
+            elif previous == 'extension':
+                extended.add(name)
+                if access and not depth:
+                    exported.add(name)
+            elif previous == 'import':
+                imports.add(name)
+            elif name in _SCRIPT_KEYWORDS and depth == 0:
+                script = True
+            elif name not in _KEYWORDS:
+                referenced.add(name)
+            if name in ('public', 'open') and not depth:
+                access = True
+            elif name not in _KEYWORDS:
+                access = False
+            previous = name if name in _KEYWORDS else None
+    # A script's top-level variables are locals of its implicit main, not globals
+    (members if script else declared).update(variables)
+    return {
+        'declared': sorted(declared),
+        'extended': sorted(extended),
+        'imports': sorted(imports),
+        'public': sorted(exported & (declared | extended)),
+        'referenced': sorted(referenced - declared - members),
+    }
+
+
+def _index_file(item):
+    path, text = item
+    return path, tokenize(text)
+
+
+def swift_files(root):
+    return [path for path in scan_sources(root).manifest.paths()
+            if not EXCLUDED_DIRS.intersection(path.split('/')[:-1])]
+
+
+def load_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('files', {}) if data.get('version') == CACHE_VERSION else {}
+
+
+def save_cache(cache_file, files):
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'files': files}, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+
+def _closest(source, paths):
+    """The paths sharing the most leading directories with source."""
+    if len(paths) < 2:
+        return paths
+    directories = source.split('/')[:-1]
+    shared = [len(os.path.commonprefix([directories, path.split('/')[:-1]])) for path in paths]
+    best = max(shared)
+    return [path for path, count in zip(paths, shared) if count == best]
+
+
+class SourceIndex:
+    def __init__(self, files, indexed):
+        self.files = files      # path -> {'hash', 'declared', 'extended', 'imports', 'public', 'referenced'}
+        self.indexed = indexed  # paths tokenized this run (the rest came from the cache)
+
+    def declarers(self):
+        by_name = {}
+        for path, entry in self.files.items():
+            for name in entry['declared']:
+                by_name.setdefault(name, []).append(path)
+        return by_name
+
+    def reachable(self, entries):
+        """Files reachable from entries (paths relative to the indexed root)."""
+        tests = {path for path, entry in self.files.items() if TEST_MODULES.intersection(entry['imports'])}
+        by_name = {name: [path for path in paths if path not in tests] for name, paths in self.declarers().items()}
+        extensions = {}
+        roots = set(entries)
+        for path, entry in self.files.items():
+            if path in tests:
+                continue
+            for name in entry['extended']:
+                if name in by_name:
+                    extensions.setdefault(name, []).append(path)
+                else:
+                    roots.add(path)
+        seen = set(path for path in roots if path in self.files)
+        stack = list(seen)
+        while stack:
+            source = stack.pop()
+            entry = self.files[source]
+            targets = [path for name in entry['referenced'] for path in _closest(source, by_name.get(name, ()))]
+            targets += [path for name in entry['declared'] for path in extensions.get(name, ())]
+            for path in targets:
+                if path not in seen:
+                    seen.add(path)
+                    stack.append(path)
+        return seen
+
+    def unreachable(self, entries):
+        reachable = self.reachable(entries)
+        return sorted(path for path in self.files if path not in reachable)
+
+    def dependencies(self, paths=None):
+        """path -> set of files it needs to compile: declarers of what it mentions or extends.
+
+        Only files in paths (default: all) are considered, on either side.
+        """
+        paths = set(self.files if paths is None else paths)
+        by_name = {}
+        for name, declarers in self.declarers().items():
+            declarers = [path for path in declarers if path in paths]
+            if declarers:
+                by_name[name] = declarers
+        graph = {}
+        for source in paths:
+            entry = self.files[source]
+            targets = {path for name in entry['referenced'] for path in _closest(source, by_name.get(name, ()))}
+            targets.update(path for name in entry['extended'] for path in by_name.get(name, ()))
+            targets.discard(source)
+            graph[source] = targets
+        return graph
+
+
+def index_sources(root, paths=None, cache_file=None, workers=None):
+    """Index the Swift files under root, re-tokenizing only those whose content hash changed."""
+    paths = swift_files(root) if paths is None else paths
+    cached = load_cache(cache_file) if cache_file else {}
+    files = {}
+    stale = []
+    for path in paths:
+        with open(os.path.join(root, path), 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        entry = cached.get(path)
+        if entry is not None and entry.get('hash') == digest:
+            files[path] = entry
+        else:
+            files[path] = {'hash': digest}
+            stale.append((path, data.decode('utf-8', errors='replace')))
+
+    if len(stale) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_index_file, stale, chunksize=max(1, len(stale) // (4 * (os.cpu_count() or 1)))))
+    else:
+        results = [_index_file(item) for item in stale]
+    for path, entry in results:
+        files[path].update(entry)
+
+    if cache_file and (stale or len(cached) != len(files)):
+        save_cache(cache_file, files)
+    return SourceIndex(files, [path for path, _ in stale])
+
+
+def load_excluded(xcodeproj_dir):
+    try:
+        with open(os.path.join(xcodeproj_dir, EXCLUDED_NAME), 'r', encoding='utf-8') as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+
+def save_excluded(xcodeproj_dir, paths):
+    excluded_file = os.path.join(xcodeproj_dir, EXCLUDED_NAME)
+    if not paths:
+        if os.path.exists(excluded_file):
+            os.remove(excluded_file)
+        return
+    with open(excluded_file, 'w', encoding='utf-8') as f:
+        json.dump(sorted(paths), f, indent=1)
+
+
+def prune_sources(project, unreachable, target_name=None):
+    """Drop the build files of unreachable project-relative paths from a target's Sources phase."""
+    phase_id = project.build_phase(project.target(target_name))
+    doomed = []
+    for path in unreachable:
+        file_ref_id = project.file_reference(path)
+        build_file_id = project.build_file_for(file_ref_id, phase_id) if file_ref_id else None
+        if build_file_id is not None:
+            doomed.append(build_file_id)
+    if doomed:
+        # Only the build files go; the references stay visible in the navigator
+        project.remove_objects(doomed)
+    return len(doomed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find Swift files unreachable from the app's entry point")
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="directory to index (the project root)")
+    parser.add_argument('--entry', action='append',
+                        help=f"entry point relative to the root (default: {DEFAULT_ENTRY}); may be repeated")
+    parser.add_argument('--prune', action='store_true',
+                        help="remove unreachable files from the app target's Sources phase")
+    parser.add_argument('--project', help="project to prune (default: the .xcodeproj in the root)")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = args.entry or [DEFAULT_ENTRY]
+    missing = [entry for entry in entries if not os.path.exists(os.path.join(args.root, entry))]
+    if missing:
+        print(f"❌ 找不到入口檔案: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    index = index_sources(args.root, cache_file=os.path.join(args.root, CACHE_NAME), workers=args.workers)
+    unreachable = index.unreachable(entries)
+    for path in unreachable:
+        print(f"💤 {path}")
+    print(f"🔎 {len(index.files)} Swift files ({len(index.indexed)} tokenized) in "
+          f"{time.perf_counter() - start:.3f}s: {len(unreachable)} unreachable from {', '.join(entries)}")
+
+    if args.prune and unreachable:
+        from pbxproj import PBXParseError, PBXProj
+        project_file = args.project or next(
+            (os.path.join(args.root, name, 'project.pbxproj') for name in sorted(os.listdir(args.root))
+             if name.endswith('.xcodeproj')), None)
+        if project_file is None:
+            print(f"❌ No .xcodeproj in {args.root}", file=sys.stderr)
+            return 1
+        try:
+            project = PBXProj.load(project_file)
+            pruned = prune_sources(project, unreachable)
+            project.save(project_file)
+            xcodeproj_dir = os.path.dirname(project_file)
+            save_excluded(xcodeproj_dir, load_excluded(xcodeproj_dir) | set(unreachable))
+        except (OSError, PBXParseError) as e:
+            print(f"❌ 無法處理 {project_file}: {e}", file=sys.stderr)
+            return 1
+        print(f"✂️ Removed {pruned} files from the Sources phase of {project_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -112,6 +112,13 @@ else
     echo "❌ 內購系統可能有問題"
 fi
 
+# 檢查專案檔案：未定義的 UUID、孤立物件、重複的建置檔案、未加入 Sources 的 Swift 檔案
+echo ""
+echo "🔗 檢查 Xcode 專案物件引用..."
+if ! python3 pbxproj_verify.py --project "SignalAir-iOS/SignalAir Rescue.xcodeproj/project.pbxproj"; then
+    echo "❌ 專案檔案有問題，請參考上方列表"
+fi
+
 # 最終結果
 echo ""
 echo "🎉 專案驗證完成！"
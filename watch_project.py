@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Keep project.pbxproj in sync with Swift files added to or removed from SignalAir-iOS/SignalAir."""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from pbxproj import DEFAULT_PROJECT, PBXParseError, PBXProj
+from source_manifest import scan_sources
+
+DEFAULT_SOURCE_ROOT = "SignalAir-iOS/SignalAir"
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifySource:
+    """Recursive inotify watch reporting ('added' | 'removed', path) changes."""
+
+    def __init__(self, root, suffix='.swift'):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.suffix = suffix
+        self._dirs = {}
+        self._watch_tree(root, None)
+
+    def close(self):
+        os.close(self.fd)
+
+    def _watch_tree(self, top, changes):
+        for directory, dirs, files in os.walk(top):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                continue
+            self._dirs[wd] = directory
+            if changes is not None:
+                # A new directory may already hold files by the time its watch is in place
+                changes.extend(('added', os.path.join(directory, name))
+                               for name in files if name.endswith(self.suffix))
+
+    def _unwatch_tree(self, top):
+        # Watches follow the inode, so a moved directory would keep reporting under its old path
+        for wd, directory in list(self._dirs.items()):
+            if directory == top or directory.startswith(top + os.sep):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+
+    def poll(self, timeout):
+        """Return the changes seen within timeout seconds (possibly empty)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        changes = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+                offset += length
+                self._handle(wd, mask, name, changes)
+        return changes
+
+    def _handle(self, wd, mask, name, changes):
+        if mask & IN_Q_OVERFLOW:
+            changes.append(('rescan', self.root))
+            return
+        directory = self._dirs.get(wd)
+        if directory is None:
+            return
+        if mask & (IN_DELETE_SELF | IN_IGNORED):
+            self._dirs.pop(wd, None)
+            return
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith('.'):
+                self._watch_tree(path, changes)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                if mask & IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+                changes.append(('removed_dir', path))
+            return
+        if not name.endswith(self.suffix):
+            return
+        if mask & (IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE):
+            changes.append(('added', path))
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            changes.append(('removed', path))
+
+
+class PollingSource:
+    """Fallback that rescans with the source manifest; unchanged directories cost one stat."""
+
+    def __init__(self, root, suffix='.swift', interval=1.0):
+        self.root = root
+        self.suffix = suffix
+        self.interval = interval
+        self._manifest = scan_sources(root, suffixes=(suffix,)).manifest
+
+    def close(self):
+        pass
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        scan = scan_sources(self.root, self._manifest, suffixes=(self.suffix,))
+        self._manifest = scan.manifest
+        changes = [('added', os.path.join(self.root, path)) for path in scan.added]
+        changes += [('removed', os.path.join(self.root, path)) for path in scan.removed]
+        for old_path, new_path in scan.renamed:
+            changes.append(('removed', os.path.join(self.root, old_path)))
+            changes.append(('added', os.path.join(self.root, new_path)))
+        return changes
+
+
+class ProjectWatcher:
+    def __init__(self, source_root=DEFAULT_SOURCE_ROOT, project_file=DEFAULT_PROJECT,
+                 debounce=0.25, max_delay=2.0, polling=False, interval=1.0):
+        self.source_root = source_root
+        self.project_file = project_file
+        # Project paths are relative to the directory holding the .xcodeproj
+        self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(project_file)))
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # The tree as last synced; an overflow only applies what changed since
+        self._manifest = scan_sources(source_root).manifest
+        self.source = None
+        if not polling:
+            try:
+                self.source = InotifySource(source_root)
+            except OSError as e:
+                print(f"⚠️ inotify unavailable ({e}), falling back to polling")
+        if self.source is None:
+            self.source = PollingSource(source_root, interval=interval)
+
+    def project_path(self, path):
+        return os.path.relpath(os.path.abspath(path), self.project_root).replace(os.sep, '/')
+
+    def next_batch(self):
+        """Block until a burst of changes has settled and return it."""
+        pending = {}
+        first = None
+        while True:
+            timeout = self.debounce if pending else None
+            if first is not None:
+                timeout = max(0.0, min(timeout, first + self.max_delay - time.monotonic()))
+            changes = self.source.poll(timeout if timeout is not None else 3600)
+            for kind, path in changes:
+                # Later events win, so create-then-delete within a burst cancels out
+                pending[path] = kind
+            if changes and first is None:
+                first = time.monotonic()
+            if pending and (not changes or time.monotonic() - first >= self.max_delay):
+                return pending
+
+    def rescan(self):
+        """(manifest, added, removed): Swift files created or removed since the last synced manifest.
+
+        Files that were already on disk are left alone, so ones deliberately
+        kept out of the project (e.g. excluded as unreachable) stay out.
+        """
+        scan = scan_sources(self.source_root, self._manifest)
+        added = list(scan.added) + [new_path for _, new_path in scan.renamed]
+        removed = list(scan.removed) + [old_path for old_path, _ in scan.renamed]
+        return (scan.manifest,
+                [self.project_path(os.path.join(self.source_root, path)) for path in added],
+                [self.project_path(os.path.join(self.source_root, path)) for path in removed])
+
+    def apply(self, batch):
+        """Sync a batch into the project; returns (added, removed) counts, or None if it has to be retried."""
+        rescan = 'rescan' in batch.values()
+        if rescan:
+            print("⚠️ inotify queue overflowed; rescanning the source tree")
+        added = sorted(path for path, kind in batch.items() if kind == 'added' and os.path.isfile(path))
+        removed = sorted(path for path, kind in batch.items()
+                         if kind in ('removed', 'removed_dir') and not os.path.exists(path))
+        if not added and not removed and not rescan:
+            return 0, 0
+        start = time.perf_counter()
+        try:
+            project = PBXProj.load(self.project_file)
+            added = [self.project_path(path) for path in added]
+            paths = [self.project_path(path) for path in removed]
+            if rescan:
+                # Events were dropped; the tree on disk says what changed since the last sync
+                manifest, created, deleted = self.rescan()
+                added = sorted(set(added) | set(created))
+                paths = sorted(set(paths) | set(deleted))
+            count = 0
+            for project_path in added:
+                if project.file_reference(project_path) is None:
+                    project.add_file(project_path)
+                    count += 1
+            # Build files and groups left empty go with the removed files, in one pass
+            missing = project.remove_paths(paths)
+            removed_count = len(paths) - len(missing)
+            if count or removed_count:
+                project.save(self.project_file)
+            if rescan:
+                self._manifest = manifest
+        except (OSError, PBXParseError) as e:
+            # Typically Xcode or git rewriting the file; the next batch tries again
+            print(f"❌ 無法更新 {self.project_file}: {e}; retrying with the next batch", file=sys.stderr)
+            return None
+        elapsed = time.perf_counter() - start
+        print(f"🔄 Synced {count} new and {removed_count} removed files into project.pbxproj "
+              f"in {elapsed * 1000:.0f}ms")
+        return count, removed_count
+
+    def run(self):
+        print(f"👀 Watching {self.source_root} ({type(self.source).__name__})")
+        batch = {}
+        try:
+            while True:
+                # A batch that failed to apply is merged into the next one, later events winning
+                batch.update(self.next_batch())
+                if self.apply(batch) is not None:
+                    batch = {}
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.source.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch the SignalAir sources and keep project.pbxproj in sync")
+    parser.add_argument('--source-root', default=DEFAULT_SOURCE_ROOT)
+    parser.add_argument('--project', default=DEFAULT_PROJECT)
+    parser.add_argument('--debounce', type=float, default=0.25,
+                        help="seconds of quiet before a burst is applied")
+    parser.add_argument('--max-delay', type=float, default=2.0,
+                        help="apply a continuous burst at least this often")
+    parser.add_argument('--poll', action='store_true', help="use polling instead of inotify")
+    parser.add_argument('--interval', type=float, default=1.0, help="polling interval in seconds")
+    args = parser.parse_args(argv)
+    ProjectWatcher(args.source_root, args.project, args.debounce, args.max_delay,
+                   args.poll, args.interval).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Layered .xcconfig files for Xcode build settings.
+
+Project-level settings are split into Base.xcconfig, shared by every
+configuration, plus one file per configuration that includes it. Each target
+gets <Target>.xcconfig, with per-configuration files only where its
+configurations differ. XCBuildConfiguration objects then keep empty
+buildSettings and point at their layer through baseConfigurationReference,
+so settings changes never touch project.pbxproj.
+"""
+
+import argparse
+import os
+import sys
+
+from pbxproj import DEFAULT_PROJECT, PBXParseError, PBXProj, write_if_changed
+
+CONFIGS_DIR = "Configs"
+BASE_NAME = "Base"
+
+
+def format_value(value):
+    """Render a buildSettings value as xcconfig text; lists become space-separated words."""
+    if isinstance(value, list):
+        return ' '.join(f'"{item}"' if ' ' in item else item for item in value)
+    return value
+
+
+def render(settings, includes=(), source=None):
+    lines = [f"// Generated by {source}" if source else "// Build settings layer"]
+    lines += [f'#include "{include}"' for include in includes]
+    if includes:
+        lines.append("")
+    lines += [f"{key} = {format_value(settings[key])}" for key in sorted(settings)]
+    return '\n'.join(lines) + '\n'
+
+
+def load(path, _seen=None):
+    """Settings of an xcconfig file with its #includes applied; later assignments win."""
+    seen = _seen if _seen is not None else set()
+    path = os.path.normpath(path)
+    if path in seen:
+        return {}
+    seen.add(path)
+    settings = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('//', 1)[0].strip()
+            if line.startswith('#include'):
+                include = line[len('#include'):].strip().lstrip('?').strip().strip('"')
+                include_path = os.path.join(os.path.dirname(path), include)
+                if os.path.exists(include_path):
+                    settings.update(load(include_path, seen))
+            elif '=' in line:
+                key, value = line.split('=', 1)
+                settings[key.strip()] = value.strip()
+    return settings
+
+
+def effective_settings(project, config, project_root):
+    """A configuration's inline buildSettings layered over its base xcconfig, if any."""
+    settings = {}
+    base_id = config.get('baseConfigurationReference')
+    if base_id:
+        path = project.resolved_paths().get(base_id)
+        if path and os.path.exists(os.path.join(project_root, path)):
+            settings.update(load(os.path.join(project_root, path)))
+    settings.update(config.get('buildSettings', {}))
+    return settings
+
+
+def split_layers(configurations):
+    """Split {config name: settings} into (settings shared by all, {config name: the rest})."""
+    settings_list = list(configurations.values())
+    if not settings_list:
+        return {}, {}
+    common = {key: value for key, value in settings_list[0].items()
+              if all(other.get(key) == value for other in settings_list[1:])}
+    own = {name: {key: value for key, value in settings.items() if key not in common}
+           for name, settings in configurations.items()}
+    return common, own
+
+
+def plan_layers(project_settings, target_settings):
+    """Lay out xcconfig files for project and target configurations.
+
+    project_settings maps configuration name to settings; target_settings maps
+    target name to the same. Returns (files, assignments) where files maps a
+    file name to (includes, settings) and assignments maps (target name or
+    None for the project, configuration name) to the file it should use.
+    """
+    files = {}
+    assignments = {}
+    common, own = split_layers(project_settings)
+    if project_settings:
+        files[f"{BASE_NAME}.xcconfig"] = ((), common)
+    for config_name, settings in own.items():
+        files[f"{config_name}.xcconfig"] = ((f"{BASE_NAME}.xcconfig",), settings)
+        assignments[(None, config_name)] = f"{config_name}.xcconfig"
+    for target_name, configurations in target_settings.items():
+        common, own = split_layers(configurations)
+        target_file = f"{target_name}.xcconfig"
+        files[target_file] = ((), common)
+        for config_name, settings in own.items():
+            if settings:
+                files[f"{target_name}-{config_name}.xcconfig"] = ((target_file,), settings)
+                assignments[(target_name, config_name)] = f"{target_name}-{config_name}.xcconfig"
+            else:
+                assignments[(target_name, config_name)] = target_file
+    return files, assignments
+
+
+def write_layers(directory, files, source=None):
+    """Write the planned files into directory; return how many actually changed."""
+    os.makedirs(directory, exist_ok=True)
+    changed = 0
+    for file_name, (includes, settings) in files.items():
+        text = render(settings, includes, source)
+        if write_if_changed(os.path.join(directory, file_name), lambda f, text=text: f.write(text)):
+            changed += 1
+    return changed
+
+
+def configurations_of(project, list_id):
+    """(config id, name, object) for each configuration in an XCConfigurationList."""
+    config_list = project.get(list_id) or {}
+    return [(config_id, project.get(config_id).get('name'), project.get(config_id))
+            for config_id in config_list.get('buildConfigurations', ())]
+
+
+def collect_settings(project):
+    """Return (project settings, target settings) of configurations without a base xcconfig."""
+    skipped = []
+    project_settings = {}
+    for config_id, name, config in configurations_of(project, project.project.get('buildConfigurationList')):
+        if config.get('baseConfigurationReference'):
+            skipped.append(project.comment_for(config_id))
+        else:
+            project_settings[name] = config.get('buildSettings', {})
+    target_settings = {}
+    for target_id in project.project.get('targets', ()):
+        target = project.get(target_id)
+        for config_id, name, config in configurations_of(project, target.get('buildConfigurationList')):
+            if config.get('baseConfigurationReference'):
+                skipped.append(f"{target['name']} {name}")
+            else:
+                target_settings.setdefault(target['name'], {})[name] = config.get('buildSettings', {})
+    return project_settings, target_settings, skipped
+
+
+def apply_layers(project, files, assignments, configs_dir=CONFIGS_DIR):
+    """Reference the files from a group and point each configuration at its layer."""
+    group_id = project.ensure_group(configs_dir)
+    file_refs = {}
+    for file_name in sorted(files):
+        path = f"{configs_dir}/{file_name}"
+        file_refs[file_name] = project.file_reference(path) or project.add_file_reference(path, group_id)
+    targets = {project.get(target_id)['name']: project.get(target_id) for target_id in project.project.get('targets', ())}
+    for (target_name, config_name), file_name in assignments.items():
+        owner = project.project if target_name is None else targets[target_name]
+        for config_id, name, config in configurations_of(project, owner.get('buildConfigurationList')):
+            if name == config_name:
+                config['baseConfigurationReference'] = file_refs[file_name]
+                config['buildSettings'] = {}
+
+
+def extract(project_file, configs_dir=CONFIGS_DIR, apply=False):
+    """Move the inline settings of project_file into xcconfig layers; return (files, skipped)."""
+    project = PBXProj.load(project_file)
+    project_settings, target_settings, skipped = collect_settings(project)
+    files, assignments = plan_layers(project_settings, target_settings)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(project_file)))
+    write_layers(os.path.join(project_root, configs_dir), files, source="xcconfig.py extract")
+    if apply:
+        apply_layers(project, files, assignments, configs_dir)
+        project.save(project_file)
+    return files, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract a project's build settings into layered xcconfig files")
+    parser.add_argument('--project', default=DEFAULT_PROJECT)
+    parser.add_argument('--configs-dir', default=CONFIGS_DIR,
+                        help="directory for the xcconfig files, relative to the project root")
+    parser.add_argument('--apply', action='store_true',
+                        help="also point the configurations at the files and clear their inline settings")
+    args = parser.parse_args(argv)
+    try:
+        files, skipped = extract(args.project, args.configs_dir, args.apply)
+    except (OSError, PBXParseError) as e:
+        print(f"❌ 無法處理 {args.project}: {e}", file=sys.stderr)
+        return 1
+    for name in skipped:
+        print(f"⚠️ {name} already has a base configuration; left as is")
+    for file_name, (includes, settings) in files.items():
+        print(f"📝 {args.configs_dir}/{file_name}: {len(settings)} settings")
+    if args.apply:
+        print(f"✅ Configurations now use the xcconfig files in {args.configs_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())